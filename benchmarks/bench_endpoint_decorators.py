@@ -0,0 +1,41 @@
+""" Micro-benchmark of the per-call overhead of the endpoint decorators.
+Run it with `python -m benchmarks.bench_endpoint_decorators`.
+"""
+import timeit
+import typing
+
+from notionx.utils import organize_kwargs_as_a_dict_param
+from notionx.validation_tools import validate_dict_parameter, organize_and_validate_dict_parameter
+
+_KEY_SCOPE = ("filter", "sorts", "start_cursor", "page_size")
+
+
+def plain(database_id: str, body_data: typing.Optional[typing.Dict] = None) -> typing.Optional[typing.Dict]:
+    return body_data
+
+
+@organize_kwargs_as_a_dict_param("body_data")
+@validate_dict_parameter("body_data", _KEY_SCOPE)
+def stacked(database_id: str, body_data: typing.Optional[typing.Dict] = None) -> typing.Optional[typing.Dict]:
+    return body_data
+
+
+@organize_and_validate_dict_parameter("body_data", _KEY_SCOPE)
+def merged(database_id: str, body_data: typing.Optional[typing.Dict] = None) -> typing.Optional[typing.Dict]:
+    return body_data
+
+
+def main(number: int = 100_000, repeat: int = 5):
+    cases = [
+        ("plain function", lambda: plain("database_id", {"page_size": 100, "start_cursor": "cursor"})),
+        ("stacked decorators", lambda: stacked("database_id", page_size=100, start_cursor="cursor")),
+        ("merged decorator", lambda: merged("database_id", page_size=100, start_cursor="cursor")),
+    ]
+    print(f"{'case':<20}{'best of ' + str(repeat):>16}")
+    for name, call in cases:
+        best = min(timeit.repeat(call, number=number, repeat=repeat))
+        print(f"{name:<20}{best / number * 1e6:>13.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+""" Micro-benchmark of the JSON codecs on a database query response of 100 pages.
+Run it with `python -m benchmarks.bench_json_codec`.
+"""
+import timeit
+
+from notionx.codec import get_codec
+
+
+def _make_page(index: int) -> dict:
+    return {
+        "object": "page",
+        "id": f"{index:08d}-0000-0000-0000-000000000000",
+        "created_time": "2023-01-01T00:00:00.000Z",
+        "last_edited_time": "2023-01-01T00:00:00.000Z",
+        "archived": False,
+        "properties": {
+            f"Property {i}": {
+                "id": f"p{i}",
+                "type": "rich_text",
+                "rich_text": [{
+                    "type": "text",
+                    "text": {"content": f"Value {index}-{i}", "link": None},
+                    "annotations": {"bold": False, "italic": False, "strikethrough": False,
+                                    "underline": False, "code": False, "color": "default"},
+                    "plain_text": f"Value {index}-{i}",
+                    "href": None,
+                }],
+            } for i in range(20)
+        },
+    }
+
+
+def main(number: int = 20, repeat: int = 5):
+    response = {"object": "list", "results": [_make_page(i) for i in range(100)], "next_cursor": None,
+                "has_more": False}
+    print(f"{'codec':<10}{'size':>12}{'dumps':>14}{'loads':>14}")
+    for name in ("json", "ujson", "orjson"):
+        try:
+            codec = get_codec(name)
+        except ImportError:
+            print(f"{name:<10}{'not installed':>12}")
+            continue
+        encoded = codec.dumps(response)
+        dumps = min(timeit.repeat(lambda: codec.dumps(response), number=number, repeat=repeat)) / number
+        loads = min(timeit.repeat(lambda: codec.loads(encoded), number=number, repeat=repeat)) / number
+        print(f"{name:<10}{len(encoded) // 1024:>9} KB{dumps * 1e3:>11.2f} ms{loads * 1e3:>11.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
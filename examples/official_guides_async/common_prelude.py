@@ -24,9 +24,13 @@ def get_client() -> AsyncClient:
 
     colored_print("Initializing Client...", color=PrintStyle.GREEN)
 
-    # Initialize a client given integration token
+    # Initialize a client given integration token,
+    # staying within the average rate limit of Notion (3 requests per second) and retrying the rate-limited requests,
+    # which is recommended when using the bulk methods such as `pages.create_many`
     client = AsyncClient({
-        "auth_token": token
+        "auth_token": token,
+        "rate_limit_per_second": 3,
+        "max_retries": 3
     })
     return client
 
@@ -71,8 +71,9 @@ async def run_example_code(is_continuous=False):
         30
     )
 
-    for example_data in example_data_list:
-        await client.pages.create(example_data)
+    # The pages are created concurrently, see the `bulk_concurrency` client option,
+    # within the rate limit of the client set in `common_prelude`
+    await client.pages.create_many(example_data_list)
 
     colored_print(f"The data is added successfully. "
                   f"You can now view the intuitive result by clicking on the following links: https://www.notion.so/{grocery_database_id.replace('-', '')}",
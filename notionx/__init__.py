@@ -2,11 +2,14 @@
 
 from .client import Client, AsyncClient, ClientOptions
 from .errors import *
+from .pool import ClientPool, AsyncClientPool
 
 __all__ = [
     "Client",
     "AsyncClient",
     "ClientOptions",
+    "ClientPool",
+    "AsyncClientPool",
     "PyNotionAPIResponseException",
     "InvalidJsonError",
     "InvalidRequestUrlError",
@@ -25,4 +28,6 @@ __all__ = [
     "GatewayTimeoutError",
     "UnknownAPIResponseError",
     "LocalValidationError",
+    "CircuitOpenError",
+    "DeadlineExceededError",
 ]
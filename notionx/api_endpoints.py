@@ -1,9 +1,13 @@
 """ Endpoints definitions """
+import copy
+import functools
+import random
 import sys
 import typing
 
-from notionx.utils import organize_kwargs_as_a_dict_param, unquote_params
-from notionx.validation_tools import OneOf, validate_dict_parameter
+from notionx.streaming import ResultsStreamParser, StreamingClientView
+from notionx.utils import unquote_params, is_contained_in
+from notionx.validation_tools import OneOf, organize_and_validate_dict_parameter
 
 if typing.TYPE_CHECKING:
     from notionx.client import Client
@@ -16,6 +20,12 @@ else:
 
 DictOrAwaitableDict = typing.Union[typing.Dict, Awaitable[typing.Dict]]
 OptionalDict = typing.Optional[typing.Dict]
+OptionalMapping = typing.Optional[typing.Mapping[str, typing.Dict]]
+DictIterator = typing.Union[typing.Iterator[typing.Dict], typing.AsyncIterator[typing.Dict]]
+ListOrAwaitableList = typing.Union[typing.List, Awaitable[typing.List]]
+
+# The maximum page size accepted by Notion, used by the helpers fetching a whole list
+MAX_PAGE_SIZE = 100
 
 __all__ = [
     "Endpoint",
@@ -34,10 +44,82 @@ class Endpoint:
     def __init__(self, client: "Client"):
         self._client = client
 
+    def _pinned(self) -> "Endpoint":
+        """ The endpoint sending all the requests of an operation made of several dependent requests,
+        such as the pages of an iteration whose cursors are only valid for the integration that received them.
+        """
+        client = self._client._pinned()
+        return self if client is self._client else type(self)(client)
+
+    def _paginate(self,
+                  list_method: typing.Callable,
+                  *args: typing.Any,
+                  params: OptionalDict,
+                  prefetch: typing.Optional[int] = None,
+                  stream: typing.Optional[bool] = None) -> DictIterator:
+        """ Iterates over the results of `list_method`, a paginated method of the endpoint.
+        `params` is the query or body dict of the first request, the `start_cursor` of the following requests
+        is filled in automatically.
+        `prefetch` is the number of pages requested ahead of the consumer, defaults to the client option.
+        `stream` yields the results of each page while it is received, defaults to the client option.
+        """
+        params = dict(params or {})
+        start_cursor = params.pop("start_cursor", None)
+        pinned = self._pinned()
+        if prefetch is None:
+            prefetch = self._client.options.pagination_prefetch
+        if stream is None:
+            stream = self._client.options.stream_results
+
+        def page_params(cursor):
+            return params if cursor is None else {**params, "start_cursor": cursor}
+
+        if stream:
+            def stream_page(cursor):
+                # `list_method` is called on a copy of the endpoint whose requests stream their results
+                parser = ResultsStreamParser(self._client._json_codec)
+                endpoint = copy.copy(pinned)
+                endpoint._client = StreamingClientView(pinned._client, parser)
+                return list_method.__func__(endpoint, *args, page_params(cursor)), parser
+
+            return self._client._iterate_streamed_api(stream_page, start_cursor)
+
+        def fetch_page(cursor):
+            return list_method.__func__(pinned, *args, page_params(cursor))
+
+        return self._client._iterate_paginated_api(fetch_page, start_cursor, prefetch)
+
+    def _run_concurrently(self,
+                          func: typing.Callable,
+                          items: typing.Iterable,
+                          concurrency: typing.Optional[int] = None,
+                          return_exceptions: bool = False) -> ListOrAwaitableList:
+        """ Calls `func` (a method of the endpoint) on every item, with at most `concurrency` calls in flight,
+        and returns the results in the same order as the items.
+        `concurrency` defaults to the client option.
+        """
+        return self._client._map_concurrently(func, items, self._bulk_concurrency(concurrency), return_exceptions)
+
+    def _should_validate_locally(self) -> bool:
+        """ Whether to validate the parameters of a call locally, according to the `local_validation_rate` option.
+        Used by `organize_and_validate_dict_parameter` when a call does not specify `local_validation`.
+        """
+        rate = self._client.options.local_validation_rate
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def _bulk_concurrency(self, concurrency: typing.Optional[int] = None) -> int:
+        """ The number of requests a bulk method sends at a time.
+        With an adaptive concurrency limit, the bulk methods fan out up to its maximum and the limit paces them.
+        """
+        if concurrency is None:
+            if self._client.concurrency_limit is not None:
+                return self._client.concurrency_limit.max_limit
+            concurrency = self._client.options.bulk_concurrency
+        return concurrency
+
 
 class PagePropertiesEndpoint(Endpoint):
-    @organize_kwargs_as_a_dict_param("query_data")
-    @validate_dict_parameter("query_data", ("start_cursor", "page_size"))
+    @organize_and_validate_dict_parameter("query_data", ("start_cursor", "page_size"))
     def retrieve(self, page_id: str, property_id: str, query_data: OptionalDict = None) -> DictOrAwaitableDict:
         """ Retrieves a property_item object for a given page_id and property_id.
         Depending on the property type,
@@ -53,15 +135,27 @@ class PagePropertiesEndpoint(Endpoint):
             query=query_data
         )
 
+    @organize_and_validate_dict_parameter("query_data", ("start_cursor", "page_size"))
+    def iter_retrieve(self, page_id: str, property_id: str, query_data: OptionalDict = None,
+                      prefetch: typing.Optional[int] = None,
+                      stream: typing.Optional[bool] = None) -> DictIterator:
+        """ Iterates over the property item values of a paginated page property,
+        requesting the following pages of values on demand.
+        A property that is not paginated is yielded as a single property_item object.
+        """
+        return self._paginate(self.retrieve, page_id, property_id, params=query_data, prefetch=prefetch, stream=stream)
+
+
+_PAGE_UPDATE_KEYS = ("properties", "archived", "icon", "cover")
+
 
 class PagesEndpoint(Endpoint):
     def __init__(self, client):
         super().__init__(client)
         self.properties = PagePropertiesEndpoint(client)
 
-    @organize_kwargs_as_a_dict_param("body_data")
-    @validate_dict_parameter("body_data", ("parent", "properties", "children", "icon", "cover"),
-                             ("parent", "properties"))
+    @organize_and_validate_dict_parameter("body_data", ("parent", "properties", "children", "icon", "cover"),
+                                          ("parent", "properties"))
     def create(self, body_data: OptionalDict = None) -> DictOrAwaitableDict:
         """ Creates a new page in the specified database or as a child of an existing page.
         See also: https://developers.notion.com/reference/post-page
@@ -71,8 +165,20 @@ class PagesEndpoint(Endpoint):
             body=body_data
         )
 
-    @organize_kwargs_as_a_dict_param("query_data")
-    @validate_dict_parameter("query_data", ("filter_properties",))
+    def create_many(self,
+                    bodies: typing.Iterable[typing.Dict],
+                    concurrency: typing.Optional[int] = None,
+                    return_exceptions: bool = False) -> ListOrAwaitableList:
+        """ Creates a page for every body dict in `bodies`, sending at most `concurrency` requests at a time
+        (threads for `Client`, tasks for `AsyncClient`), and returns the created pages in the same order.
+        Every body is validated like the body of `create`, and the requests still go through the rate limiter.
+
+        If `return_exceptions` is true, a failed creation puts its exception in the returned list
+        instead of stopping the whole batch.
+        """
+        return self._run_concurrently(self.create, bodies, concurrency, return_exceptions)
+
+    @organize_and_validate_dict_parameter("query_data", ("filter_properties",))
     def retrieve(self, page_id: str, query_data: OptionalDict = None) -> DictOrAwaitableDict:
         """ Retrieves a Page object using the ID specified.
         See also: https://developers.notion.com/reference/retrieve-a-page
@@ -87,8 +193,7 @@ class PagesEndpoint(Endpoint):
             query=query_data
         )
 
-    @organize_kwargs_as_a_dict_param("body_data")
-    @validate_dict_parameter("body_data", ("properties", "archived", "icon", "cover"))
+    @organize_and_validate_dict_parameter("body_data", _PAGE_UPDATE_KEYS)
     def update(self, page_id: str, body_data: OptionalDict = None) -> DictOrAwaitableDict:
         """ Updates page property values for the specified page.
         Properties that are not set via the properties parameter will remain unchanged.
@@ -102,10 +207,43 @@ class PagesEndpoint(Endpoint):
             body=body_data
         )
 
+    @organize_and_validate_dict_parameter("body_data", _PAGE_UPDATE_KEYS)
+    def _is_noop_update(self, page_id: str, known_page: OptionalDict, body_data: OptionalDict = None) -> bool:
+        """ Check if updating the page with `body_data` would leave `known_page`, its known state, unchanged.
+        The body is validated like the body of `update`, even if the update ends up being skipped.
+        """
+        return known_page is not None and is_contained_in(body_data, known_page)
+
+    def update_many(self,
+                    updates: typing.Iterable[typing.Tuple[str, typing.Dict]],
+                    concurrency: typing.Optional[int] = None,
+                    return_exceptions: bool = False,
+                    known_pages: OptionalMapping = None) -> ListOrAwaitableList:
+        """ Updates the pages of `updates`, an iterable of `(page_id, body)` pairs,
+        sending at most `concurrency` requests at a time, and returns the updated pages in the same order.
+
+        `known_pages` optionally maps page ids to a known previous state of the pages,
+        e.g. the page objects returned by `databases.query` or the bodies sent by a previous run.
+        When all the values of a body are already contained in the known state of its page,
+        no request is sent and the known state is returned in place of the updated page.
+        Keys omitted in a body are treated as unchanged, except in the objects that Notion replaces in full:
+        the omitted `annotations` and `link` of rich text objects and `end` and `time_zone` of dates
+        are compared as the defaults.
+        """
+        known_pages = known_pages or {}
+
+        def update_page(update: typing.Tuple[str, typing.Dict]):
+            page_id, body_data = update
+            known_page = known_pages.get(page_id)
+            if self._is_noop_update(page_id, known_page, body_data):
+                return known_page
+            return self.update(page_id, body_data)
+
+        return self._run_concurrently(update_page, updates, concurrency, return_exceptions)
+
 
 class BlockChildrenEndpoint(Endpoint):
-    @organize_kwargs_as_a_dict_param("body_data")
-    @validate_dict_parameter("body_data", ("children", "after"), ("children",))
+    @organize_and_validate_dict_parameter("body_data", ("children", "after"), ("children",))
     def append(self, block_id: str, body_data: OptionalDict = None) -> DictOrAwaitableDict:
         """ Creates and appends new children blocks to the parent block_id specified.
         Returns a paginated list of newly created first level children block objects.
@@ -116,8 +254,34 @@ class BlockChildrenEndpoint(Endpoint):
             body=body_data
         )
 
-    @organize_kwargs_as_a_dict_param("query_data")
-    @validate_dict_parameter("query_data", ("start_cursor", "page_size"))
+    def append_in_batches(self,
+                          block_id: str,
+                          children: typing.List[typing.Dict],
+                          after: typing.Optional[str] = None,
+                          concurrency: typing.Optional[int] = None) -> ListOrAwaitableList:
+        """ Appends a list of children blocks of any length and nesting depth to the parent block_id specified,
+        splitting it into as few requests as the limits of the API allow
+        (100 blocks per children list, two levels of nesting, 1000 blocks per request).
+
+        The batches appended to a same parent are sent in order using the `after` parameter.
+        A block is sent with as many of its nested children as fit (so that a `table`, `column_list` or `column`
+        keeps the children it is required to be created with), the other ones being appended once it is created.
+        Returns the list of the newly created first level children block objects.
+        """
+
+        pinned = self._pinned()
+
+        def append(parent_id: str, batch: typing.List[typing.Dict], after_id: typing.Optional[str]):
+            body_data = {"children": batch}
+            if after_id is not None:
+                body_data["after"] = after_id
+            return pinned.append(parent_id, body_data)
+
+        iter_children = functools.partial(pinned.iter_list, page_size=MAX_PAGE_SIZE)
+        return self._client._append_block_tree(append, iter_children, block_id, children,
+                                               self._bulk_concurrency(concurrency), after)
+
+    @organize_and_validate_dict_parameter("query_data", ("start_cursor", "page_size"))
     def list(self, block_id: str, query_data: OptionalDict = None) -> DictOrAwaitableDict:
         """ Returns a paginated array of child block objects contained in the block using the ID specified.
         In order to receive a complete representation of a block,
@@ -129,6 +293,15 @@ class BlockChildrenEndpoint(Endpoint):
             query=query_data
         )
 
+    @organize_and_validate_dict_parameter("query_data", ("start_cursor", "page_size"))
+    def iter_list(self, block_id: str, query_data: OptionalDict = None,
+                  prefetch: typing.Optional[int] = None,
+                  stream: typing.Optional[bool] = None) -> DictIterator:
+        """ Iterates over the child block objects contained in the block,
+        requesting the following pages of children on demand.
+        """
+        return self._paginate(self.list, block_id, params=query_data, prefetch=prefetch, stream=stream)
+
 
 class BlocksEndpoint(Endpoint):
     def __init__(self, client: "Client"):
@@ -143,8 +316,23 @@ class BlocksEndpoint(Endpoint):
             f"blocks/{block_id}"
         )
 
-    @organize_kwargs_as_a_dict_param("body_data")
-    @validate_dict_parameter("body_data", (
+    def fetch_tree(self,
+                   block_id: str,
+                   max_depth: typing.Optional[int] = None,
+                   concurrency: typing.Optional[int] = None) -> ListOrAwaitableList:
+        """ Retrieves the children of the block and, recursively, the children of every child block having children.
+        Returns the list of the children of the block, the children of a block `b` being nested in `b[b["type"]]`
+        under the `children` key, as expected by `children.append`.
+
+        The blocks are fetched breadth-first with at most `concurrency` requests at a time
+        (threads for `Client`, tasks for `AsyncClient`), and each list of children is fully paginated.
+        `max_depth` limits the depth of the tree, the children of the block being at depth 1.
+        `child_page` and `child_database` blocks are not expanded, since their content is a separate document.
+        """
+        iter_children = functools.partial(self._pinned().children.iter_list, page_size=MAX_PAGE_SIZE)
+        return self._client._fetch_block_tree(iter_children, block_id, self._bulk_concurrency(concurrency), max_depth)
+
+    @organize_and_validate_dict_parameter("body_data", (
             "embed",
             "type",
             "bookmark",
@@ -207,8 +395,7 @@ class DatabasesEndpoint(Endpoint):
             f"databases/{database_id}"
         )
 
-    @organize_kwargs_as_a_dict_param("body_data")
-    @validate_dict_parameter("body_data", ("filter", "sorts", "start_cursor", "page_size"))
+    @organize_and_validate_dict_parameter("body_data", ("filter", "sorts", "start_cursor", "page_size"))
     def query(self, database_id: str, body_data: OptionalDict = None) -> DictOrAwaitableDict:
         """ Gets a list of Pages contained in the database,
         filtered and ordered according to the filter conditions and sort criteria provided in the request.
@@ -220,8 +407,16 @@ class DatabasesEndpoint(Endpoint):
             body=body_data
         )
 
-    @organize_kwargs_as_a_dict_param("body_data")
-    @validate_dict_parameter("body_data", ("parent", "title", "properties"), ("parent", "properties"))
+    @organize_and_validate_dict_parameter("body_data", ("filter", "sorts", "start_cursor", "page_size"))
+    def iter_query(self, database_id: str, body_data: OptionalDict = None,
+                   prefetch: typing.Optional[int] = None,
+                   stream: typing.Optional[bool] = None) -> DictIterator:
+        """ Iterates over the Pages contained in the database and matching the query,
+        requesting the following pages of results on demand.
+        """
+        return self._paginate(self.query, database_id, params=body_data, prefetch=prefetch, stream=stream)
+
+    @organize_and_validate_dict_parameter("body_data", ("parent", "title", "properties"), ("parent", "properties"))
     def create(self, body_data: OptionalDict = None) -> DictOrAwaitableDict:
         """ Creates a database as a subpage in the specified parent page, with the specified properties schema.
         See also: https://developers.notion.com/reference/create-a-database
@@ -231,8 +426,7 @@ class DatabasesEndpoint(Endpoint):
             body=body_data
         )
 
-    @organize_kwargs_as_a_dict_param("body_data")
-    @validate_dict_parameter("body_data", ("title", "properties", "description"))
+    @organize_and_validate_dict_parameter("body_data", ("title", "properties", "description"))
     def update(self, database_id: str, body_data: OptionalDict = None) -> DictOrAwaitableDict:
         """ Updates an existing database as specified by the parameters.
         See also: https://developers.notion.com/reference/update-a-database
@@ -242,8 +436,7 @@ class DatabasesEndpoint(Endpoint):
             body=body_data
         )
 
-    @organize_kwargs_as_a_dict_param("query_data")
-    @validate_dict_parameter("query_data", ("start_cursor", "page_size"))
+    @organize_and_validate_dict_parameter("query_data", ("start_cursor", "page_size"))
     def list(self, query_data: OptionalDict = None) -> DictOrAwaitableDict:
         """ List all Databases shared with the authenticated integration.
         The response may contain fewer than page_size of results.
@@ -266,8 +459,7 @@ class UsersEndpoint(Endpoint):
             f"users/{user_id}"
         )
 
-    @organize_kwargs_as_a_dict_param("query_data")
-    @validate_dict_parameter("query_data", ("start_cursor", "page_size"))
+    @organize_and_validate_dict_parameter("query_data", ("start_cursor", "page_size"))
     def list(self, query_data: OptionalDict = None) -> DictOrAwaitableDict:
         """ Returns a paginated list of Users for the workspace.
         The response may contain fewer than page_size of results.
@@ -278,6 +470,14 @@ class UsersEndpoint(Endpoint):
             query=query_data
         )
 
+    @organize_and_validate_dict_parameter("query_data", ("start_cursor", "page_size"))
+    def iter_list(self, query_data: OptionalDict = None,
+                  prefetch: typing.Optional[int] = None,
+                  stream: typing.Optional[bool] = None) -> DictIterator:
+        """ Iterates over the Users of the workspace, requesting the following pages of users on demand.
+        """
+        return self._paginate(self.list, params=query_data, prefetch=prefetch, stream=stream)
+
     def me(self) -> DictOrAwaitableDict:
         """ Retrieves the bot User associated with the API token provided in the authorization header.
          The bot will have an owner field with information about the person who authorized the integration.
@@ -289,8 +489,7 @@ class UsersEndpoint(Endpoint):
 
 
 class CommentsEndpoint(Endpoint):
-    @organize_kwargs_as_a_dict_param("query_data")
-    @validate_dict_parameter("query_data", ("block_id", "start_cursor", "page_size"), ("block_id",))
+    @organize_and_validate_dict_parameter("query_data", ("block_id", "start_cursor", "page_size"), ("block_id",))
     def list(self, query_data: OptionalDict = None) -> DictOrAwaitableDict:
         """ Retrieves a list of un-resolved Comment objects from a page or block.
         See also: https://developers.notion.com/reference/retrieve-a-comment
@@ -300,9 +499,17 @@ class CommentsEndpoint(Endpoint):
             query=query_data
         )
 
-    @organize_kwargs_as_a_dict_param("body_data")
-    @validate_dict_parameter("body_data", ("parent", "discussion_id", "rich_text"),
-                             ("rich_text", OneOf("discussion_id", "parent")))
+    @organize_and_validate_dict_parameter("query_data", ("block_id", "start_cursor", "page_size"), ("block_id",))
+    def iter_list(self, query_data: OptionalDict = None,
+                  prefetch: typing.Optional[int] = None,
+                  stream: typing.Optional[bool] = None) -> DictIterator:
+        """ Iterates over the un-resolved Comment objects of a page or block,
+        requesting the following pages of comments on demand.
+        """
+        return self._paginate(self.list, params=query_data, prefetch=prefetch, stream=stream)
+
+    @organize_and_validate_dict_parameter("body_data", ("parent", "discussion_id", "rich_text"),
+                                          ("rich_text", OneOf("discussion_id", "parent")))
     def create(self, body_data: OptionalDict = None) -> DictOrAwaitableDict:
         """
         Creates a comment in a page or existing discussion thread.
@@ -318,8 +525,7 @@ class CommentsEndpoint(Endpoint):
 
 
 class SearchEndpoint(Endpoint):
-    @organize_kwargs_as_a_dict_param("body_data")
-    @validate_dict_parameter("body_data", ("query", "sort", "filter", "start_cursor", "page_size"))
+    @organize_and_validate_dict_parameter("body_data", ("query", "sort", "filter", "start_cursor", "page_size"))
     def __call__(self, body_data: OptionalDict = None) -> DictOrAwaitableDict:
         """ Searches all original pages, databases, and child pages/databases that are shared with the integration.
         It will not return linked databases, since these duplicate their source databases.
@@ -329,3 +535,12 @@ class SearchEndpoint(Endpoint):
             "search",
             body=body_data
         )
+
+    @organize_and_validate_dict_parameter("body_data", ("query", "sort", "filter", "start_cursor", "page_size"))
+    def iter(self, body_data: OptionalDict = None,
+             prefetch: typing.Optional[int] = None,
+             stream: typing.Optional[bool] = None) -> DictIterator:
+        """ Iterates over the pages and databases matching the search,
+        requesting the following pages of results on demand.
+        """
+        return self._paginate(self.__call__, params=body_data, prefetch=prefetch, stream=stream)
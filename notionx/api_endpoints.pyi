@@ -11,12 +11,36 @@ else:
 
 DictOrAwaitableDict = typing.Union[typing.Dict, Awaitable[typing.Dict]]
 OptionalDict = typing.Optional[typing.Dict]
+OptionalMapping = typing.Optional[typing.Mapping[str, typing.Dict]]
+DictIterator = typing.Union[typing.Iterator[typing.Dict], typing.AsyncIterator[typing.Dict]]
+ListOrAwaitableList = typing.Union[typing.List, Awaitable[typing.List]]
+
+MAX_PAGE_SIZE: int
 
 
 class Endpoint:
     def __init__(self, client: Client):
         self._client = client
 
+    def _pinned(self) -> Endpoint: ...
+
+    def _paginate(self,
+                  list_method: typing.Callable,
+                  *args: typing.Any,
+                  params: OptionalDict,
+                  prefetch: typing.Optional[int] = None,
+                  stream: typing.Optional[bool] = None) -> DictIterator: ...
+
+    def _run_concurrently(self,
+                          func: typing.Callable,
+                          items: typing.Iterable,
+                          concurrency: typing.Optional[int] = None,
+                          return_exceptions: bool = False) -> ListOrAwaitableList: ...
+
+    def _should_validate_locally(self) -> bool: ...
+
+    def _bulk_concurrency(self, concurrency: typing.Optional[int] = None) -> int: ...
+
 
 __all__ = [
     "Endpoint",
@@ -40,7 +64,8 @@ class PagePropertiesEndpoint(Endpoint):
             property_id: str,
             *,
             start_cursor: typing.Optional[str] = None,
-            page_size: typing.Optional[int] = None
+            page_size: typing.Optional[int] = None,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
@@ -48,9 +73,36 @@ class PagePropertiesEndpoint(Endpoint):
             self,
             page_id: str,
             property_id: str,
-            query_data: OptionalDict = None
+            query_data: OptionalDict = None,
+            *,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
+    @typing.overload
+    def iter_retrieve(
+            self,
+            page_id: str,
+            property_id: str,
+            *,
+            start_cursor: typing.Optional[str] = None,
+            page_size: typing.Optional[int] = None,
+            prefetch: typing.Optional[int] = None,
+            stream: typing.Optional[bool] = None,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictIterator: ...
+
+    @typing.overload
+    def iter_retrieve(
+            self,
+            page_id: str,
+            property_id: str,
+            query_data: OptionalDict = None,
+            prefetch: typing.Optional[int] = None,
+            stream: typing.Optional[bool] = None,
+            *,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictIterator: ...
+
 
 class PagesEndpoint(Endpoint):
     properties: PagePropertiesEndpoint
@@ -60,7 +112,9 @@ class PagesEndpoint(Endpoint):
     @typing.overload
     def create(
             self,
-            body_data: OptionalDict
+            body_data: OptionalDict,
+            *,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
@@ -71,14 +125,24 @@ class PagesEndpoint(Endpoint):
             properties: typing.Dict,
             children: typing.Optional[typing.List[typing.Dict]] = None,
             icon: OptionalDict = None,
-            cover: OptionalDict = None
+            cover: OptionalDict = None,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
+    def create_many(
+            self,
+            bodies: typing.Iterable[typing.Dict],
+            concurrency: typing.Optional[int] = None,
+            return_exceptions: bool = False
+    ) -> ListOrAwaitableList: ...
+
     @typing.overload
     def retrieve(
             self,
             page_id: str,
-            query_data: OptionalDict = None
+            query_data: OptionalDict = None,
+            *,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
@@ -86,14 +150,17 @@ class PagesEndpoint(Endpoint):
             self,
             page_id: str,
             *,
-            filter_properties: typing.Optional[typing.List[str]] = None
+            filter_properties: typing.Optional[typing.List[str]] = None,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
     def update(
             self,
             page_id: str,
-            body_data: OptionalDict = None
+            body_data: OptionalDict = None,
+            *,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
@@ -104,16 +171,29 @@ class PagesEndpoint(Endpoint):
             properties: OptionalDict = None,
             archived: typing.Optional[bool] = None,
             icon: OptionalDict = None,
-            cover: OptionalDict = None
+            cover: OptionalDict = None,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
+    def _is_noop_update(self, page_id: str, known_page: OptionalDict, body_data: OptionalDict = None) -> bool: ...
+
+    def update_many(
+            self,
+            updates: typing.Iterable[typing.Tuple[str, typing.Dict]],
+            concurrency: typing.Optional[int] = None,
+            return_exceptions: bool = False,
+            known_pages: OptionalMapping = None
+    ) -> ListOrAwaitableList: ...
+
 
 class BlockChildrenEndpoint(Endpoint):
     @typing.overload
     def append(
             self,
             block_id: str,
-            body_data: OptionalDict
+            body_data: OptionalDict,
+            *,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
@@ -121,7 +201,8 @@ class BlockChildrenEndpoint(Endpoint):
             self,
             block_id: str,
             *,
-            children: typing.List[typing.Dict]
+            children: typing.List[typing.Dict],
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
@@ -130,14 +211,25 @@ class BlockChildrenEndpoint(Endpoint):
             block_id: str,
             *,
             children: typing.List[typing.Dict],
-            after: str
+            after: str,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
+    def append_in_batches(
+            self,
+            block_id: str,
+            children: typing.List[typing.Dict],
+            after: typing.Optional[str] = None,
+            concurrency: typing.Optional[int] = None
+    ) -> ListOrAwaitableList: ...
+
     @typing.overload
     def list(
             self,
             block_id: str,
-            query_data: OptionalDict = None
+            query_data: OptionalDict = None,
+            *,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
@@ -146,9 +238,33 @@ class BlockChildrenEndpoint(Endpoint):
             block_id: str,
             *,
             start_cursor: typing.Optional[str] = None,
-            page_size: typing.Optional[int] = None
+            page_size: typing.Optional[int] = None,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
+    @typing.overload
+    def iter_list(
+            self,
+            block_id: str,
+            query_data: OptionalDict = None,
+            prefetch: typing.Optional[int] = None,
+            stream: typing.Optional[bool] = None,
+            *,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictIterator: ...
+
+    @typing.overload
+    def iter_list(
+            self,
+            block_id: str,
+            *,
+            start_cursor: typing.Optional[str] = None,
+            page_size: typing.Optional[int] = None,
+            prefetch: typing.Optional[int] = None,
+            stream: typing.Optional[bool] = None,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictIterator: ...
+
 
 class BlocksEndpoint(Endpoint):
     children: BlockChildrenEndpoint
@@ -157,11 +273,20 @@ class BlocksEndpoint(Endpoint):
 
     def retrieve(self, block_id: str) -> DictOrAwaitableDict: ...
 
+    def fetch_tree(
+            self,
+            block_id: str,
+            max_depth: typing.Optional[int] = None,
+            concurrency: typing.Optional[int] = None
+    ) -> ListOrAwaitableList: ...
+
     @typing.overload
     def update(
             self,
             block_id: str,
-            body_data: OptionalDict = None
+            body_data: OptionalDict = None,
+            *,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
@@ -197,7 +322,8 @@ class BlocksEndpoint(Endpoint):
             callout: OptionalDict = None,
             synced_block: OptionalDict = None,
             table: OptionalDict = None,
-            archived: typing.Optional[bool] = None
+            archived: typing.Optional[bool] = None,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     def delete(self, block_id: str) -> DictOrAwaitableDict: ...
@@ -210,7 +336,9 @@ class DatabasesEndpoint(Endpoint):
     def query(
             self,
             database_id: str,
-            body_data: OptionalDict = None
+            body_data: OptionalDict = None,
+            *,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
@@ -221,11 +349,42 @@ class DatabasesEndpoint(Endpoint):
             filter: OptionalDict = None,
             sorts: typing.Optional[typing.List] = None,
             start_cursor: typing.Optional[str] = None,
-            page_size: typing.Optional[int] = None
+            page_size: typing.Optional[int] = None,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
-    def create(self, body_data: OptionalDict) -> DictOrAwaitableDict: ...
+    def iter_query(
+            self,
+            database_id: str,
+            body_data: OptionalDict = None,
+            prefetch: typing.Optional[int] = None,
+            stream: typing.Optional[bool] = None,
+            *,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictIterator: ...
+
+    @typing.overload
+    def iter_query(
+            self,
+            database_id: str,
+            *,
+            filter: OptionalDict = None,
+            sorts: typing.Optional[typing.List] = None,
+            start_cursor: typing.Optional[str] = None,
+            page_size: typing.Optional[int] = None,
+            prefetch: typing.Optional[int] = None,
+            stream: typing.Optional[bool] = None,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictIterator: ...
+
+    @typing.overload
+    def create(
+            self,
+            body_data: OptionalDict,
+            *,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictOrAwaitableDict: ...
 
     @typing.overload
     def create(
@@ -233,14 +392,17 @@ class DatabasesEndpoint(Endpoint):
             *,
             parent: typing.Dict,
             properties: typing.Dict,
-            title: typing.Optional[typing.List[typing.Dict]] = None
+            title: typing.Optional[typing.List[typing.Dict]] = None,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
     def update(
             self,
             database_id: str,
-            body_data: OptionalDict = None
+            body_data: OptionalDict = None,
+            *,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
@@ -250,18 +412,25 @@ class DatabasesEndpoint(Endpoint):
             *,
             title: typing.Optional[typing.List[typing.Dict]] = None,
             properties: OptionalDict = None,
-            description: typing.Optional[typing.List[typing.Dict]] = None
+            description: typing.Optional[typing.List[typing.Dict]] = None,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
-    def list(self, query_data: OptionalDict = None) -> DictOrAwaitableDict: ...
+    def list(
+            self,
+            query_data: OptionalDict = None,
+            *,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictOrAwaitableDict: ...
 
     @typing.overload
     def list(
             self,
             *,
             start_cursor: typing.Optional[str] = None,
-            page_size: typing.Optional[int] = None
+            page_size: typing.Optional[int] = None,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
 
@@ -269,22 +438,54 @@ class UsersEndpoint(Endpoint):
     def retrieve(self, user_id) -> DictOrAwaitableDict: ...
 
     @typing.overload
-    def list(self, query_data: OptionalDict = None) -> DictOrAwaitableDict: ...
+    def list(
+            self,
+            query_data: OptionalDict = None,
+            *,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictOrAwaitableDict: ...
 
     @typing.overload
     def list(
             self,
             *,
             start_cursor: typing.Optional[str] = None,
-            page_size: typing.Optional[int] = None
+            page_size: typing.Optional[int] = None,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
+    @typing.overload
+    def iter_list(
+            self,
+            query_data: OptionalDict = None,
+            prefetch: typing.Optional[int] = None,
+            stream: typing.Optional[bool] = None,
+            *,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictIterator: ...
+
+    @typing.overload
+    def iter_list(
+            self,
+            *,
+            start_cursor: typing.Optional[str] = None,
+            page_size: typing.Optional[int] = None,
+            prefetch: typing.Optional[int] = None,
+            stream: typing.Optional[bool] = None,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictIterator: ...
+
     def me(self) -> DictOrAwaitableDict: ...
 
 
 class CommentsEndpoint(Endpoint):
     @typing.overload
-    def list(self, query_data: OptionalDict = None) -> DictOrAwaitableDict: ...
+    def list(
+            self,
+            query_data: OptionalDict = None,
+            *,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictOrAwaitableDict: ...
 
     @typing.overload
     def list(
@@ -292,22 +493,67 @@ class CommentsEndpoint(Endpoint):
             *,
             block_id: str,
             start_cursor: typing.Optional[str] = None,
-            page_size: typing.Optional[int] = None
+            page_size: typing.Optional[int] = None,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
 
     @typing.overload
-    def create(self, body_data: OptionalDict) -> DictOrAwaitableDict: ...
+    def iter_list(
+            self,
+            query_data: OptionalDict = None,
+            prefetch: typing.Optional[int] = None,
+            stream: typing.Optional[bool] = None,
+            *,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictIterator: ...
 
     @typing.overload
-    def create(self, *, parent: typing.Dict, rich_text: typing.Dict) -> DictOrAwaitableDict: ...
+    def iter_list(
+            self,
+            *,
+            block_id: str,
+            start_cursor: typing.Optional[str] = None,
+            page_size: typing.Optional[int] = None,
+            prefetch: typing.Optional[int] = None,
+            stream: typing.Optional[bool] = None,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictIterator: ...
 
     @typing.overload
-    def create(self, *, discussion_id: str, rich_text: typing.Dict) -> DictOrAwaitableDict: ...
+    def create(
+            self,
+            body_data: OptionalDict,
+            *,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictOrAwaitableDict: ...
+
+    @typing.overload
+    def create(
+            self,
+            *,
+            parent: typing.Dict,
+            rich_text: typing.Dict,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictOrAwaitableDict: ...
+
+    @typing.overload
+    def create(
+            self,
+            *,
+            discussion_id: str,
+            rich_text: typing.Dict,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictOrAwaitableDict: ...
 
 
 class SearchEndpoint(Endpoint):
     @typing.overload
-    def __call__(self, body_data: OptionalDict = None) -> DictOrAwaitableDict: ...
+    def __call__(
+            self,
+            body_data: OptionalDict = None,
+            *,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictOrAwaitableDict: ...
 
     @typing.overload
     def __call__(
@@ -317,5 +563,30 @@ class SearchEndpoint(Endpoint):
             sort: OptionalDict = None,
             filter: OptionalDict = None,
             start_cursor: typing.Optional[str] = None,
-            page_size: typing.Optional[int] = None
+            page_size: typing.Optional[int] = None,
+            local_validation: typing.Optional[bool] = None
     ) -> DictOrAwaitableDict: ...
+
+    @typing.overload
+    def iter(
+            self,
+            body_data: OptionalDict = None,
+            prefetch: typing.Optional[int] = None,
+            stream: typing.Optional[bool] = None,
+            *,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictIterator: ...
+
+    @typing.overload
+    def iter(
+            self,
+            *,
+            query: typing.Optional[str] = None,
+            sort: OptionalDict = None,
+            filter: OptionalDict = None,
+            start_cursor: typing.Optional[str] = None,
+            page_size: typing.Optional[int] = None,
+            prefetch: typing.Optional[int] = None,
+            stream: typing.Optional[bool] = None,
+            local_validation: typing.Optional[bool] = None
+    ) -> DictIterator: ...
@@ -0,0 +1,485 @@
+""" Helpers for sending many requests concurrently """
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import contextvars
+import inspect
+import itertools
+import sys
+import typing
+
+from collections.abc import Mapping
+
+if sys.version_info >= (3, 9):
+    # Deprecated since version 3.9: collections.abc.Awaitable now supports [].
+    from collections.abc import Awaitable
+else:
+    from typing import Awaitable
+
+__all__ = [
+    "map_concurrently",
+    "async_map_concurrently",
+    "run_jobs",
+    "async_run_jobs",
+    "fetch_block_tree",
+    "async_fetch_block_tree",
+    "append_block_tree",
+    "async_append_block_tree",
+]
+
+T = typing.TypeVar("T")
+R = typing.TypeVar("R")
+J = typing.TypeVar("J")
+
+_EXHAUSTED = object()
+
+# Blocks whose children are a separate document, they are not expanded when fetching a block tree
+_BLOCK_TYPES_NOT_EXPANDED = frozenset(("child_page", "child_database"))
+
+# Blocks which cannot be created without children, with the minimum number of children they are created with
+_MIN_CHILDREN = {"column_list": 2, "column": 1, "table": 1}
+
+# Limits of the payload of an append block children request
+# (https://developers.notion.com/reference/request-limits#limits-for-property-values)
+MAX_BLOCKS_PER_CHILDREN_LIST = 100
+MAX_BLOCKS_PER_REQUEST = 1000
+MAX_NESTING_LEVELS = 2
+
+
+def _check_concurrency(concurrency: int) -> None:
+    if concurrency < 1:
+        raise ValueError("`concurrency` must be at least 1.")
+
+
+def map_concurrently(func: typing.Callable[[T], R],
+                     items: typing.Iterable[T],
+                     concurrency: int,
+                     return_exceptions: bool = False) -> typing.List[typing.Union[R, BaseException]]:
+    """ Calls `func` on every item using a pool of `concurrency` threads,
+    and returns the results in the same order as the items.
+
+    At most `concurrency` calls are in flight at any time and items are only pulled from `items` when a worker
+    is free, so that `items` can be a lazy iterator over a large input.
+    If `return_exceptions` is false, the first exception raised by `func` stops the submission of new items
+    and is raised once the calls in flight are finished; otherwise exceptions are returned in place of the results.
+    """
+    _check_concurrency(concurrency)
+    results: typing.Dict[int, typing.Any] = {}
+    items = iter(items)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency,
+                                               thread_name_prefix="notionx-bulk") as executor:
+        pending: typing.Dict[concurrent.futures.Future, int] = {}
+        index = 0
+        error = None
+        while True:
+            while error is None and len(pending) < concurrency:
+                item = next(items, _EXHAUSTED)
+                if item is _EXHAUSTED:
+                    break
+                # The calls see the context variables of the caller, e.g. its deadline
+                pending[executor.submit(contextvars.copy_context().run, func, item)] = index
+                index += 1
+            if not pending:
+                break
+
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                future_index = pending.pop(future)
+                exc = future.exception()
+                if exc is None:
+                    results[future_index] = future.result()
+                elif return_exceptions:
+                    results[future_index] = exc
+                elif error is None:
+                    error = exc
+
+    if error is not None:
+        raise error
+    return [results[i] for i in range(index)]
+
+
+async def async_map_concurrently(func: typing.Callable[[T], typing.Union[R, Awaitable[R]]],
+                                 items: typing.Iterable[T],
+                                 concurrency: int,
+                                 return_exceptions: bool = False) -> typing.List[typing.Union[R, BaseException]]:
+    """ The asynchronous version of `map_concurrently`, the calls are run as tasks of the current event loop.
+    If `return_exceptions` is false, the tasks in flight are cancelled when one of them fails.
+    `func` may also return a plain value for items which need no request, it is then used as the result directly.
+    """
+    _check_concurrency(concurrency)
+    results: typing.Dict[int, typing.Any] = {}
+    items = iter(items)
+    pending: typing.Dict[asyncio.Future, int] = {}
+    index = 0
+    error = None
+
+    try:
+        while error is None:
+            while len(pending) < concurrency:
+                item = next(items, _EXHAUSTED)
+                if item is _EXHAUSTED:
+                    break
+                try:
+                    result = func(item)
+                except Exception as exc:  # e.g. a LocalValidationError raised before the request is made
+                    if not return_exceptions:
+                        raise
+                    result = exc
+                if inspect.isawaitable(result):
+                    pending[asyncio.ensure_future(result)] = index
+                else:
+                    results[index] = result
+                index += 1
+            if not pending:
+                break
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                future_index = pending.pop(future)
+                exc = future.exception()
+                if exc is None:
+                    results[future_index] = future.result()
+                elif return_exceptions:
+                    results[future_index] = exc
+                elif error is None:
+                    error = exc
+    finally:
+        for future in pending:
+            future.cancel()
+
+    if error is not None:
+        raise error
+    return [results[i] for i in range(index)]
+
+
+def run_jobs(handle_job: typing.Callable[[J], typing.Iterable[J]],
+             jobs: typing.Iterable[J],
+             concurrency: int) -> None:
+    """ Runs `handle_job` on every job using a pool of `concurrency` threads.
+    `handle_job` returns the follow-up jobs discovered while handling a job, which are run in FIFO order,
+    so that a tree explored through follow-up jobs is explored breadth-first.
+    The first exception raised by `handle_job` stops the submission of new jobs and is raised.
+    """
+    _check_concurrency(concurrency)
+    to_run = collections.deque(jobs)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency,
+                                               thread_name_prefix="notionx-jobs") as executor:
+        pending: typing.Set[concurrent.futures.Future] = set()
+        try:
+            while to_run or pending:
+                while to_run and len(pending) < concurrency:
+                    pending.add(executor.submit(contextvars.copy_context().run, handle_job, to_run.popleft()))
+
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    to_run.extend(future.result())
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def async_run_jobs(handle_job: typing.Callable[[J], Awaitable[typing.Iterable[J]]],
+                         jobs: typing.Iterable[J],
+                         concurrency: int) -> None:
+    """ The asynchronous version of `run_jobs`, the jobs are handled by at most `concurrency` tasks. """
+    _check_concurrency(concurrency)
+    to_run = collections.deque(jobs)
+    pending: typing.Set[asyncio.Future] = set()
+
+    try:
+        while to_run or pending:
+            while to_run and len(pending) < concurrency:
+                pending.add(asyncio.ensure_future(handle_job(to_run.popleft())))
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                to_run.extend(future.result())
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _is_expandable(block: typing.Dict, depth: int, max_depth: typing.Optional[int]) -> bool:
+    return bool(block.get("has_children")) and block.get("type") not in _BLOCK_TYPES_NOT_EXPANDED \
+        and (max_depth is None or depth < max_depth)
+
+
+def _attach_children(block: typing.Dict,
+                     children: typing.List[typing.Dict],
+                     depth: int,
+                     max_depth: typing.Optional[int]) -> typing.List[typing.Tuple[typing.Dict, int]]:
+    """ Nests the fetched children in `block` and returns the children to expand next. """
+    # The children are nested in the block type object, which is also where `blocks.children.append` expects them
+    block.setdefault(block["type"], {})["children"] = children
+    return [(child, depth + 1) for child in children if _is_expandable(child, depth + 1, max_depth)]
+
+
+def fetch_block_tree(iter_children: typing.Callable[[str], typing.Iterator[typing.Dict]],
+                     block_id: str,
+                     concurrency: int,
+                     max_depth: typing.Optional[int] = None) -> typing.List[typing.Dict]:
+    """ Fetches the children of `block_id` and, recursively, the children of the blocks having children,
+    and returns the children of `block_id` with their own children nested in them.
+    `iter_children` iterates over all the children of a block, e.g. `blocks.children.iter_list`.
+
+    The blocks are expanded breadth-first by a pool of `concurrency` threads,
+    a block being expanded as soon as its parent has been fetched.
+    `max_depth` limits the depth of the tree, the children of `block_id` being at depth 1.
+    `child_page` and `child_database` blocks are not expanded, since their children are separate documents.
+    """
+    _check_concurrency(concurrency)
+    root_children = list(iter_children(block_id))
+
+    def expand(job: typing.Tuple[typing.Dict, int]) -> typing.List[typing.Tuple[typing.Dict, int]]:
+        block, depth = job
+        return _attach_children(block, list(iter_children(block["id"])), depth, max_depth)
+
+    run_jobs(expand, ((block, 1) for block in root_children if _is_expandable(block, 1, max_depth)), concurrency)
+    return root_children
+
+
+async def async_fetch_block_tree(iter_children: typing.Callable[[str], typing.AsyncIterator[typing.Dict]],
+                                 block_id: str,
+                                 concurrency: int,
+                                 max_depth: typing.Optional[int] = None) -> typing.List[typing.Dict]:
+    """ The asynchronous version of `fetch_block_tree`, the blocks are expanded by at most `concurrency` tasks. """
+    _check_concurrency(concurrency)
+    root_children = [block async for block in iter_children(block_id)]
+
+    async def expand(job: typing.Tuple[typing.Dict, int]) -> typing.List[typing.Tuple[typing.Dict, int]]:
+        block, depth = job
+        children = [child async for child in iter_children(block["id"])]
+        return _attach_children(block, children, depth, max_depth)
+
+    await async_run_jobs(expand, ((block, 1) for block in root_children if _is_expandable(block, 1, max_depth)),
+                         concurrency)
+    return root_children
+
+
+def _block_type(block: typing.Dict) -> typing.Optional[str]:
+    """ The type of a block in a request, i.e. the key of its type object which holds its nested children.
+    The `type` key is optional in requests, in which case the type is the only other key of the block.
+    """
+    block_type = block.get("type")
+    if block_type is None:
+        keys = [key for key in block if key != "object"]
+        block_type = keys[0] if len(keys) == 1 else None
+    # The blocks of a tree fetched with lazy responses are mappings rather than dicts
+    return block_type if isinstance(block.get(block_type), Mapping) else None
+
+
+def _nested_children(block: typing.Dict) -> typing.List[typing.Dict]:
+    block_type = _block_type(block)
+    if block_type is None:
+        return []
+    return block[block_type].get("children") or []
+
+
+def _with_children(block: typing.Dict, children: typing.List[typing.Dict]) -> typing.Dict:
+    block_type = _block_type(block)
+    type_object = {key: value for key, value in block[block_type].items() if key != "children"}
+    if children:
+        type_object["children"] = children
+    return {**block, block_type: type_object}
+
+
+def _fits_in_one_request(block: typing.Dict, level: int = 0) -> bool:
+    """ Check if `block` and all its nested children can be sent in one request, `level` being its nesting level. """
+    children = _nested_children(block)
+    if not children:
+        return True
+    if level >= MAX_NESTING_LEVELS or len(children) > MAX_BLOCKS_PER_CHILDREN_LIST:
+        return False
+    return all(_fits_in_one_request(child, level + 1) for child in children)
+
+
+def _count_blocks(block: typing.Dict) -> int:
+    return 1 + sum(_count_blocks(child) for child in _nested_children(block))
+
+
+# The children of a created block which could not be sent with it:
+# (the children to append to the block, the deferrals of its own children by index of the child)
+_Deferral = typing.Tuple[typing.List[typing.Dict], typing.Dict[int, "_Deferral"]]
+
+
+def _split_block(block: typing.Dict, level: int, budget: int) -> typing.Optional[
+        typing.Tuple[typing.Dict, typing.Optional[_Deferral], int]]:
+    """ Splits `block`, sent at nesting `level` in a request with room left for `budget` blocks,
+    into the block to send with as many of its nested children as the limits allow,
+    the deferral of the other children (None if all of them are sent) and the number of blocks sent.
+    Returns None if the block cannot be sent with the children it has to be created with.
+    """
+    if budget < 1:
+        return None
+    children = _nested_children(block)
+    if not children:
+        return block, None, 1
+    sent: typing.List[typing.Dict] = []
+    nested: typing.Dict[int, _Deferral] = {}
+    size = 1
+    if level < MAX_NESTING_LEVELS:
+        for child in children[:MAX_BLOCKS_PER_CHILDREN_LIST]:
+            split = _split_block(child, level + 1, budget - size)
+            if split is None:
+                # The child and the following ones are appended once the block is created, so that the order is kept
+                break
+            child, deferral, child_size = split
+            if deferral is not None:
+                nested[len(sent)] = deferral
+            sent.append(child)
+            size += child_size
+    if len(sent) < min(_MIN_CHILDREN.get(_block_type(block), 0), len(children)):
+        return None
+    overflow = children[len(sent):]
+    return _with_children(block, sent), (overflow, nested) if overflow or nested else None, size
+
+
+def _next_append_batch(blocks: typing.List[typing.Dict]) -> typing.Tuple[
+        typing.List[typing.Dict], typing.Dict[int, _Deferral], typing.List[typing.Dict]]:
+    """ Takes the largest API-compliant batch from the head of `blocks`.
+    Returns the batch, the deferrals of the children which could not be sent with the blocks of the batch
+    (by index in the batch), which have to be appended once the blocks are created, and the remaining blocks.
+    """
+    batch: typing.List[typing.Dict] = []
+    deferred: typing.Dict[int, _Deferral] = {}
+    total = 0
+    for block in blocks:
+        if len(batch) == MAX_BLOCKS_PER_CHILDREN_LIST:
+            break
+        size = _count_blocks(block) if _fits_in_one_request(block) else None
+        if size is not None and total + size <= MAX_BLOCKS_PER_REQUEST:
+            deferral = None
+        elif size is not None and size <= MAX_BLOCKS_PER_REQUEST and batch:
+            # The block is sent whole in the next request rather than split
+            break
+        else:
+            split = _split_block(block, 0, MAX_BLOCKS_PER_REQUEST - total)
+            if split is None and batch:
+                break
+            if split is None:
+                raise ValueError(f"A {_block_type(block)} block cannot be created with the children it requires "
+                                 f"within the limits of a request.")
+            block, deferral, size = split
+        if deferral is not None:
+            deferred[len(batch)] = deferral
+        batch.append(block)
+        total += size
+    return batch, deferred, blocks[len(batch):]
+
+
+# An append job: (parent block id, blocks to append, id of the block to append after, list collecting the results)
+_AppendJob = typing.Tuple[str, typing.List[typing.Dict], typing.Optional[str], typing.Optional[typing.List]]
+# A locate job, listing the children of a created block to append their deferred children:
+# (block id, deferrals by index of the child)
+_LocateJob = typing.Tuple[str, typing.Dict[int, _Deferral]]
+_BlockTreeJob = typing.Union[_AppendJob, _LocateJob]
+
+
+def _is_locate_job(job: _BlockTreeJob) -> bool:
+    return len(job) == 2
+
+
+def _jobs_after_creation(block_id: str, deferral: _Deferral) -> typing.List[_BlockTreeJob]:
+    overflow, nested = deferral
+    jobs: typing.List[_BlockTreeJob] = []
+    if overflow:
+        # No `after`: the overflow goes after the children created with the block
+        jobs.append((block_id, overflow, None, None))
+    if nested:
+        jobs.append((block_id, nested))
+    return jobs
+
+
+def _jobs_after_append(job: _AppendJob,
+                       deferred: typing.Dict[int, _Deferral],
+                       rest: typing.List[typing.Dict],
+                       created: typing.List[typing.Dict]) -> typing.List[_BlockTreeJob]:
+    parent_id, _, _, results = job
+    if results is not None:
+        results.extend(created)
+    jobs: typing.List[_BlockTreeJob] = []
+    if rest:
+        # The next batch goes right after the last block created, so that the order is kept
+        jobs.append((parent_id, rest, created[-1]["id"], results))
+    for index, deferral in deferred.items():
+        jobs.extend(_jobs_after_creation(created[index]["id"], deferral))
+    return jobs
+
+
+def _jobs_after_locate(job: _LocateJob, children: typing.List[typing.Dict]) -> typing.List[_BlockTreeJob]:
+    _, nested = job
+    return [next_job for index, deferral in nested.items()
+            for next_job in _jobs_after_creation(children[index]["id"], deferral)]
+
+
+AppendChildren = typing.Callable[[str, typing.List[typing.Dict], typing.Optional[str]], typing.Dict]
+AsyncAppendChildren = typing.Callable[[str, typing.List[typing.Dict], typing.Optional[str]], Awaitable[typing.Dict]]
+
+
+def append_block_tree(append: AppendChildren,
+                      iter_children: typing.Callable[[str], typing.Iterator[typing.Dict]],
+                      block_id: str,
+                      children: typing.List[typing.Dict],
+                      concurrency: int,
+                      after: typing.Optional[str] = None) -> typing.List[typing.Dict]:
+    """ Appends `children`, a list of blocks of any length and nesting depth, to `block_id`.
+    `append(parent_id, children, after)` sends one append block children request and returns its response,
+    `iter_children` iterates over the children of a block, e.g. `blocks.children.iter_list`.
+
+    The blocks are split into batches respecting the limits of a request (100 blocks per children list,
+    two levels of nesting, 1000 blocks in total). The batches of a same parent are sent in order,
+    each one being appended after the last block of the previous one.
+    A block is sent with as many of its nested children as fit, the other ones being appended once
+    the block has been created (the created nested blocks are listed with `iter_children` to find their ids),
+    with up to `concurrency` requests in flight.
+    Returns the created first level blocks, in the same order as `children`.
+    """
+    _check_concurrency(concurrency)
+    created: typing.List[typing.Dict] = []
+
+    def handle(job: _BlockTreeJob) -> typing.List[_BlockTreeJob]:
+        if _is_locate_job(job):
+            block_id, nested = job
+            # Closing the iteration stops the pages it may still be prefetching
+            with contextlib.closing(iter_children(block_id)) as located:
+                return _jobs_after_locate(job, list(itertools.islice(located, max(nested) + 1)))
+        parent_id, blocks, after_id, _ = job
+        batch, deferred, rest = _next_append_batch(blocks)
+        rsp = append(parent_id, batch, after_id)
+        return _jobs_after_append(job, deferred, rest, rsp["results"])
+
+    if children:
+        run_jobs(handle, [(block_id, list(children), after, created)], concurrency)
+    return created
+
+
+async def async_append_block_tree(append: AsyncAppendChildren,
+                                  iter_children: typing.Callable[[str], typing.AsyncIterator[typing.Dict]],
+                                  block_id: str,
+                                  children: typing.List[typing.Dict],
+                                  concurrency: int,
+                                  after: typing.Optional[str] = None) -> typing.List[typing.Dict]:
+    """ The asynchronous version of `append_block_tree`. """
+    _check_concurrency(concurrency)
+    created: typing.List[typing.Dict] = []
+
+    async def handle(job: _BlockTreeJob) -> typing.List[_BlockTreeJob]:
+        if _is_locate_job(job):
+            block_id, nested = job
+            located = []
+            async for child in iter_children(block_id):
+                located.append(child)
+                if len(located) > max(nested):
+                    break
+            return _jobs_after_locate(job, located)
+        parent_id, blocks, after_id, _ = job
+        batch, deferred, rest = _next_append_batch(blocks)
+        rsp = await append(parent_id, batch, after_id)
+        return _jobs_after_append(job, deferred, rest, rsp["results"])
+
+    if children:
+        await async_run_jobs(handle, [(block_id, list(children), after, created)], concurrency)
+    return created
@@ -0,0 +1,398 @@
+""" Client-side caching of the responses of the retrieve endpoints """
+import contextlib
+import datetime
+import os
+import sqlite3
+import threading
+import time
+import typing
+from collections import OrderedDict
+from typing import Optional
+
+from notionx.codec import JSONCodec, get_codec
+from notionx.utils import endpoint_template, path_object_ids, query_object_ids
+
+__all__ = ["ResponseCache", "SQLiteResponseCache"]
+
+
+class _Entry(typing.NamedTuple):
+    content: bytes
+    expires_at: float
+    object_ids: typing.Tuple[str, ...]
+
+
+def _object_ids(path: str, key: str) -> typing.List[str]:
+    """ The ids of the objects a cached response of `path` identified by `key` is evicted with. """
+    return list(dict.fromkeys(path_object_ids(path) + query_object_ids(key)))
+
+
+class ResponseCache:
+    """ A thread-safe cache of the raw bodies of GET responses, with a TTL per endpoint and LRU eviction.
+
+    `ttl_ms` maps endpoint templates (see `notionx.utils.endpoint_template`), e.g. `databases/{id}` or `users/me`,
+    to the number of milliseconds their responses are kept; the responses of the other endpoints are not cached.
+    When the total size of the cached bodies exceeds `max_bytes`, the least recently used ones are evicted.
+
+    The bodies are cached rather than the decoded objects, so every hit returns new objects that callers can modify.
+    """
+
+    def __init__(self, ttl_ms: typing.Mapping[str, float], max_bytes: int = 16 * 1024 * 1024):
+        if max_bytes <= 0:
+            raise ValueError("The `max_bytes` of a response cache must be positive.")
+        self.ttl_ms = dict(ttl_ms)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._keys_by_object_id: typing.Dict[str, typing.Set[str]] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """ The total size of the cached bodies, in bytes. """
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ttl(self, path: str) -> Optional[float]:
+        """ The TTL in milliseconds of the responses of `path`, None if they are not cached. """
+        return self.ttl_ms.get(endpoint_template(path))
+
+    def get(self, path: str, key: str) -> Optional[bytes]:
+        """ The cached body of the response of `path` identified by `key` (e.g. its URL), None on a miss. """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry.content
+
+    def get_stale(self, path: str, key: str) -> Optional[typing.Tuple[bytes, str, str]]:
+        """ The expired responses are dropped from memory, so they are never revalidated. """
+        return None
+
+    def close(self) -> None:
+        """ Nothing to release, the entries are kept in memory. """
+
+    def put(self, path: str, key: str, content: bytes) -> None:
+        """ Caches the body of the response of `path` identified by `key`, if its endpoint has a TTL.
+        It is evicted by the invalidation of the objects in `path` or in the query string of `key`, the URL requested.
+        """
+        ttl = self.ttl(path)
+        if ttl is None or ttl <= 0 or len(content) > self.max_bytes:
+            return
+        entry = _Entry(content, time.monotonic() + ttl / 1_000, tuple(_object_ids(path, key)))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += len(content)
+            for object_id in entry.object_ids:
+                self._keys_by_object_id.setdefault(object_id, set()).add(key)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, object_id: str) -> None:
+        """ Evicts the cached responses of the endpoints of an object, e.g. `pages/{id}` and `blocks/{id}/children`. """
+        with self._lock:
+            for key in list(self._keys_by_object_id.get(object_id.replace("-", "").lower(), ())):
+                self._remove(key)
+
+    def invalidate_path(self, path: str) -> None:
+        """ Evicts the cached responses of the objects contained in `path`, called after a write to `path`. """
+        for object_id in path_object_ids(path):
+            self.invalidate(object_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_object_id.clear()
+            self._size = 0
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._size -= len(entry.content)
+        for object_id in entry.object_ids:
+            keys = self._keys_by_object_id[object_id]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_object_id[object_id]
+
+
+# `last_edited_time` is rounded down to the minute, so an edit made in the same minute as the last observed one
+# would go unnoticed: a page only validates the responses fetched once its last edit is older than this margin
+_LAST_EDITED_TIME_MARGIN_S = 120
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    content BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    page_id TEXT,
+    last_edited_time TEXT
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+CREATE INDEX IF NOT EXISTS responses_page_id ON responses (page_id);
+CREATE TABLE IF NOT EXISTS response_objects (
+    object_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (object_id, key)
+);
+CREATE INDEX IF NOT EXISTS response_objects_key ON response_objects (key);
+CREATE TABLE IF NOT EXISTS objects (
+    object_id TEXT PRIMARY KEY,
+    page_id TEXT,
+    last_edited_time TEXT NOT NULL,
+    observed_at REAL NOT NULL
+);
+"""
+
+
+def _normalize_id(object_id: str) -> str:
+    return object_id.replace("-", "").lower()
+
+
+def _parse_timestamp(value: str) -> float:
+    return datetime.datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S").replace(
+        tzinfo=datetime.timezone.utc).timestamp()
+
+
+class SQLiteResponseCache:
+    """ A `ResponseCache` stored in a SQLite database in WAL mode, so that it outlives the process
+    and is shared by all the processes (and threads) using the same `path`.
+
+    The expiry times are wall-clock times. An expired response of a page content endpoint, such as
+    `blocks/{id}/children` or `pages/{id}/properties/{id}`, is kept and revalidated instead of being fetched again:
+    the cache records the `last_edited_time` of the pages and blocks it sees, and of the page containing each block,
+    and `revalidate` renews all the responses of a page at once if it has not been edited since they were fetched.
+    """
+
+    def __init__(self,
+                 path: typing.Union[str, "os.PathLike[str]"],
+                 ttl_ms: typing.Mapping[str, float],
+                 max_bytes: int = 16 * 1024 * 1024,
+                 codec: Optional[JSONCodec] = None,
+                 timeout_ms: int = 30_000):
+        if max_bytes <= 0:
+            raise ValueError("The `max_bytes` of a response cache must be positive.")
+        self.path = os.fspath(path)
+        self.ttl_ms = dict(ttl_ms)
+        self.max_bytes = max_bytes
+        self._codec = codec if codec is not None else get_codec()
+        self._timeout_ms = timeout_ms
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        # The access times of the hits, written with the next write so that the hits never take the write lock
+        self._accessed: typing.Dict[str, float] = {}
+        with self._lock:
+            self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection must not be used by a forked process, each process opens its own one
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self._timeout_ms / 1_000,
+                                         isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    @contextlib.contextmanager
+    def _transaction(self) -> typing.Iterator[sqlite3.Connection]:
+        with self._lock:
+            connection = self._connect()
+            # Taking the write lock upfront avoids the deadlocks of the transactions upgrading their read lock
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                if self._accessed:
+                    connection.executemany("UPDATE responses SET accessed_at = ? WHERE key = ?",
+                                           [(accessed_at, key) for key, accessed_at in self._accessed.items()])
+                    self._accessed.clear()
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    @property
+    def size(self) -> int:
+        """ The total size of the cached bodies, in bytes. """
+        with self._lock:
+            return self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        if self._accessed:
+            with self._transaction():
+                pass  # writes the pending access times
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def ttl(self, path: str) -> Optional[float]:
+        """ The TTL in milliseconds of the responses of `path`, None if they are not cached. """
+        return self.ttl_ms.get(endpoint_template(path))
+
+    def get(self, path: str, key: str) -> Optional[bytes]:
+        """ The cached body of the response of `path` identified by `key` (e.g. its URL), None on a miss. """
+        now = time.time()
+        # A plain read in WAL mode, which neither takes nor waits for the write lock
+        with self._lock:
+            row = self._connect().execute("SELECT content, expires_at, page_id FROM responses WHERE key = ?",
+                                          (key,)).fetchone()
+            if row is not None and row[1] > now:
+                self._accessed[key] = now
+                return row[0]
+        if row is not None and row[2] is None:  # expired and cannot be revalidated
+            with self._transaction() as connection:
+                connection.execute("DELETE FROM responses WHERE key = ? AND expires_at <= ?", (key, now))
+                connection.execute("DELETE FROM response_objects WHERE key = ? AND key NOT IN "
+                                   "(SELECT key FROM responses)", (key,))
+        return None
+
+    def get_stale(self, path: str, key: str) -> Optional[typing.Tuple[bytes, str, str]]:
+        """ The expired response of `path` identified by `key` that can be revalidated,
+        as its body, the id of the page it belongs to and the `last_edited_time` of that page when it was fetched.
+        None if there is no such response, or if the page is already known to have been edited since.
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT r.content, r.page_id, r.last_edited_time, o.last_edited_time "
+                "FROM responses r LEFT JOIN objects o ON o.object_id = r.page_id "
+                "WHERE r.key = ? AND r.page_id IS NOT NULL", (key,)).fetchone()
+        if row is None or row[2] != row[3]:
+            return None
+        return row[0], row[1], row[2]
+
+    def revalidate(self, page_id: str, last_edited_time: str) -> bool:
+        """ Renews the expired responses of the page `page_id` fetched when its `last_edited_time` was the given one,
+        if it still is according to the last response of the page put in the cache.
+        Otherwise, these responses are evicted and False is returned.
+        """
+        page_id = _normalize_id(page_id)
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute("SELECT last_edited_time FROM objects WHERE object_id = ?",
+                                     (page_id,)).fetchone()
+            rows = connection.execute("SELECT key, path FROM responses WHERE page_id = ? AND last_edited_time = ?",
+                                      (page_id, last_edited_time)).fetchall()
+            if row is None or row[0] != last_edited_time:
+                self._remove(connection, [key for key, _ in rows])
+                return False
+            connection.executemany("UPDATE responses SET expires_at = ?, accessed_at = ? WHERE key = ?",
+                                   [(now + (self.ttl(path) or 0) / 1_000, now, key) for key, path in rows])
+            return True
+
+    def put(self, path: str, key: str, content: bytes) -> None:
+        """ Caches the body of the response of `path` identified by `key`, if its endpoint has a TTL.
+        The `last_edited_time` of the pages and blocks of the responses of the content endpoints and of
+        `pages/{id}` and `blocks/{id}` are recorded, whether these endpoints have a TTL or not.
+        It is evicted by the invalidation of the objects in `path` or in the query string of `key`, the URL requested.
+        """
+        template = endpoint_template(path)
+        ttl = self.ttl_ms.get(template)
+        is_cached = ttl is not None and ttl > 0 and len(content) <= self.max_bytes
+        if not is_cached and template not in ("pages/{id}", "blocks/{id}"):
+            return
+        now = time.time()
+        try:
+            document = self._codec.loads(content)
+        except ValueError:
+            document = None
+        with self._transaction() as connection:
+            if isinstance(document, dict):
+                self._observe(connection, document, now)
+                for result in document.get("results") or ():
+                    if isinstance(result, dict):
+                        self._observe(connection, result, now)
+            if not is_cached:
+                return
+
+            page_id = last_edited_time = None
+            if template.count("/") >= 2 and template.split("/", 1)[0] in ("pages", "blocks"):
+                row = connection.execute("SELECT page_id FROM objects WHERE object_id = ?",
+                                         (path_object_ids(path)[0],)).fetchone()
+                page_row = None
+                if row is not None and row[0] is not None:
+                    page_row = connection.execute("SELECT object_id, last_edited_time, observed_at FROM objects "
+                                                  "WHERE object_id = ?", (row[0],)).fetchone()
+                if page_row is not None and \
+                        page_row[2] - _parse_timestamp(page_row[1]) >= _LAST_EDITED_TIME_MARGIN_S:
+                    page_id, last_edited_time = page_row[0], page_row[1]
+
+            self._remove(connection, (key,))
+            connection.execute("INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               (key, path, content, len(content), now + ttl / 1_000, now, page_id, last_edited_time))
+            connection.executemany("INSERT OR IGNORE INTO response_objects VALUES (?, ?)",
+                                   [(object_id, key) for object_id in _object_ids(path, key)])
+            self._evict(connection)
+
+    def invalidate(self, object_id: str) -> None:
+        """ Evicts the cached responses of the endpoints of an object, e.g. `pages/{id}` and `blocks/{id}/children`,
+        and the responses validated by it if it is a page.
+        """
+        object_id = _normalize_id(object_id)
+        with self._transaction() as connection:
+            keys = [key for key, in connection.execute(
+                "SELECT key FROM response_objects WHERE object_id = ? "
+                "UNION SELECT key FROM responses WHERE page_id = ?", (object_id, object_id))]
+            self._remove(connection, keys)
+            connection.execute("DELETE FROM objects WHERE object_id = ?", (object_id,))
+
+    def invalidate_path(self, path: str) -> None:
+        """ Evicts the cached responses of the objects contained in `path`, called after a write to `path`. """
+        for object_id in path_object_ids(path):
+            self.invalidate(object_id)
+
+    def clear(self) -> None:
+        with self._transaction() as connection:
+            for table in ("responses", "response_objects", "objects"):
+                connection.execute(f"DELETE FROM {table}")
+
+    @staticmethod
+    def _observe(connection: sqlite3.Connection, obj: typing.Dict, now: float) -> None:
+        """ Records the `last_edited_time` of a page or a block, and the page containing it. """
+        if obj.get("object") not in ("page", "block") or "id" not in obj or "last_edited_time" not in obj:
+            return
+        object_id = _normalize_id(obj["id"])
+        parent = obj.get("parent") or {}
+        if obj["object"] == "page" or obj.get("type") == "child_page":
+            page_id = object_id
+        elif parent.get("type") == "page_id":
+            page_id = _normalize_id(parent["page_id"])
+        elif parent.get("type") == "block_id":
+            row = connection.execute("SELECT page_id FROM objects WHERE object_id = ?",
+                                     (_normalize_id(parent["block_id"]),)).fetchone()
+            page_id = row[0] if row is not None else None
+        else:
+            page_id = None
+        connection.execute("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?)",
+                           (object_id, page_id, obj["last_edited_time"], now))
+
+    @staticmethod
+    def _remove(connection: sqlite3.Connection, keys: typing.Collection[str]) -> None:
+        connection.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key in keys])
+        connection.executemany("DELETE FROM response_objects WHERE key = ?", [(key,) for key in keys])
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        excess = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        keys = []
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            keys.append(key)
+            excess -= size
+            if excess <= 0:
+                break
+        self._remove(connection, keys)
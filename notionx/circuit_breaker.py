@@ -0,0 +1,118 @@
+""" Failing fast while the Notion API is down """
+import collections
+import threading
+import time
+import typing
+from typing import Optional
+
+from notionx.errors import CircuitOpenError
+
+__all__ = ["CircuitBreaker"]
+
+
+class CircuitBreaker:
+    """ A thread-safe circuit breaker, which stops sending requests to an API failing most of them.
+
+    - Closed: the requests are sent and their outcomes are recorded in a window of the last `window` requests.
+      Once the window holds at least `min_requests` outcomes and the share of failures reaches `failure_rate`,
+      the circuit opens.
+    - Open: the requests fail immediately with a `CircuitOpenError` for `open_ms` milliseconds.
+    - Half-open: at most `probes` requests are sent at a time to probe the API. A successful probe closes the circuit
+      and a failed one opens it again.
+
+    A failure is an outage of the API (a server error, a timeout or a connection error), the other error responses
+    (e.g. 400, 404 or 429) telling that the API is up.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self,
+                 failure_rate: float = 0.5,
+                 window: int = 20,
+                 min_requests: int = 10,
+                 open_ms: int = 30_000,
+                 probes: int = 1):
+        if not 0 < failure_rate <= 1:
+            raise ValueError("The `failure_rate` of a circuit breaker must be in (0, 1].")
+        if not 1 <= min_requests <= window:
+            raise ValueError("The `min_requests` of a circuit breaker must be between 1 and its `window`.")
+        if probes < 1:
+            raise ValueError("A circuit breaker sends at least one probe.")
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.open_duration = open_ms / 1_000
+        self.probes = probes
+        self._outcomes: typing.Deque[bool] = collections.deque(maxlen=window)
+        self._failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """ The state of the circuit, "closed", "open" or "half_open". """
+        with self._lock:
+            self._update_state(time.monotonic())
+            return self._state
+
+    def _update_state(self, now: float) -> None:
+        if self._state == self.OPEN and now >= self._opened_at + self.open_duration:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+
+    def check(self) -> None:
+        """ Raises a `CircuitOpenError` if a request would be rejected by `before_request` now, without taking
+        a probe slot, e.g. to fail fast before waiting for the rate limit.
+        """
+        self._admit(reserve=False)
+
+    def before_request(self) -> None:
+        """ Raises a `CircuitOpenError` if a request must not be sent, called before sending every request. """
+        self._admit(reserve=True)
+
+    def _admit(self, reserve: bool) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._update_state(now)
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.HALF_OPEN and self._probes_in_flight < self.probes:
+                if reserve:
+                    self._probes_in_flight += 1
+                return
+            retry_after = max(0.0, self._opened_at + self.open_duration - now)
+        raise CircuitOpenError(retry_after)
+
+    def record(self, failed: Optional[bool]) -> None:
+        """ Records the outcome of a request allowed by `before_request`:
+        `failed` is True on an outage, False otherwise, and None if the request was not completed (e.g. cancelled).
+        """
+        with self._lock:
+            if self._state == self.OPEN:  # a request sent before the circuit opened
+                return
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failed:
+                    self._open()
+                elif failed is not None:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                    self._failures = 0
+                return
+            if failed is None:
+                return
+
+            if len(self._outcomes) == self._outcomes.maxlen:
+                self._failures -= self._outcomes[0]
+            self._outcomes.append(failed)
+            self._failures += failed
+            if len(self._outcomes) >= self.min_requests and \
+                    self._failures >= self.failure_rate * len(self._outcomes):
+                self._open()
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
@@ -1,6 +1,9 @@
 """ The notion client definition """
+import asyncio
 import functools
-import json
+import hashlib
+import time
+import warnings
 from dataclasses import dataclass
 import typing
 from typing import Optional, Union
@@ -9,10 +12,35 @@ import httpx
 
 from notionx.api_endpoints import PagesEndpoint, BlocksEndpoint, DatabasesEndpoint, UsersEndpoint, \
     CommentsEndpoint, SearchEndpoint
-from notionx.errors import raise_api_response_exception_by_err_code, UnknownAPIResponseError
+from notionx.codec import JSONCodec, get_codec
+from notionx.concurrency import AdaptiveConcurrencyLimit
+from notionx.deadline import check_deadline, remaining
+from notionx.documents import parse_lazy, lazy_parsing_supported
+from notionx.bulk import map_concurrently, async_map_concurrently, fetch_block_tree, async_fetch_block_tree, \
+    append_block_tree, async_append_block_tree
+from notionx.cache import ResponseCache, SQLiteResponseCache
+from notionx.circuit_breaker import CircuitBreaker
+from notionx.hedging import HedgingPolicy
+from notionx.hooks import RequestHook, RequestRecorder, measure_request, recording, record_queue_time, \
+    record_attempt
+from notionx.errors import raise_api_response_exception_by_err_code, UnknownAPIResponseError, \
+    PyNotionAPIResponseException, PyNotionBaseException, DeadlineExceededError
+from notionx.pagination import iterate_paginated_api, async_iterate_paginated_api, iterate_streamed_api, \
+    async_iterate_streamed_api
+from notionx.rate_limit import TokenBucket, FileTokenBucket
+from notionx.retry import RetryPolicy, parse_retry_after, is_read_only
+from notionx.scheduler import LANES, PriorityScheduler, current_priority
+from notionx.singleflight import SingleFlight, AsyncSingleFlight
+from notionx.streaming import ResultsStreamParser
+from notionx.utils import endpoint_template
 
 __all__ = ["ClientOptions", "Client"]
 
+# The statuses telling that the API is overloaded, which shrink the adaptive concurrency window
+_OVERLOAD_STATUS_CODES = frozenset((429, 503, 504))
+# The statuses telling that the API is down, counted as failures by the circuit breaker
+_OUTAGE_STATUS_CODES = frozenset((500, 502, 503, 504))
+
 
 @dataclass(frozen=True)
 class ClientOptions:
@@ -22,12 +50,99 @@ class ClientOptions:
     notion_version: str = "2022-06-28"
     base_url = "https://api.notion.com/v1"
     timeout_ms: int = 90_000
+    # `rate_limit_per_second` is the average number of requests sent per second, `None` disables rate limiting
+    rate_limit_per_second: Optional[float] = None
+    # `rate_limit_burst` is the number of requests that can be sent at once after the client has been idle
+    rate_limit_burst: int = 3
+    # `rate_limit_path` stores the rate limiter state in this file, sharing the rate limit between the processes
+    # of the host using the same path (e.g. the workers of one integration token); it requires a POSIX system
+    rate_limit_path: Optional[str] = None
+    # `max_retries` is the number of times a request failing with a transient error is sent again
+    max_retries: int = 0
+    # `retry_backoff_ms` and `retry_max_backoff_ms` bound the exponential backoff between two attempts
+    retry_backoff_ms: int = 500
+    retry_max_backoff_ms: int = 30_000
+    # `retry_max_elapsed_ms` is the total time budget of a request and its retries, `None` means no budget
+    retry_max_elapsed_ms: Optional[int] = 120_000
+    # `pagination_prefetch` is the number of pages the `iter_*` methods request ahead of the consumer
+    pagination_prefetch: int = 0
+    # `bulk_concurrency` is the number of requests the bulk methods (e.g. `pages.create_many`, `blocks.fetch_tree`)
+    # send at a time
+    bulk_concurrency: int = 3
+    # `adaptive_concurrency` bounds the requests in flight with a window starting at `bulk_concurrency`,
+    # growing while the responses are healthy and halved on 429, 503 and 504 responses and timeouts (AIMD);
+    # the bulk methods then fan out up to `adaptive_concurrency_max` requests, the window deciding how many are sent
+    adaptive_concurrency: bool = False
+    adaptive_concurrency_max: int = 32
+    # `circuit_failure_rate` enables the circuit breaker: once this share of the last `circuit_window` requests
+    # failed because of an outage (server errors, timeouts, connection errors), the requests fail immediately
+    # with a `CircuitOpenError` for `circuit_open_ms` milliseconds, then a probe request checks whether the API is back
+    circuit_failure_rate: Optional[float] = None
+    circuit_window: int = 20
+    circuit_open_ms: int = 30_000
+    # `hedge_percentile` enables hedged GET requests (`AsyncClient` only): a GET request still unanswered after this
+    # percentile of the recent GET latencies (e.g. `95`) is sent a second time and the first response is used
+    hedge_percentile: Optional[float] = None
+    # `hedge_budget` is the maximum share of the GET requests that are hedged
+    hedge_budget: float = 0.05
+    # `priority_scheduling` (`AsyncClient` only) serves the requests waiting for the rate limit by priority lane,
+    # "interactive", "default" then "bulk", instead of first come, first served; it requires `rate_limit_per_second`.
+    # The lane of a request is set by the `notionx.scheduler.priority` context, or by `endpoint_priorities`
+    # mapping endpoint templates such as `databases/{id}/query` to lanes, and defaults to "default"
+    priority_scheduling: bool = False
+    endpoint_priorities: Optional[typing.Mapping[str, str]] = None
+    # `priority_min_share` is the share of the rate limit guaranteed to each lower lane while it has requests waiting
+    priority_min_share: float = 0.1
+    # `local_validation_rate` is the fraction of endpoint calls whose parameters are validated locally,
+    # `1` validates every call (development), `0` turns local validation off (production)
+    local_validation_rate: float = 1.0
+    # `json_codec` encodes the request bodies and decodes the responses: "orjson", "ujson", "json" (the standard
+    # library), a `JSONCodec` instance, or "auto" to pick the fastest installed one
+    json_codec: Union[str, JSONCodec] = "auto"
+    # `lazy_responses` returns the responses as `LazyDocument` views decoding their values on access,
+    # it requires pysimdjson, the responses being decoded eagerly without it
+    lazy_responses: bool = False
+    # `stream_results` makes the `iter_*` methods parse each page while it is received and yield every result
+    # as soon as it is complete, prefetching does not apply to streamed pages
+    stream_results: bool = False
+    # `max_connections` and `max_keepalive_connections` bound the connection pool, `None` means no limit
+    max_connections: Optional[int] = 100
+    max_keepalive_connections: Optional[int] = 20
+    # `keepalive_expiry_ms` is how long an idle connection is kept open, `None` keeps it open
+    keepalive_expiry_ms: Optional[int] = 5_000
+    # `http2` multiplexes the requests over HTTP/2 connections, it requires the h2 package (`httpx[http2]`)
+    http2: bool = False
+    # `prewarm_connections` is the number of connections opened when entering the client context
+    # (`with Client(...)` or `async with AsyncClient(...)`), to avoid paying the TLS handshakes in the first requests
+    prewarm_connections: int = 0
+    # `coalesce_requests` makes identical GET requests sent at the same time share a single request
+    coalesce_requests: bool = False
+    # `cache_ttl_ms` maps endpoint templates such as `databases/{id}` or `users/me` to the number of milliseconds
+    # their responses are cached, `None` disables the cache; the writes sent by the client evict the entries they change
+    cache_ttl_ms: Optional[typing.Mapping[str, float]] = None
+    # `cache_max_bytes` is the total size of the cached responses, the least recently used ones being evicted
+    cache_max_bytes: int = 16 * 1024 * 1024
+    # `cache_path` stores the cache in a SQLite database at this path instead of in memory, sharing it between the
+    # processes using the same path and across restarts; the expired responses of the page contents are then
+    # revalidated with the `last_edited_time` of their page instead of being fetched again
+    cache_path: Optional[str] = None
+    # `request_hooks` are called with the `notionx.hooks.RequestMetrics` of every request once it is done,
+    # i.e. its endpoint template, status, error, queueing, network and decoding times and sizes
+    request_hooks: Optional[typing.Sequence[RequestHook]] = None
 
 
 class Client:
     _http_client: 'httpx.Client'
 
     _client_type = httpx.Client
+    _iterate_paginated_api = staticmethod(iterate_paginated_api)
+    _iterate_streamed_api = staticmethod(iterate_streamed_api)
+    _map_concurrently = staticmethod(map_concurrently)
+    _fetch_block_tree = staticmethod(fetch_block_tree)
+    _append_block_tree = staticmethod(append_block_tree)
+    _single_flight_type = SingleFlight
+    _supports_hedging = False
+    _supports_priority_scheduling = False
 
     def __init__(
             self,
@@ -40,14 +155,58 @@ class Client:
             options = ClientOptions(**options)
         self.options = options
 
-        self._http_client = self._client_type(
-            base_url=self.options.base_url,
-            headers={
-                "Authorization": f"Bearer {self.options.auth_token}",
-                "Notion-Version": self.options.notion_version
-            },
-            timeout=httpx.Timeout(self.options.timeout_ms / 1_000)
-        )
+        self._http_client = self._make_http_client()
+
+        self._rate_limiter: Optional[TokenBucket] = None
+        if self.options.rate_limit_per_second is not None and self.options.rate_limit_path is not None:
+            self._rate_limiter = FileTokenBucket(self.options.rate_limit_path,
+                                                 self.options.rate_limit_per_second,
+                                                 self.options.rate_limit_burst)
+        elif self.options.rate_limit_per_second is not None:
+            self._rate_limiter = TokenBucket(self.options.rate_limit_per_second,
+                                             self.options.rate_limit_burst)
+        self._retry_policy = RetryPolicy(self.options.max_retries,
+                                         self.options.retry_backoff_ms,
+                                         self.options.retry_max_backoff_ms,
+                                         self.options.retry_max_elapsed_ms)
+        self._json_codec = get_codec(self.options.json_codec)
+        if self.options.lazy_responses and not lazy_parsing_supported():
+            warnings.warn("`lazy_responses` requires pysimdjson to be installed, the responses are decoded eagerly.",
+                          RuntimeWarning, stacklevel=2)
+        self.concurrency_limit: Optional[AdaptiveConcurrencyLimit] = None
+        if self.options.adaptive_concurrency:
+            self.concurrency_limit = AdaptiveConcurrencyLimit(self.options.bulk_concurrency,
+                                                              max_limit=self.options.adaptive_concurrency_max)
+        self.circuit_breaker: Optional[CircuitBreaker] = None
+        if self.options.circuit_failure_rate is not None:
+            self.circuit_breaker = CircuitBreaker(self.options.circuit_failure_rate,
+                                                  window=self.options.circuit_window,
+                                                  min_requests=min(10, self.options.circuit_window),
+                                                  open_ms=self.options.circuit_open_ms)
+        self.hedging: Optional[HedgingPolicy] = None
+        if self.options.hedge_percentile is not None:
+            if not self._supports_hedging:
+                raise ValueError("Hedged requests (`hedge_percentile`) are only supported by `AsyncClient`.")
+            self.hedging = HedgingPolicy(self.options.hedge_percentile, self.options.hedge_budget)
+        self.scheduler: Optional[PriorityScheduler] = None
+        if self.options.priority_scheduling:
+            if not self._supports_priority_scheduling:
+                raise ValueError("Priority scheduling is only supported by `AsyncClient`.")
+            if self._rate_limiter is None:
+                raise ValueError("Priority scheduling requires `rate_limit_per_second`.")
+            self.scheduler = PriorityScheduler(self._rate_limiter, self.options.priority_min_share)
+            for lane in (self.options.endpoint_priorities or {}).values():
+                if lane not in LANES:
+                    raise ValueError(f"Unknown priority lane `{lane}`, expected one of {list(LANES)}.")
+        self._single_flight = self._single_flight_type() if self.options.coalesce_requests else None
+        self.cache: Optional[Union[ResponseCache, SQLiteResponseCache]] = None
+        self._cache_namespace = hashlib.sha256(
+            f"{self.options.auth_token}\0{self.options.notion_version}".encode()).hexdigest()[:16]
+        if self.options.cache_ttl_ms and self.options.cache_path is not None:
+            self.cache = SQLiteResponseCache(self.options.cache_path, self.options.cache_ttl_ms,
+                                             self.options.cache_max_bytes, self._json_codec)
+        elif self.options.cache_ttl_ms:
+            self.cache = ResponseCache(self.options.cache_ttl_ms, self.options.cache_max_bytes)
 
         self.pages = PagesEndpoint(self)
         self.blocks = BlocksEndpoint(self)
@@ -56,18 +215,78 @@ class Client:
         self.comments = CommentsEndpoint(self)
         self.search = SearchEndpoint(self)
 
+    def _make_http_client(self, transport: Optional[httpx.BaseTransport] = None):
+        """ Creates the underlying httpx client, sending its requests through `transport` if specified. """
+        keepalive_expiry = self.options.keepalive_expiry_ms
+        return self._client_type(
+            base_url=self.options.base_url,
+            headers={
+                "Authorization": f"Bearer {self.options.auth_token}",
+                "Notion-Version": self.options.notion_version
+            },
+            timeout=httpx.Timeout(self.options.timeout_ms / 1_000),
+            limits=httpx.Limits(
+                max_connections=self.options.max_connections,
+                max_keepalive_connections=self.options.max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry / 1_000 if keepalive_expiry is not None else None
+            ),
+            http2=self.options.http2,
+            transport=transport
+        )
+
+    def _prewarm_connection(self, _index: int) -> bool:
+        try:
+            self._acquire_rate_limit("")
+            self._send_once(self._http_client.build_request("HEAD", ""))
+        except (httpx.HTTPError, PyNotionBaseException):  # e.g. the circuit breaker is open
+            return False
+        return True
+
+    def prewarm(self, connections: Optional[int] = None) -> int:
+        """ Opens `connections` connections to the API at the same time (defaults to the `prewarm_connections` option)
+        and keeps them in the pool, so that the following requests skip the TCP and TLS handshakes.
+        The warm-up requests go through the rate limiter and the circuit breaker like any other request.
+        Returns the number of connections successfully opened, prewarming is best-effort and never raises.
+        """
+        if connections is None:
+            connections = self.options.prewarm_connections
+        if connections <= 0:
+            return 0
+        return sum(self._map_concurrently(self._prewarm_connection, range(connections), connections))
+
+    def close(self) -> None:
+        """ Closes the connections of the client, and the files of its cache and rate limiter. """
+        self._http_client.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self._rate_limiter is not None:
+            self._rate_limiter.close()
+
+    def __enter__(self):
+        self.prewarm()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     def _make_request(self, method: str, path: str, query: dict, body: dict):
-        return self._http_client.build_request(method, path, params=query, json=body)
+        if body is None:
+            return self._http_client.build_request(method, path, params=query)
+        # The body is encoded here rather than by httpx, so that the configured codec is used
+        return self._http_client.build_request(method, path, params=query,
+                                               content=self._json_codec.dumps(body),
+                                               headers={"Content-Type": self._json_codec.content_type})
 
-    def _parse_response(self, rsp: httpx.Response):
+    def _raise_for_error(self, rsp: httpx.Response) -> None:
+        """ Raises the exception matching the error code of `rsp` if it is an error response. """
         try:
             rsp.raise_for_status()
         except httpx.HTTPStatusError as err:
             try:
-                body = err.response.json()
+                body = self._json_codec.loads(err.response.content)
                 err_code = body.get("code")
                 err_detail = body.get("message", "")
-            except json.JSONDecodeError:
+            except ValueError:  # the decoding errors of all the codecs are ValueErrors
                 err_code = None
                 err_detail = "The error object is not a valid json object."
 
@@ -79,8 +298,27 @@ class Client:
             else:
                 raise UnknownAPIResponseError(err_detail)
 
-        ret = rsp.json()
-        return ret
+    def _decode_content(self, content: bytes):
+        if self.options.lazy_responses:
+            return parse_lazy(content, self._json_codec)
+        return self._json_codec.loads(content)
+
+    def _next_retry_delay(self,
+                          method: str,
+                          path: str,
+                          rsp: httpx.Response,
+                          err: PyNotionAPIResponseException,
+                          attempt: int,
+                          started_at: float) -> Optional[float]:
+        delay = self._retry_policy.next_delay(
+            method, path, err, attempt,
+            elapsed=time.monotonic() - started_at,
+            retry_after=parse_retry_after(rsp.headers.get("Retry-After"))
+        )
+        left = remaining()
+        if delay is not None and left is not None and delay >= left:
+            return None  # the retry could not be sent before the deadline
+        return delay
 
     def request(self,
                 method: str,
@@ -88,8 +326,235 @@ class Client:
                 query: Optional[dict] = None,
                 body: Optional[dict] = None):
         req = self._make_request(method, path, query, body)
-        rsp = self._http_client.send(req)
-        return self._parse_response(rsp)
+        if not self.options.request_hooks:
+            return self._decode_content(self._fetch_content(req, method, path))
+        with measure_request(self.options.request_hooks, method, path, len(req.content)) as recorder:
+            return self._decode_recorded(self._fetch_content(req, method, path), recorder)
+
+    def _decode_recorded(self, content: bytes, recorder: RequestRecorder):
+        """ Decodes the response body `content`, recording its size and the time spent decoding it. """
+        recorder.response_bytes = len(content)
+        started_at = time.perf_counter()
+        try:
+            return self._decode_content(content)
+        finally:
+            recorder.decode_time += time.perf_counter() - started_at
+
+    def _fetch_content(self, req: httpx.Request, method: str, path: str) -> bytes:
+        """ Returns the body of the response to `req`, which may come from the cache or from an identical request
+        already in flight for GET requests. A successful write evicts the cached responses of the objects it changed.
+        """
+        if req.method != "GET":
+            content = self._send(req, method, path).content
+            if self.cache is not None and not is_read_only(method, path):
+                self._invalidate_written(path, content)
+            return content
+
+        key = self._cache_key(req)
+        if self.cache is not None:
+            content = self.cache.get(path, key)
+            if content is None:
+                content = self._revalidate(path, key)
+            if content is not None:
+                return content
+        content = self._get_content(req, method, path)
+        if self.cache is not None:
+            self.cache.put(path, key, content)
+        return content
+
+    def _cache_key(self, req: httpx.Request) -> str:
+        """ The key of the cached response of `req`. It is scoped to the integration token and the Notion version,
+        as the clients sharing a cache file may see different objects or receive them in different shapes.
+        """
+        return f"{self._cache_namespace}:{req.url}"
+
+    def _invalidate_written(self, path: str, content: bytes) -> None:
+        """ Evicts the cached responses changed by a successful write to `path`: the ones of the objects in `path`,
+        and the ones of the parent page or block of the written object, such as the lists of its children and comments.
+        """
+        self.cache.invalidate_path(path)
+        try:
+            written = self._json_codec.loads(content)
+        except ValueError:
+            return
+        parent = written.get("parent") if isinstance(written, dict) else None
+        if isinstance(parent, dict) and parent.get("type") in ("page_id", "block_id") and parent.get(parent["type"]):
+            self.cache.invalidate(parent[parent["type"]])
+
+    def _revalidate(self, path: str, key: str) -> Optional[bytes]:
+        """ Returns the expired cached response of `path` if the page it belongs to has not been edited since,
+        which is checked by retrieving the page.
+        """
+        stale = self.cache.get_stale(path, key)
+        if stale is None:
+            return None
+        content, page_id, last_edited_time = stale
+        page_path = f"pages/{page_id}"
+        page_req = self._make_request("get", page_path, None, None)
+        self.cache.put(page_path, self._cache_key(page_req), self._get_content(page_req, "get", page_path))
+        return content if self.cache.revalidate(page_id, last_edited_time) else None
+
+    def _get_content(self, req: httpx.Request, method: str, path: str) -> bytes:
+        if self._single_flight is not None:
+            # Identical GET requests in flight share the same response
+            return self._single_flight.do(str(req.url), functools.partial(self._send_for_content, req, method, path))
+        return self._send_for_content(req, method, path)
+
+    def _send_for_content(self, req: httpx.Request, method: str, path: str) -> bytes:
+        return self._send(req, method, path).content
+
+    def _send(self, req: httpx.Request, method: str, path: str) -> httpx.Response:
+        """ Sends `req`, retrying it according to the retry policy, and returns the successful response. """
+        started_at = time.monotonic()
+        attempt = 0
+        while True:
+            self._acquire_rate_limit(path)
+            rsp = self._send_once(req)
+            try:
+                self._raise_for_error(rsp)
+                return rsp
+            except PyNotionAPIResponseException as err:
+                delay = self._next_retry_delay(method, path, rsp, err, attempt, started_at)
+                if delay is None:
+                    raise
+            attempt += 1
+            time.sleep(delay)
+
+    def _acquire_rate_limit(self, path: str) -> None:
+        """ Waits for the rate limiter to let a request to `path` through, before the deadline if any.
+        Fails fast while the circuit is open, without taking a token.
+        """
+        left = check_deadline()
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.check()
+        if self._rate_limiter is not None:
+            queued_at = time.perf_counter()
+            acquired = self._rate_limiter.acquire(left)
+            record_queue_time(time.perf_counter() - queued_at)
+            if not acquired:
+                raise DeadlineExceededError("The rate limit does not let the request through before the deadline.")
+
+    def _send_once(self, req: httpx.Request, stream: bool = False) -> httpx.Response:
+        """ Sends `req` once, unless the circuit breaker is open, within the adaptive concurrency window if enabled.
+        A streamed request leaves the window once its headers are received.
+        """
+        left = check_deadline()
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_request()
+        started_at = 0.0
+        try:
+            if self.concurrency_limit is not None:
+                queued_at = time.perf_counter()
+                started_at = self.concurrency_limit.acquire(left)
+                record_queue_time(time.perf_counter() - queued_at)
+                if started_at is None:
+                    raise DeadlineExceededError("No request slot was freed before the deadline.")
+        except BaseException:
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record(failed=None)
+            raise
+        try:
+            shrunk = self._shrink_timeout(req)
+        except DeadlineExceededError:  # the slot was granted at the deadline
+            self._record_outcome(started_at, None, None)
+            raise
+        rsp: Optional[httpx.Response] = None
+        sent_at = time.perf_counter()
+        try:
+            rsp = self._http_client.send(req, stream=stream)
+        except httpx.TimeoutException as err:
+            if shrunk:  # not an outage, the deadline has passed
+                self._record_outcome(started_at, None, None)
+                raise DeadlineExceededError("The request did not complete before the deadline.") from err
+            self._record_outcome(started_at, None, err)
+            raise
+        except BaseException as err:
+            self._record_outcome(started_at, None, err)
+            raise
+        finally:
+            record_attempt(time.perf_counter() - sent_at, rsp.status_code if rsp is not None else None)
+        self._record_outcome(started_at, rsp, None)
+        return rsp
+
+    def _shrink_timeout(self, req: httpx.Request) -> bool:
+        """ Shrinks the timeout of `req` to the time left before the deadline of the current context, if shorter.
+        Returns whether the timeout was shrunk.
+        """
+        left = check_deadline()
+        if left is None or left >= self.options.timeout_ms / 1_000:
+            return False
+        req.extensions["timeout"] = httpx.Timeout(left).as_dict()
+        return True
+
+    def _record_outcome(self,
+                        started_at: float,
+                        rsp: Optional[httpx.Response],
+                        err: Optional[BaseException]) -> None:
+        """ Reports the response to an attempt, or the error raised instead, to the adaptive concurrency limit
+        and the circuit breaker.
+        """
+        if self.concurrency_limit is not None:
+            if rsp is not None:
+                self.concurrency_limit.release(started_at, overloaded=rsp.status_code in _OVERLOAD_STATUS_CODES)
+            else:
+                self.concurrency_limit.release(started_at,
+                                               overloaded=True if isinstance(err, httpx.TimeoutException) else None)
+        if self.circuit_breaker is not None:
+            if rsp is not None:
+                self.circuit_breaker.record(failed=rsp.status_code in _OUTAGE_STATUS_CODES)
+            else:
+                self.circuit_breaker.record(failed=True if isinstance(err, httpx.TransportError) else None)
+
+    def _pinned(self) -> "Client":
+        """ The client sending the requests of an operation made of several dependent requests,
+        e.g. the pages of an iteration. A client sends them all itself.
+        """
+        return self
+
+    def _stream_results(self,
+                        method: str,
+                        path: str,
+                        query: Optional[dict],
+                        body: Optional[dict],
+                        parser: ResultsStreamParser) -> typing.Iterator[typing.Dict]:
+        """ Sends a request to a list endpoint and yields the results parsed by `parser` while the body is received.
+        Failed requests are retried like in `request`, as long as no result has been yielded.
+        """
+        req = self._make_request(method, path, query, body)
+        with measure_request(self.options.request_hooks or (), method, path, len(req.content),
+                             record_context=False) as recorder:
+            yield from self._stream_attempts(req, method, path, parser, recorder)
+
+    def _stream_attempts(self,
+                         req: httpx.Request,
+                         method: str,
+                         path: str,
+                         parser: ResultsStreamParser,
+                         recorder: RequestRecorder) -> typing.Iterator[typing.Dict]:
+        started_at = time.monotonic()
+        attempt = 0
+        while True:
+            # the context is only set while nothing is yielded, as the caller may resume the stream in another one
+            with recording(recorder):
+                self._acquire_rate_limit(path)
+                rsp = self._send_once(req, stream=True)
+            try:
+                if rsp.is_success:
+                    for results in recorder.receive(rsp.iter_bytes(), parser):
+                        yield from results
+                    parser.close()
+                    return
+                rsp.read()
+                try:
+                    self._raise_for_error(rsp)
+                except PyNotionAPIResponseException as err:
+                    delay = self._next_retry_delay(method, path, rsp, err, attempt, started_at)
+                    if delay is None:
+                        raise
+            finally:
+                rsp.close()
+            attempt += 1
+            time.sleep(delay)
 
     # Specific Request Methods
     get = functools.partialmethod(request, "get")
@@ -102,6 +567,14 @@ class AsyncClient(Client):
     _http_client: httpx.AsyncClient
 
     _client_type = httpx.AsyncClient
+    _iterate_paginated_api = staticmethod(async_iterate_paginated_api)
+    _iterate_streamed_api = staticmethod(async_iterate_streamed_api)
+    _map_concurrently = staticmethod(async_map_concurrently)
+    _fetch_block_tree = staticmethod(async_fetch_block_tree)
+    _append_block_tree = staticmethod(async_append_block_tree)
+    _single_flight_type = AsyncSingleFlight
+    _supports_hedging = True
+    _supports_priority_scheduling = True
 
     async def request(self,
                       method: str,
@@ -109,8 +582,255 @@ class AsyncClient(Client):
                       query: Optional[dict] = None,
                       body: Optional[dict] = None):
         req = self._make_request(method, path, query, body)
-        rsp = await self._http_client.send(req)
-        return self._parse_response(rsp)
+        if not self.options.request_hooks:
+            return self._decode_content(await self._fetch_content(req, method, path))
+        with measure_request(self.options.request_hooks, method, path, len(req.content)) as recorder:
+            return self._decode_recorded(await self._fetch_content(req, method, path), recorder)
+
+    async def _fetch_content(self, req: httpx.Request, method: str, path: str) -> bytes:
+        if req.method != "GET":
+            content = (await self._send(req, method, path)).content
+            if self.cache is not None and not is_read_only(method, path):
+                await self._run_cache(self._invalidate_written, path, content)
+            return content
+
+        key = self._cache_key(req)
+        if self.cache is not None:
+            content = await self._run_cache(self.cache.get, path, key)
+            if content is None:
+                content = await self._revalidate(path, key)
+            if content is not None:
+                return content
+        content = await self._get_content(req, method, path)
+        if self.cache is not None:
+            await self._run_cache(self.cache.put, path, key, content)
+        return content
+
+    async def _run_cache(self, func: typing.Callable[..., typing.Any], *args: typing.Any) -> typing.Any:
+        """ Calls `func`, a method of the cache, in a thread for the SQLite cache,
+        whose calls may wait for the lock of another process without blocking the event loop.
+        """
+        if isinstance(self.cache, SQLiteResponseCache):
+            return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+        return func(*args)
+
+    async def _revalidate(self, path: str, key: str) -> Optional[bytes]:
+        stale = await self._run_cache(self.cache.get_stale, path, key)
+        if stale is None:
+            return None
+        content, page_id, last_edited_time = stale
+        page_path = f"pages/{page_id}"
+        page_req = self._make_request("get", page_path, None, None)
+        page_content = await self._get_content(page_req, "get", page_path)
+        await self._run_cache(self.cache.put, page_path, self._cache_key(page_req), page_content)
+        return content if await self._run_cache(self.cache.revalidate, page_id, last_edited_time) else None
+
+    async def _get_content(self, req: httpx.Request, method: str, path: str) -> bytes:
+        if self._single_flight is not None:
+            return await self._single_flight.do(str(req.url),
+                                                functools.partial(self._send_for_content, req, method, path))
+        return await self._send_for_content(req, method, path)
+
+    async def _send_for_content(self, req: httpx.Request, method: str, path: str) -> bytes:
+        return (await self._send(req, method, path)).content
+
+    async def _send(self, req: httpx.Request, method: str, path: str) -> httpx.Response:
+        started_at = time.monotonic()
+        attempt = 0
+        while True:
+            await self._acquire_rate_limit(path)
+            if self.hedging is not None and req.method == "GET":
+                rsp = await self._send_hedged(req)
+            else:
+                rsp = await self._send_once(req)
+            try:
+                self._raise_for_error(rsp)
+                return rsp
+            except PyNotionAPIResponseException as err:
+                delay = self._next_retry_delay(method, path, rsp, err, attempt, started_at)
+                if delay is None:
+                    raise
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _acquire_rate_limit(self, path: str) -> None:
+        left = check_deadline()
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.check()
+        queued_at = time.perf_counter()
+        try:
+            if self.scheduler is not None:
+                try:
+                    await asyncio.wait_for(self.scheduler.acquire(self._priority_lane(path)), left)
+                except asyncio.TimeoutError:
+                    raise DeadlineExceededError("The rate limit does not let the request through "
+                                                "before the deadline.") from None
+            elif self._rate_limiter is not None and not await self._rate_limiter.async_acquire(left):
+                raise DeadlineExceededError("The rate limit does not let the request through before the deadline.")
+        finally:
+            record_queue_time(time.perf_counter() - queued_at)
+
+    async def _try_acquire_rate_limit(self) -> bool:
+        """ Takes a token of the rate limit if one is available right away, without waiting for it
+        nor passing the requests waiting for the priority scheduler.
+        """
+        if self.scheduler is not None and any(self.scheduler.waiting(lane) for lane in LANES):
+            return False
+        return self._rate_limiter is None or await self._rate_limiter.async_acquire(timeout=0)
+
+    def _priority_lane(self, path: str) -> str:
+        """ The priority lane of a request to `path`, set by the `priority` context or the `endpoint_priorities`. """
+        lane = current_priority()
+        if lane is None and self.options.endpoint_priorities:
+            lane = self.options.endpoint_priorities.get(endpoint_template(path))
+        return lane or "default"
+
+    async def _send_hedged(self, req: httpx.Request) -> httpx.Response:
+        """ Sends `req`, and sends it again if it is slower than usual and the hedging budget allows it,
+        returning the first response received. The hedge is only sent if the rate limit has a token for it
+        right away, so that waiting for the hedge never delays the request.
+        """
+        delay = self.hedging.hedge_delay()
+        attempts = {asyncio.ensure_future(self._timed_send_once(req))}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done and self.hedging.try_hedge() and await self._try_acquire_rate_limit():
+                attempts.add(asyncio.ensure_future(self._timed_send_once(req)))
+            pending = attempts
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [attempt for attempt in done if attempt.exception() is None]
+                if succeeded:
+                    latency, rsp = succeeded[0].result()
+                    self.hedging.record(latency)
+                    return rsp
+                if not pending:  # every attempt failed
+                    raise next(iter(done)).exception()
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    async def _timed_send_once(self, req: httpx.Request) -> typing.Tuple[float, httpx.Response]:
+        started_at = time.monotonic()
+        rsp = await self._send_once(req)
+        return time.monotonic() - started_at, rsp
+
+    async def _send_once(self, req: httpx.Request, stream: bool = False) -> httpx.Response:
+        left = check_deadline()
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_request()
+        started_at = 0.0
+        try:
+            if self.concurrency_limit is not None:
+                queued_at = time.perf_counter()
+                try:
+                    started_at = await asyncio.wait_for(self.concurrency_limit.async_acquire(), left)
+                except asyncio.TimeoutError:
+                    raise DeadlineExceededError("No request slot was freed before the deadline.") from None
+                finally:
+                    record_queue_time(time.perf_counter() - queued_at)
+        except BaseException:  # e.g. cancelled while waiting for the window
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record(failed=None)
+            raise
+        try:
+            shrunk = self._shrink_timeout(req)
+        except DeadlineExceededError:  # the slot was granted at the deadline
+            self._record_outcome(started_at, None, None)
+            raise
+        rsp: Optional[httpx.Response] = None
+        sent_at = time.perf_counter()
+        try:
+            rsp = await self._http_client.send(req, stream=stream)
+        except httpx.TimeoutException as err:
+            if shrunk:
+                self._record_outcome(started_at, None, None)
+                raise DeadlineExceededError("The request did not complete before the deadline.") from err
+            self._record_outcome(started_at, None, err)
+            raise
+        except BaseException as err:
+            self._record_outcome(started_at, None, err)
+            raise
+        finally:
+            record_attempt(time.perf_counter() - sent_at, rsp.status_code if rsp is not None else None)
+        self._record_outcome(started_at, rsp, None)
+        return rsp
+
+    async def _prewarm_connection(self, _index: int) -> bool:
+        try:
+            await self._acquire_rate_limit("")
+            await self._send_once(self._http_client.build_request("HEAD", ""))
+        except (httpx.HTTPError, PyNotionBaseException):
+            return False
+        return True
+
+    async def prewarm(self, connections: Optional[int] = None) -> int:
+        if connections is None:
+            connections = self.options.prewarm_connections
+        if connections <= 0:
+            return 0
+        return sum(await self._map_concurrently(self._prewarm_connection, range(connections), connections))
+
+    async def close(self) -> None:
+        """ Closes the connections of the client, and the files of its cache and rate limiter. """
+        await self._http_client.aclose()
+        if self.cache is not None:
+            await self._run_cache(self.cache.close)
+        if self._rate_limiter is not None:
+            self._rate_limiter.close()
+
+    def __enter__(self):
+        raise TypeError("An AsyncClient must be used with `async with`.")
+
+    async def __aenter__(self):
+        await self.prewarm()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _stream_results(self,
+                              method: str,
+                              path: str,
+                              query: Optional[dict],
+                              body: Optional[dict],
+                              parser: ResultsStreamParser) -> typing.AsyncIterator[typing.Dict]:
+        req = self._make_request(method, path, query, body)
+        with measure_request(self.options.request_hooks or (), method, path, len(req.content),
+                             record_context=False) as recorder:
+            async for result in self._stream_attempts(req, method, path, parser, recorder):
+                yield result
+
+    async def _stream_attempts(self,
+                               req: httpx.Request,
+                               method: str,
+                               path: str,
+                               parser: ResultsStreamParser,
+                               recorder: RequestRecorder) -> typing.AsyncIterator[typing.Dict]:
+        started_at = time.monotonic()
+        attempt = 0
+        while True:
+            with recording(recorder):
+                await self._acquire_rate_limit(path)
+                rsp = await self._send_once(req, stream=True)
+            try:
+                if rsp.is_success:
+                    async for results in recorder.async_receive(rsp.aiter_bytes(), parser):
+                        for result in results:
+                            yield result
+                    parser.close()
+                    return
+                await rsp.aread()
+                try:
+                    self._raise_for_error(rsp)
+                except PyNotionAPIResponseException as err:
+                    delay = self._next_retry_delay(method, path, rsp, err, attempt, started_at)
+                    if delay is None:
+                        raise
+            finally:
+                await rsp.aclose()
+            attempt += 1
+            await asyncio.sleep(delay)
 
     # Specific Request Methods
     get = functools.partialmethod(request, "get")
@@ -8,6 +8,17 @@ import httpx
 
 from notionx.api_endpoints import PagesEndpoint, BlocksEndpoint, DatabasesEndpoint, UsersEndpoint, \
     CommentsEndpoint, SearchEndpoint
+from notionx.cache import ResponseCache, SQLiteResponseCache
+from notionx.circuit_breaker import CircuitBreaker
+from notionx.codec import JSONCodec
+from notionx.concurrency import AdaptiveConcurrencyLimit
+from notionx.hedging import HedgingPolicy
+from notionx.hooks import RequestHook, RequestRecorder
+from notionx.rate_limit import TokenBucket
+from notionx.retry import RetryPolicy
+from notionx.scheduler import PriorityScheduler
+from notionx.singleflight import SingleFlight, AsyncSingleFlight
+from notionx.streaming import ResultsStreamParser
 
 __all__ = ["ClientOptions", "Client"]
 
@@ -20,16 +31,100 @@ class ClientOptions:
     notion_version: str = "2022-06-28"
     base_url = "https://api.notion.com/v1"
     timeout_ms: int = 90_000
+    rate_limit_per_second: Optional[float] = None
+    rate_limit_burst: int = 3
+    rate_limit_path: Optional[str] = None
+    max_retries: int = 0
+    retry_backoff_ms: int = 500
+    retry_max_backoff_ms: int = 30_000
+    retry_max_elapsed_ms: Optional[int] = 120_000
+    pagination_prefetch: int = 0
+    bulk_concurrency: int = 3
+    adaptive_concurrency: bool = False
+    adaptive_concurrency_max: int = 32
+    circuit_failure_rate: Optional[float] = None
+    circuit_window: int = 20
+    circuit_open_ms: int = 30_000
+    hedge_percentile: Optional[float] = None
+    hedge_budget: float = 0.05
+    priority_scheduling: bool = False
+    endpoint_priorities: Optional[typing.Mapping[str, str]] = None
+    priority_min_share: float = 0.1
+    local_validation_rate: float = 1.0
+    json_codec: Union[str, JSONCodec] = "auto"
+    lazy_responses: bool = False
+    stream_results: bool = False
+    max_connections: Optional[int] = 100
+    max_keepalive_connections: Optional[int] = 20
+    keepalive_expiry_ms: Optional[int] = 5_000
+    http2: bool = False
+    prewarm_connections: int = 0
+    coalesce_requests: bool = False
+    cache_ttl_ms: Optional[typing.Mapping[str, float]] = None
+    cache_max_bytes: int = 16 * 1024 * 1024
+    cache_path: Optional[str] = None
+    request_hooks: Optional[typing.Sequence[RequestHook]] = None
 
     def __init__(self, auth_token: str,
                  notion_version: typing.Optional[str] = None,
                  base_url: typing.Optional[str] = None,
-                 timeout_ms: typing.Optional[int] = None): ...
+                 timeout_ms: typing.Optional[int] = None,
+                 rate_limit_per_second: typing.Optional[float] = None,
+                 rate_limit_burst: typing.Optional[int] = None,
+                 rate_limit_path: typing.Optional[str] = None,
+                 max_retries: typing.Optional[int] = None,
+                 retry_backoff_ms: typing.Optional[int] = None,
+                 retry_max_backoff_ms: typing.Optional[int] = None,
+                 retry_max_elapsed_ms: typing.Optional[int] = None,
+                 pagination_prefetch: typing.Optional[int] = None,
+                 bulk_concurrency: typing.Optional[int] = None,
+                 adaptive_concurrency: typing.Optional[bool] = None,
+                 adaptive_concurrency_max: typing.Optional[int] = None,
+                 circuit_failure_rate: typing.Optional[float] = None,
+                 circuit_window: typing.Optional[int] = None,
+                 circuit_open_ms: typing.Optional[int] = None,
+                 hedge_percentile: typing.Optional[float] = None,
+                 hedge_budget: typing.Optional[float] = None,
+                 priority_scheduling: typing.Optional[bool] = None,
+                 endpoint_priorities: typing.Optional[typing.Mapping[str, str]] = None,
+                 priority_min_share: typing.Optional[float] = None,
+                 local_validation_rate: typing.Optional[float] = None,
+                 json_codec: typing.Optional[Union[str, JSONCodec]] = None,
+                 lazy_responses: typing.Optional[bool] = None,
+                 stream_results: typing.Optional[bool] = None,
+                 max_connections: typing.Optional[int] = None,
+                 max_keepalive_connections: typing.Optional[int] = None,
+                 keepalive_expiry_ms: typing.Optional[int] = None,
+                 http2: typing.Optional[bool] = None,
+                 prewarm_connections: typing.Optional[int] = None,
+                 coalesce_requests: typing.Optional[bool] = None,
+                 cache_ttl_ms: typing.Optional[typing.Mapping[str, float]] = None,
+                 cache_max_bytes: typing.Optional[int] = None,
+                 cache_path: typing.Optional[str] = None,
+                 request_hooks: typing.Optional[typing.Sequence[RequestHook]] = None): ...
 
 
 class Client:
     _client_type: type
+    _iterate_paginated_api: typing.Callable[..., typing.Iterator[dict]]
+    _iterate_streamed_api: typing.Callable[..., typing.Iterator[dict]]
+    _map_concurrently: typing.Callable[..., typing.List]
+    _fetch_block_tree: typing.Callable[..., typing.List]
+    _append_block_tree: typing.Callable[..., typing.List]
+    _single_flight_type: type
+    _supports_hedging: bool
+    _supports_priority_scheduling: bool
+    _single_flight: Optional[SingleFlight]
+    cache: Optional[Union[ResponseCache, SQLiteResponseCache]]
+    _cache_namespace: str
     _http_client: httpx.Client
+    _rate_limiter: Optional[TokenBucket]
+    concurrency_limit: Optional[AdaptiveConcurrencyLimit]
+    circuit_breaker: Optional[CircuitBreaker]
+    hedging: Optional[HedgingPolicy]
+    scheduler: Optional[PriorityScheduler]
+    _retry_policy: RetryPolicy
+    _json_codec: JSONCodec
     options: ClientOptions
     pages: PagesEndpoint
     blocks: BlocksEndpoint
@@ -44,9 +139,31 @@ class Client:
             **kwargs: typing.Any
     ): ...
 
+    def _make_http_client(self, transport: Optional[httpx.BaseTransport] = None) -> httpx.Client: ...
+
+    def _prewarm_connection(self, _index: int) -> bool: ...
+
+    def prewarm(self, connections: Optional[int] = None) -> int: ...
+
+    def close(self) -> None: ...
+
+    def __enter__(self) -> "Client": ...
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None: ...
+
     def _make_request(self, method: str, path: str, query: dict, body: dict) -> httpx.Request: ...
 
-    def _parse_response(self, rsp: httpx.Response) -> dict: ...
+    def _raise_for_error(self, rsp: httpx.Response) -> None: ...
+
+    def _decode_content(self, content: bytes) -> dict: ...
+
+    def _next_retry_delay(self,
+                          method: str,
+                          path: str,
+                          rsp: httpx.Response,
+                          err: Exception,
+                          attempt: int,
+                          started_at: float) -> Optional[float]: ...
 
     def request(self,
                 method: str,
@@ -54,6 +171,49 @@ class Client:
                 query: Optional[dict] = None,
                 body: Optional[dict] = None) -> dict: ...
 
+    def _decode_recorded(self, content: bytes, recorder: RequestRecorder) -> dict: ...
+
+    def _fetch_content(self, req: httpx.Request, method: str, path: str) -> bytes: ...
+
+    def _cache_key(self, req: httpx.Request) -> str: ...
+
+    def _invalidate_written(self, path: str, content: bytes) -> None: ...
+
+    def _revalidate(self, path: str, key: str) -> Optional[bytes]: ...
+
+    def _get_content(self, req: httpx.Request, method: str, path: str) -> bytes: ...
+
+    def _send_for_content(self, req: httpx.Request, method: str, path: str) -> bytes: ...
+
+    def _send(self, req: httpx.Request, method: str, path: str) -> httpx.Response: ...
+
+    def _acquire_rate_limit(self, path: str) -> None: ...
+
+    def _send_once(self, req: httpx.Request, stream: bool = False) -> httpx.Response: ...
+
+    def _shrink_timeout(self, req: httpx.Request) -> bool: ...
+
+    def _record_outcome(self,
+                        started_at: float,
+                        rsp: Optional[httpx.Response],
+                        err: Optional[BaseException]) -> None: ...
+
+    def _pinned(self) -> Client: ...
+
+    def _stream_results(self,
+                        method: str,
+                        path: str,
+                        query: Optional[dict],
+                        body: Optional[dict],
+                        parser: ResultsStreamParser) -> typing.Iterator[dict]: ...
+
+    def _stream_attempts(self,
+                         req: httpx.Request,
+                         method: str,
+                         path: str,
+                         parser: ResultsStreamParser,
+                         recorder: RequestRecorder) -> typing.Iterator[dict]: ...
+
     def get(self, path: str, query: Optional[dict] = None, body: Optional[dict] = None) -> dict: ...
 
     def post(self, path: str, query: Optional[dict] = None, body: Optional[dict] = None) -> dict: ...
@@ -65,7 +225,24 @@ class Client:
 
 class AsyncClient(Client):
     _client_type: type
+    _iterate_paginated_api: typing.Callable[..., typing.AsyncIterator[dict]]
+    _iterate_streamed_api: typing.Callable[..., typing.AsyncIterator[dict]]
+    _map_concurrently: typing.Callable[..., typing.Awaitable[typing.List]]
+    _fetch_block_tree: typing.Callable[..., typing.Awaitable[typing.List]]
+    _append_block_tree: typing.Callable[..., typing.Awaitable[typing.List]]
+    _single_flight_type: type
+    _supports_hedging: bool
+    _supports_priority_scheduling: bool
+    _single_flight: Optional[AsyncSingleFlight]
+    cache: Optional[Union[ResponseCache, SQLiteResponseCache]]
     _http_client: httpx.AsyncClient
+    _rate_limiter: Optional[TokenBucket]
+    concurrency_limit: Optional[AdaptiveConcurrencyLimit]
+    circuit_breaker: Optional[CircuitBreaker]
+    hedging: Optional[HedgingPolicy]
+    scheduler: Optional[PriorityScheduler]
+    _retry_policy: RetryPolicy
+    _json_codec: JSONCodec
     options: ClientOptions
     pages: PagesEndpoint
     blocks: BlocksEndpoint
@@ -80,9 +257,31 @@ class AsyncClient(Client):
             **kwargs: typing.Any
     ): ...
 
+    def _make_http_client(self, transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient: ...
+
+    async def _prewarm_connection(self, _index: int) -> bool: ...
+
+    async def prewarm(self, connections: Optional[int] = None) -> int: ...
+
+    async def close(self) -> None: ...
+
+    async def __aenter__(self) -> "AsyncClient": ...
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None: ...
+
     def _make_request(self, method: str, path: str, query: dict, body: dict) -> httpx.Request: ...
 
-    def _parse_response(self, rsp: httpx.Response) -> dict: ...
+    def _raise_for_error(self, rsp: httpx.Response) -> None: ...
+
+    def _decode_content(self, content: bytes) -> dict: ...
+
+    def _next_retry_delay(self,
+                          method: str,
+                          path: str,
+                          rsp: httpx.Response,
+                          err: Exception,
+                          attempt: int,
+                          started_at: float) -> Optional[float]: ...
 
     async def request(self,
                 method: str,
@@ -90,6 +289,44 @@ class AsyncClient(Client):
                 query: Optional[dict] = None,
                 body: Optional[dict] = None) -> dict: ...
 
+    async def _fetch_content(self, req: httpx.Request, method: str, path: str) -> bytes: ...
+
+    async def _run_cache(self, func: typing.Callable[..., typing.Any], *args: typing.Any) -> typing.Any: ...
+
+    async def _revalidate(self, path: str, key: str) -> Optional[bytes]: ...
+
+    async def _get_content(self, req: httpx.Request, method: str, path: str) -> bytes: ...
+
+    async def _send_for_content(self, req: httpx.Request, method: str, path: str) -> bytes: ...
+
+    async def _send(self, req: httpx.Request, method: str, path: str) -> httpx.Response: ...
+
+    async def _acquire_rate_limit(self, path: str) -> None: ...
+
+    def _priority_lane(self, path: str) -> str: ...
+
+    async def _try_acquire_rate_limit(self) -> bool: ...
+
+    async def _send_hedged(self, req: httpx.Request) -> httpx.Response: ...
+
+    async def _timed_send_once(self, req: httpx.Request) -> typing.Tuple[float, httpx.Response]: ...
+
+    async def _send_once(self, req: httpx.Request, stream: bool = False) -> httpx.Response: ...
+
+    def _stream_results(self,
+                        method: str,
+                        path: str,
+                        query: Optional[dict],
+                        body: Optional[dict],
+                        parser: ResultsStreamParser) -> typing.AsyncIterator[dict]: ...
+
+    def _stream_attempts(self,
+                         req: httpx.Request,
+                         method: str,
+                         path: str,
+                         parser: ResultsStreamParser,
+                         recorder: RequestRecorder) -> typing.AsyncIterator[dict]: ...
+
     async def get(self, path: str, query: Optional[dict] = None, body: Optional[dict] = None) -> dict: ...
 
     async def post(self, path: str, query: Optional[dict] = None, body: Optional[dict] = None) -> dict: ...
@@ -0,0 +1,107 @@
+""" JSON codecs used to encode the request bodies and decode the response bodies """
+import json
+import typing
+from abc import ABCMeta, abstractmethod
+from collections.abc import Mapping, Sequence
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+__all__ = ["JSONCodec", "StdlibCodec", "OrjsonCodec", "UjsonCodec", "get_codec"]
+
+
+def _encode_default(obj: typing.Any) -> typing.Any:
+    """ Encodes the mappings and sequences that are not dicts or lists, such as lazy response documents. """
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, Sequence) and not isinstance(obj, (str, bytes)):
+        return list(obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+class JSONCodec(metaclass=ABCMeta):
+    """ The base class of the JSON codecs.
+    `dumps` encodes an object to UTF-8 bytes, `loads` decodes bytes and raises a ValueError on invalid JSON.
+    """
+    name: str = ""
+    content_type = "application/json"
+
+    @abstractmethod
+    def dumps(self, obj: typing.Any) -> bytes: ...
+
+    @abstractmethod
+    def loads(self, data: typing.Union[bytes, str]) -> typing.Any: ...
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>"
+
+
+class StdlibCodec(JSONCodec):
+    """ The codec of the standard `json` module, always available. """
+    name = "json"
+
+    def dumps(self, obj: typing.Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_encode_default).encode("utf-8")
+
+    def loads(self, data: typing.Union[bytes, str]) -> typing.Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """ The codec of `orjson`, the fastest one when it is installed. """
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("The `orjson` codec requires the orjson package to be installed.")
+
+    def dumps(self, obj: typing.Any) -> bytes:
+        return orjson.dumps(obj, default=_encode_default)
+
+    def loads(self, data: typing.Union[bytes, str]) -> typing.Any:
+        return orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    """ The codec of `ujson`. """
+    name = "ujson"
+
+    def __init__(self):
+        if ujson is None:
+            raise ImportError("The `ujson` codec requires the ujson package to be installed.")
+
+    def dumps(self, obj: typing.Any) -> bytes:
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False,
+                           default=_encode_default).encode("utf-8")
+
+    def loads(self, data: typing.Union[bytes, str]) -> typing.Any:
+        return ujson.loads(data)
+
+
+_CODEC_TYPES: typing.Dict[str, typing.Type[JSONCodec]] = {
+    codec_type.name: codec_type for codec_type in (OrjsonCodec, UjsonCodec, StdlibCodec)
+}
+
+
+def get_codec(codec: typing.Union[str, JSONCodec] = "auto") -> JSONCodec:
+    """ Returns the codec named `codec` ("orjson", "ujson" or "json"), or `codec` itself if it is a codec.
+    "auto" picks the fastest installed codec, falling back to the standard `json` module.
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec == "auto":
+        if orjson is not None:
+            return OrjsonCodec()
+        if ujson is not None:
+            return UjsonCodec()
+        return StdlibCodec()
+    if codec not in _CODEC_TYPES:
+        raise ValueError(f"Unknown JSON codec `{codec}`, expected one of {['auto', *_CODEC_TYPES]}.")
+    return _CODEC_TYPES[codec]()
@@ -0,0 +1,129 @@
+""" Adaptive limiting of the number of requests in flight """
+import asyncio
+import collections
+import threading
+import time
+import typing
+from typing import Optional
+
+__all__ = ["AdaptiveConcurrencyLimit"]
+
+# The latency differences below which the responses are not considered slower, in seconds
+_LATENCY_SLACK = 0.005
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AdaptiveConcurrencyLimit:
+    """ Bounds the number of requests in flight with a window adjusted by AIMD (additive increase,
+    multiplicative decrease), shared by the threads or the coroutines sending the requests of a client.
+
+    The window grows by one request every time a window of healthy responses has been received, up to `max_limit`.
+    A response is healthy unless its latency exceeds `latency_tolerance` times the average latency,
+    the slow responses keeping the window as is. An overload signal (a 429, 503 or 504 response, or a timeout)
+    multiplies the window by `backoff`, down to `min_limit`; the signals of the requests started before the last
+    decrease are ignored, so that a burst of errors only shrinks the window once.
+    """
+
+    def __init__(self,
+                 initial_limit: int,
+                 min_limit: int = 1,
+                 max_limit: int = 32,
+                 backoff: float = 0.5,
+                 latency_tolerance: float = 2.0):
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("The limits of an adaptive concurrency limit must satisfy 1 <= min_limit <= max_limit.")
+        if not 0 < backoff < 1:
+            raise ValueError("The `backoff` of an adaptive concurrency limit must be between 0 and 1.")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self._limit = min(max(initial_limit, min_limit), max_limit)
+        self._healthy = 0  # the number of healthy responses since the window last changed
+        self._in_flight = 0
+        self._latency: Optional[float] = None  # the moving average of the latency, in seconds
+        self._decreased_at = float("-inf")
+        self._condition = threading.Condition()
+        self._async_waiters: typing.Deque[typing.Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = \
+            collections.deque()
+
+    @property
+    def window(self) -> int:
+        """ The number of requests currently allowed in flight. """
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        """ The number of requests currently in flight. """
+        return self._in_flight
+
+    @property
+    def latency(self) -> Optional[float]:
+        """ The moving average of the latency of the responses in seconds, None before the first one. """
+        return self._latency
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[float]:
+        """ Waits for a free slot in the window, blocking the current thread, and takes it.
+        Returns the time the request starts, to be given back to `release`,
+        or None if no slot was freed within `timeout` seconds.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._in_flight < self.window, timeout):
+                return None
+            self._in_flight += 1
+        return time.monotonic()
+
+    async def async_acquire(self) -> float:
+        """ The asynchronous version of `acquire`, suspending the current coroutine. """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._in_flight < self.window:
+                    self._in_flight += 1
+                    return time.monotonic()
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._condition:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+                    else:  # woken up, the slot goes to another waiter
+                        self._notify(1)
+                raise
+
+    def release(self, started_at: float, overloaded: Optional[bool]) -> None:
+        """ Frees the slot of a request started at `started_at` and adjusts the window with its outcome:
+        `overloaded` is True on an overload signal, False on a response, and None if the request failed otherwise,
+        which leaves the window unchanged.
+        """
+        now = time.monotonic()
+        with self._condition:
+            self._in_flight -= 1
+            if overloaded:
+                if started_at >= self._decreased_at:
+                    self._limit = max(self.min_limit, int(self._limit * self.backoff))
+                    self._healthy = 0
+                    self._decreased_at = now
+            elif overloaded is not None:
+                latency = now - started_at
+                if self._latency is None or latency <= self._latency * self.latency_tolerance + _LATENCY_SLACK:
+                    self._healthy += 1
+                    if self._healthy >= self._limit:
+                        self._limit = min(self.max_limit, self._limit + 1)
+                        self._healthy = 0
+                self._latency = latency if self._latency is None else 0.9 * self._latency + 0.1 * latency
+            self._notify(self.window - self._in_flight)
+
+    def _notify(self, count: int) -> None:
+        if count <= 0:
+            return
+        self._condition.notify(count)
+        for _ in range(min(count, len(self._async_waiters))):
+            loop, waiter = self._async_waiters.popleft()
+            loop.call_soon_threadsafe(_wake, waiter)
@@ -0,0 +1,47 @@
+""" Deadlines bounding the time spent by all the requests made in a context """
+import contextlib
+import contextvars
+import time
+import typing
+from typing import Optional
+
+from notionx.errors import DeadlineExceededError
+
+__all__ = ["deadline", "remaining", "check_deadline"]
+
+# The monotonic time by which the requests of the current context must be done
+_deadline: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar("notionx_deadline", default=None)
+
+
+@contextlib.contextmanager
+def deadline(timeout_ms: float) -> typing.Iterator[None]:
+    """ Requires the requests made in the context, including their retries and their waits for the rate limit,
+    to be done within `timeout_ms` milliseconds, e.g. `with deadline(3_000): client.blocks.fetch_tree(page_id)`.
+    The timeout of every request is shrunk to the time remaining, and a request that cannot be sent in time
+    raises a `DeadlineExceededError` instead. A nested deadline cannot extend the enclosing one.
+    """
+    at = time.monotonic() + timeout_ms / 1_000
+    enclosing = _deadline.get()
+    token = _deadline.set(at if enclosing is None else min(at, enclosing))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """ The number of seconds left before the deadline of the current context, None if there is no deadline. """
+    at = _deadline.get()
+    if at is None:
+        return None
+    return at - time.monotonic()
+
+
+def check_deadline() -> Optional[float]:
+    """ Raises a `DeadlineExceededError` if the deadline of the current context has passed,
+    otherwise returns the number of seconds left, None if there is no deadline.
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError("The deadline of the request has passed.")
+    return left
@@ -0,0 +1,149 @@
+""" Lazily decoded response documents """
+import typing
+from collections.abc import MutableMapping, Sequence
+
+from notionx.codec import JSONCodec
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+__all__ = ["LazyDocument", "LazyList", "parse_lazy", "materialize", "lazy_parsing_supported"]
+
+
+def _wrap(value: typing.Any, parser: typing.Any) -> typing.Any:
+    if isinstance(value, simdjson.Object):
+        return LazyDocument(value, parser)
+    if isinstance(value, simdjson.Array):
+        return LazyList(value, parser)
+    return value
+
+
+class LazyDocument(MutableMapping):
+    """ A dict-like view of a JSON object parsed by simdjson, which only builds the Python objects it is asked for.
+    A value is decoded the first time its key is accessed and kept, so that nested objects can be modified in place.
+    Use `to_dict` (or `materialize`) to get a plain dict.
+    """
+    __slots__ = ("_object", "_parser", "_items", "_deleted")
+
+    def __init__(self, obj: typing.Any, parser: typing.Any):
+        self._object = obj
+        self._parser = parser  # the parsed document is only valid while its parser is alive
+        self._items: typing.Dict[str, typing.Any] = {}
+        self._deleted: typing.Optional[typing.Set[str]] = None
+
+    def __getitem__(self, key: str) -> typing.Any:
+        try:
+            return self._items[key]
+        except KeyError:
+            pass
+        if self._deleted is not None and key in self._deleted:
+            raise KeyError(key)
+        value = self._items[key] = _wrap(self._object[key], self._parser)
+        return value
+
+    def __setitem__(self, key: str, value: typing.Any) -> None:
+        self._items[key] = value
+        if self._deleted is not None:
+            self._deleted.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._items.pop(key, None)
+        if key in self._object:
+            if self._deleted is None:
+                self._deleted = set()
+            self._deleted.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._items:
+            return True
+        return (self._deleted is None or key not in self._deleted) and key in self._object
+
+    def __iter__(self) -> typing.Iterator[str]:
+        for key in self._object.keys():
+            if self._deleted is None or key not in self._deleted:
+                yield key
+        for key in self._items:
+            if key not in self._object:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+    def to_dict(self) -> typing.Dict:
+        if not self._items and self._deleted is None:
+            return self._object.as_dict()
+        return {key: materialize(value) for key, value in self.items()}
+
+
+class LazyList(Sequence):
+    """ A read-only list-like view of a JSON array parsed by simdjson, decoding its items on access. """
+    __slots__ = ("_array", "_parser", "_items")
+
+    def __init__(self, array: typing.Any, parser: typing.Any):
+        self._array = array
+        self._parser = parser
+        self._items: typing.Dict[int, typing.Any] = {}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        try:
+            return self._items[index]
+        except KeyError:
+            pass
+        value = self._items[index] = _wrap(self._array[index], self._parser)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._array)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_list()!r})"
+
+    def to_list(self) -> typing.List:
+        if not self._items:
+            return self._array.as_list()
+        return [materialize(value) for value in self]
+
+
+def lazy_parsing_supported() -> bool:
+    """ Whether pysimdjson is installed, without which `parse_lazy` decodes the documents eagerly. """
+    return simdjson is not None
+
+
+def parse_lazy(data: bytes, codec: JSONCodec) -> typing.Any:
+    """ Parses `data` into a `LazyDocument` (or a `LazyList`) if pysimdjson is installed.
+    Otherwise, `data` is decoded eagerly by `codec` into plain dicts and lists.
+    """
+    if simdjson is None:
+        return codec.loads(data)
+    # A parser can only hold one document at a time, so every document gets its own parser
+    parser = simdjson.Parser()
+    return _wrap(parser.parse(data), parser)
+
+
+def materialize(value: typing.Any) -> typing.Any:
+    """ Converts the lazy views contained in `value` into plain dicts and lists. """
+    if isinstance(value, LazyDocument):
+        return value.to_dict()
+    if isinstance(value, LazyList):
+        return value.to_list()
+    if isinstance(value, dict):
+        return {key: materialize(sub_value) for key, sub_value in value.items()}
+    if isinstance(value, list):
+        return [materialize(sub_value) for sub_value in value]
+    return value
@@ -4,6 +4,8 @@ from typing import Optional
 __all__ = [
     "PyNotionAPIResponseException",
     "LocalValidationError",
+    "CircuitOpenError",
+    "DeadlineExceededError",
     "InvalidJsonError",
     "InvalidRequestUrlError",
     "InvalidRequestError",
@@ -45,6 +47,20 @@ class LocalValidationError(Exception):
     pass
 
 
+class CircuitOpenError(PyNotionBaseException):
+    """ Raised without sending the request while the circuit breaker of the client is open,
+    `retry_after` is the number of seconds before the circuit lets a probe request through.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"The Notion API is failing, requests are not sent for {retry_after:.1f} more seconds.")
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(PyNotionBaseException):
+    """ Raised when a request cannot be done before the deadline set by `notionx.deadline.deadline`. """
+
+
 class PyNotionAPIResponseException(PyNotionBaseException,
                                    metaclass=_PyNotionAPIResponseExceptionMeta):
     """ Exception base class for marking various errors in API responses
@@ -0,0 +1,60 @@
+""" Hedging of the slow requests, sending a duplicate when the first attempt takes longer than usual """
+import collections
+import math
+import threading
+import typing
+from typing import Optional
+
+__all__ = ["HedgingPolicy"]
+
+
+class HedgingPolicy:
+    """ Decides when a request is hedged, i.e. sent a second time while the first attempt is still in flight.
+
+    A request is hedged once it has been in flight for longer than the `percentile` of the latencies of the last
+    `window` requests, and only after `min_samples` latencies have been recorded.
+    Every request earns `budget` hedges, up to `max_credit` saved ones, and every hedge costs one,
+    so that at most a `budget` share of the requests is sent twice.
+    """
+
+    def __init__(self,
+                 percentile: float,
+                 budget: float = 0.05,
+                 window: int = 200,
+                 min_samples: int = 20,
+                 max_credit: float = 10.0):
+        if not 0 < percentile < 100:
+            raise ValueError("The `percentile` of a hedging policy must be between 0 and 100.")
+        if not 0 <= budget <= 1:
+            raise ValueError("The `budget` of a hedging policy must be between 0 and 1.")
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.max_credit = max_credit
+        self._latencies: typing.Deque[float] = collections.deque(maxlen=window)
+        self._credit = 0.0
+        self._lock = threading.Lock()
+
+    def hedge_delay(self) -> Optional[float]:
+        """ Called when a request is sent, returns the number of seconds after which it may be hedged,
+        None if there are not enough latencies yet.
+        """
+        with self._lock:
+            self._credit = min(self.max_credit, self._credit + self.budget)
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, math.ceil(len(latencies) * self.percentile / 100) - 1)]
+
+    def try_hedge(self) -> bool:
+        """ Spends a hedge of the budget, returns False if the budget is exhausted. """
+        with self._lock:
+            if self._credit < 1:
+                return False
+            self._credit -= 1
+            return True
+
+    def record(self, latency: float) -> None:
+        """ Records the latency of a successful attempt, in seconds. """
+        with self._lock:
+            self._latencies.append(latency)
@@ -0,0 +1,171 @@
+""" Instrumentation of the requests of a client, reporting the timing and the size of every request to hooks """
+import contextlib
+import contextvars
+import dataclasses
+import time
+import typing
+from typing import Optional
+
+from notionx.streaming import ResultsStreamParser
+from notionx.utils import endpoint_template
+
+__all__ = ["RequestMetrics", "RequestHook", "RequestRecorder", "measure_request", "recording",
+           "record_queue_time", "record_attempt"]
+
+
+@dataclasses.dataclass(frozen=True)
+class RequestMetrics:
+    """ The measures of a request made by a client, reported to its `request_hooks` once the request is done.
+    The times are in milliseconds and the sizes in bytes.
+    """
+    # `method` and `endpoint` identify the request, e.g. `GET` and `pages/{id}`
+    method: str
+    endpoint: str
+    # `status` is the status code of the last response received, None if no response was received
+    status: Optional[int]
+    # `error` is the name of the exception class raised by the request, None if it succeeded
+    error: Optional[str]
+    # `attempts` is the number of times the request was sent, including the retries and the hedges;
+    # it is 0 when the response came from the cache or from an identical request already in flight
+    attempts: int
+    # `queue_ms` is the time spent waiting for the rate limit, the priority scheduler and the concurrency limit
+    queue_ms: float
+    # `network_ms` is the time spent sending the attempts and receiving their responses
+    network_ms: float
+    # `decode_ms` is the time spent decoding the response body
+    decode_ms: float
+    request_bytes: int
+    response_bytes: int
+    # `total_ms` is the time from the start of the request to its end
+    total_ms: float
+
+
+RequestHook = typing.Callable[[RequestMetrics], None]
+
+
+class RequestRecorder:
+    """ Accumulates the measures of a request while it is made. """
+
+    def __init__(self, method: str, endpoint: str, request_bytes: int):
+        self.method = method
+        self.endpoint = endpoint
+        self.request_bytes = request_bytes
+        self.response_bytes = 0
+        self.status: Optional[int] = None
+        self.attempts = 0
+        self.queue_time = 0.0
+        self.network_time = 0.0
+        self.decode_time = 0.0
+        self.started_at = time.perf_counter()
+
+    def receive(self,
+                chunks: typing.Iterator[bytes],
+                parser: ResultsStreamParser) -> typing.Iterator[typing.List[typing.Dict]]:
+        """ Yields the results parsed by `parser` from each chunk of a streamed body,
+        recording the time spent receiving and parsing the chunks.
+        """
+        chunks = iter(chunks)
+        while True:
+            received_at = time.perf_counter()
+            chunk = next(chunks, None)
+            fed_at = time.perf_counter()
+            self.network_time += fed_at - received_at
+            if chunk is None:
+                return
+            self.response_bytes += len(chunk)
+            results = parser.feed(chunk)
+            self.decode_time += time.perf_counter() - fed_at
+            yield results
+
+    async def async_receive(self,
+                            chunks: typing.AsyncIterator[bytes],
+                            parser: ResultsStreamParser) -> typing.AsyncIterator[typing.List[typing.Dict]]:
+        """ The asynchronous version of `receive`. """
+        while True:
+            received_at = time.perf_counter()
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                self.network_time += time.perf_counter() - received_at
+                return
+            fed_at = time.perf_counter()
+            self.network_time += fed_at - received_at
+            self.response_bytes += len(chunk)
+            results = parser.feed(chunk)
+            self.decode_time += time.perf_counter() - fed_at
+            yield results
+
+    def metrics(self, error: Optional[BaseException] = None) -> RequestMetrics:
+        return RequestMetrics(method=self.method,
+                              endpoint=self.endpoint,
+                              status=self.status,
+                              error=type(error).__name__ if error is not None else None,
+                              attempts=self.attempts,
+                              queue_ms=self.queue_time * 1_000,
+                              network_ms=self.network_time * 1_000,
+                              decode_ms=self.decode_time * 1_000,
+                              request_bytes=self.request_bytes,
+                              response_bytes=self.response_bytes,
+                              total_ms=(time.perf_counter() - self.started_at) * 1_000)
+
+
+_current_recorder: "contextvars.ContextVar[Optional[RequestRecorder]]" = \
+    contextvars.ContextVar("notionx_request_recorder", default=None)
+
+
+@contextlib.contextmanager
+def recording(recorder: RequestRecorder) -> typing.Iterator[RequestRecorder]:
+    """ Records the queueing and the attempts of the requests sent in the context into `recorder`. """
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+
+
+@contextlib.contextmanager
+def measure_request(hooks: typing.Sequence[RequestHook],
+                    method: str,
+                    path: str,
+                    request_bytes: int,
+                    record_context: bool = True) -> typing.Iterator[RequestRecorder]:
+    """ Measures the request made in the context and reports its metrics to `hooks` when it is done,
+    whether it succeeded or not. The exceptions raised by a hook propagate to the caller.
+    Unless `record_context` is False, the attempts made in the context are recorded automatically.
+    """
+    recorder = RequestRecorder(method.upper(), endpoint_template(path), request_bytes)
+    error = None
+    try:
+        if record_context:
+            with recording(recorder):
+                yield recorder
+        else:
+            yield recorder
+    except GeneratorExit:  # a streamed request abandoned by its caller
+        raise
+    except BaseException as err:
+        error = err
+        raise
+    finally:
+        metrics = recorder.metrics(error)
+        for hook in hooks:
+            hook(metrics)
+
+
+def record_queue_time(seconds: float) -> None:
+    """ Adds `seconds` spent waiting to be sent to the request of the current context, if it is measured. """
+    recorder = _current_recorder.get()
+    if recorder is not None:
+        recorder.queue_time += seconds
+
+
+def record_attempt(seconds: float, status: Optional[int]) -> None:
+    """ Records an attempt of the request of the current context, if it is measured,
+    which lasted `seconds` and received a response with `status` (None if no response was received).
+    """
+    recorder = _current_recorder.get()
+    if recorder is not None:
+        recorder.attempts += 1
+        recorder.network_time += seconds
+        if status is not None:
+            recorder.status = status
@@ -0,0 +1,220 @@
+""" Helpers for iterating over the results of cursor-based paginated endpoints """
+import asyncio
+import contextvars
+import queue
+import sys
+import threading
+import typing
+from typing import Optional
+
+if sys.version_info >= (3, 9):
+    # Deprecated since version 3.9: collections.abc.Awaitable now supports [].
+    from collections.abc import Awaitable
+else:
+    from typing import Awaitable
+
+__all__ = ["iterate_paginated_api", "async_iterate_paginated_api", "iterate_streamed_api", "async_iterate_streamed_api"]
+
+FetchPage = typing.Callable[[Optional[str]], typing.Dict]
+AsyncFetchPage = typing.Callable[[Optional[str]], Awaitable[typing.Dict]]
+# A streamed page is an iterator over the results of the page and an object whose `envelope` attribute
+# holds the rest of the response once the iterator is exhausted, e.g. a `ResultsStreamParser`
+StreamPage = typing.Callable[[Optional[str]], typing.Tuple[typing.Iterator[typing.Dict], typing.Any]]
+AsyncStreamPage = typing.Callable[[Optional[str]], typing.Tuple[typing.AsyncIterator[typing.Dict], typing.Any]]
+
+
+def _is_paginated(rsp: typing.Dict) -> bool:
+    # Some endpoints (e.g. retrieving a page property) only return a list for certain object types
+    return rsp.get("object") == "list"
+
+
+def _next_cursor(rsp: typing.Dict) -> Optional[str]:
+    """ The cursor of the page following `rsp`, or None if `rsp` is the last page. """
+    if not _is_paginated(rsp) or not rsp.get("has_more"):
+        return None
+    return rsp.get("next_cursor")
+
+
+def _iterate_pages(fetch_page: FetchPage, start_cursor: Optional[str]) -> typing.Iterator[typing.Dict]:
+    cursor = start_cursor
+    while True:
+        rsp = fetch_page(cursor)
+        yield rsp
+        cursor = _next_cursor(rsp)
+        if cursor is None:
+            return
+
+
+def _iterate_pages_with_prefetch(fetch_page: FetchPage,
+                                 start_cursor: Optional[str],
+                                 prefetch: int) -> typing.Iterator[typing.Dict]:
+    """ Pages are requested by a background thread, which runs at most `prefetch` pages ahead of the consumer. """
+    pages: "queue.Queue[typing.Tuple[Optional[typing.Dict], Optional[BaseException]]]" = queue.Queue()
+    slots = threading.Semaphore(prefetch)
+    stopped = threading.Event()
+
+    def produce():
+        cursor = start_cursor
+        try:
+            while True:
+                slots.acquire()
+                if stopped.is_set():
+                    return
+                rsp = fetch_page(cursor)
+                pages.put((rsp, None))
+                cursor = _next_cursor(rsp)
+                if cursor is None:
+                    return
+        except BaseException as err:  # noqa, the error is re-raised in the consumer
+            pages.put((None, err))
+
+    producer = threading.Thread(target=contextvars.copy_context().run, args=(produce,),
+                                name="notionx-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            rsp, err = pages.get()
+            if err is not None:
+                raise err
+            slots.release()  # the consumer took a page, let the producer request one more
+            yield rsp
+            if _next_cursor(rsp) is None:
+                return
+    finally:
+        stopped.set()
+        slots.release()  # wake the producer up if it is waiting for a slot
+
+
+async def _async_iterate_pages(fetch_page: AsyncFetchPage,
+                               start_cursor: Optional[str]) -> typing.AsyncIterator[typing.Dict]:
+    cursor = start_cursor
+    while True:
+        rsp = await fetch_page(cursor)
+        yield rsp
+        cursor = _next_cursor(rsp)
+        if cursor is None:
+            return
+
+
+async def _async_iterate_pages_with_prefetch(fetch_page: AsyncFetchPage,
+                                             start_cursor: Optional[str],
+                                             prefetch: int) -> typing.AsyncIterator[typing.Dict]:
+    """ Pages are requested by a background task, which runs at most `prefetch` pages ahead of the consumer. """
+    pages: "asyncio.Queue[typing.Tuple[Optional[typing.Dict], Optional[BaseException]]]" = asyncio.Queue()
+    slots = asyncio.Semaphore(prefetch)
+
+    async def produce():
+        cursor = start_cursor
+        try:
+            while True:
+                await slots.acquire()
+                rsp = await fetch_page(cursor)
+                pages.put_nowait((rsp, None))
+                cursor = _next_cursor(rsp)
+                if cursor is None:
+                    return
+        except asyncio.CancelledError:
+            raise
+        except BaseException as err:  # noqa, the error is re-raised in the consumer
+            pages.put_nowait((None, err))
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            rsp, err = await pages.get()
+            if err is not None:
+                raise err
+            slots.release()  # the consumer took a page, let the producer request one more
+            yield rsp
+            if _next_cursor(rsp) is None:
+                return
+    finally:
+        producer.cancel()
+
+
+def iterate_paginated_api(fetch_page: FetchPage,
+                          start_cursor: Optional[str] = None,
+                          prefetch: int = 0) -> typing.Iterator[typing.Dict]:
+    """ Yields the results of a paginated endpoint one by one.
+    `fetch_page` is called with the cursor of the page to request (None for the first page).
+
+    Without prefetching, the next page is only requested once the results of the current one have been consumed.
+    With `prefetch` > 0, the following pages are requested in a background thread while the current one is
+    being consumed, keeping at most `prefetch` pages ahead of the consumer.
+    A response which is not a list is yielded as a single result.
+    """
+    if prefetch > 0:
+        pages = _iterate_pages_with_prefetch(fetch_page, start_cursor, prefetch)
+    else:
+        pages = _iterate_pages(fetch_page, start_cursor)
+
+    try:
+        for rsp in pages:
+            if not _is_paginated(rsp):
+                yield rsp
+                return
+            yield from rsp["results"]
+    finally:
+        # Closing the inner generator right away stops the prefetching thread
+        pages.close()
+
+
+async def async_iterate_paginated_api(fetch_page: AsyncFetchPage,
+                                      start_cursor: Optional[str] = None,
+                                      prefetch: int = 0) -> typing.AsyncIterator[typing.Dict]:
+    """ The asynchronous version of `iterate_paginated_api`, to be used with `async for`.
+    With `prefetch` > 0, the following pages are requested by a background task.
+    """
+    if prefetch > 0:
+        pages = _async_iterate_pages_with_prefetch(fetch_page, start_cursor, prefetch)
+    else:
+        pages = _async_iterate_pages(fetch_page, start_cursor)
+
+    try:
+        async for rsp in pages:
+            if not _is_paginated(rsp):
+                yield rsp
+                return
+            for result in rsp["results"]:
+                yield result
+    finally:
+        # Closing the inner generator right away cancels the prefetching task
+        await pages.aclose()
+
+
+def iterate_streamed_api(stream_page: StreamPage,
+                         start_cursor: Optional[str] = None) -> typing.Iterator[typing.Dict]:
+    """ Yields the results of a paginated endpoint one by one, as soon as they are received.
+    `stream_page` is called with the cursor of the page to request (None for the first page),
+    the next page being requested once the results of the current one have been consumed.
+    """
+    cursor = start_cursor
+    while True:
+        results, page = stream_page(cursor)
+        yield from results
+        if not _is_paginated(page.envelope):
+            yield page.envelope
+            return
+        cursor = _next_cursor(page.envelope)
+        if cursor is None:
+            return
+
+
+async def async_iterate_streamed_api(stream_page: AsyncStreamPage,
+                                     start_cursor: Optional[str] = None) -> typing.AsyncIterator[typing.Dict]:
+    """ The asynchronous version of `iterate_streamed_api`, to be used with `async for`. """
+    cursor = start_cursor
+    while True:
+        results, page = stream_page(cursor)
+        try:
+            async for result in results:
+                yield result
+        finally:
+            # Closing the results right away releases the connection if the iteration stops early
+            await results.aclose()
+        if not _is_paginated(page.envelope):
+            yield page.envelope
+            return
+        cursor = _next_cursor(page.envelope)
+        if cursor is None:
+            return
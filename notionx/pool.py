@@ -0,0 +1,264 @@
+""" Pools of clients spreading the requests over several integration tokens """
+import collections
+import dataclasses
+import functools
+import threading
+import time
+import typing
+from typing import Optional, Union
+
+from notionx.api_endpoints import PagesEndpoint, BlocksEndpoint, DatabasesEndpoint, UsersEndpoint, \
+    CommentsEndpoint, SearchEndpoint
+from notionx.bulk import map_concurrently, async_map_concurrently, fetch_block_tree, async_fetch_block_tree, \
+    append_block_tree, async_append_block_tree
+from notionx.client import Client, AsyncClient, ClientOptions
+from notionx.pagination import iterate_paginated_api, async_iterate_paginated_api, iterate_streamed_api, \
+    async_iterate_streamed_api
+from notionx.retry import is_read_only
+from notionx.streaming import ResultsStreamParser
+from notionx.utils import path_object_ids
+
+__all__ = ["ClientPool", "AsyncClientPool"]
+
+# The maximum number of objects remembered by the write stickiness
+_MAX_STICKY_OBJECTS = 10_000
+
+
+class ClientPool:
+    """ A pool of clients, one per integration token (`ClientOptions`), exposing the same endpoints as `Client`.
+    Each client keeps its own rate limiter and options, so the pool can send as many requests as all of them.
+
+    Every request is sent by the least loaded client, i.e. the one with the fewest requests in flight,
+    skipping the clients whose circuit breaker is open.
+    A client writing an object (e.g. `pages.update`) also serves the requests about this object for
+    the next `sticky_ms` milliseconds, so that the reads following a write see it.
+    The pages of an iteration, and the requests of `blocks.fetch_tree` and `blocks.children.append_in_batches`,
+    are all sent by the client of their first request.
+
+    The bulk methods send up to the sum of the `bulk_concurrency` of the clients at a time,
+    the other options of the endpoints (pagination, validation...) are the ones of the first client.
+    """
+    _client_cls = Client
+    _iterate_paginated_api = staticmethod(iterate_paginated_api)
+    _iterate_streamed_api = staticmethod(iterate_streamed_api)
+    _map_concurrently = staticmethod(map_concurrently)
+    _fetch_block_tree = staticmethod(fetch_block_tree)
+    _append_block_tree = staticmethod(append_block_tree)
+
+    def __init__(self,
+                 options: typing.Sequence[Union[ClientOptions, typing.Dict]],
+                 sticky_ms: int = 60_000):
+        if not options:
+            raise ValueError("A client pool requires the options of at least one client.")
+        self.clients: typing.List[Client] = [self._client_cls(client_options) for client_options in options]
+        self.options = dataclasses.replace(self.clients[0].options,
+                                           bulk_concurrency=sum(client.options.bulk_concurrency
+                                                                for client in self.clients))
+        self.sticky_ms = sticky_ms
+        self.concurrency_limit = None
+        self._json_codec = self.clients[0]._json_codec
+        self._in_flight = [0] * len(self.clients)
+        self._next_index = 0
+        self._sticky: "collections.OrderedDict[str, typing.Tuple[int, float]]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        self.pages = PagesEndpoint(self)
+        self.blocks = BlocksEndpoint(self)
+        self.databases = DatabasesEndpoint(self)
+        self.users = UsersEndpoint(self)
+        self.comments = CommentsEndpoint(self)
+        self.search = SearchEndpoint(self)
+
+    def _acquire(self, path: str, pin: Optional["_PinnedPool"] = None) -> int:
+        """ Picks the client sending a request to `path` and counts the request in its load.
+        The requests made through a `pin` are all sent by the client picked for the first one.
+        """
+        now = time.monotonic()
+        with self._lock:
+            index = pin.index if pin is not None else None
+            if index is None:
+                for object_id in path_object_ids(path):
+                    sticky = self._sticky.get(object_id)
+                    if sticky is not None and sticky[1] > now:
+                        index = sticky[0]
+                        break
+            if index is None:
+                available = [i for i, client in enumerate(self.clients)
+                             if client.circuit_breaker is None or client.circuit_breaker.state != "open"]
+                # the clients are scanned from a rotating start, so that the ties are broken round-robin
+                count = len(self.clients)
+                order = [(self._next_index + offset) % count for offset in range(count)]
+                index = min((i for i in order if i in available), key=lambda i: self._in_flight[i], default=order[0])
+                self._next_index = (index + 1) % count
+            if pin is not None:
+                pin.index = index
+            self._in_flight[index] += 1
+            return index
+
+    def _release(self, index: int, method: str, path: str, succeeded: bool) -> None:
+        with self._lock:
+            self._in_flight[index] -= 1
+            if succeeded and self.sticky_ms > 0 and not is_read_only(method, path):
+                expires_at = time.monotonic() + self.sticky_ms / 1_000
+                for object_id in path_object_ids(path):
+                    self._sticky[object_id] = (index, expires_at)
+                    self._sticky.move_to_end(object_id)
+                while len(self._sticky) > _MAX_STICKY_OBJECTS:
+                    self._sticky.popitem(last=False)
+
+    @property
+    def in_flight(self) -> typing.List[int]:
+        """ The number of requests in flight of every client. """
+        return list(self._in_flight)
+
+    def _pinned(self) -> "_PinnedPool":
+        return _PinnedPool(self)
+
+    def request(self,
+                method: str,
+                path: str,
+                query: Optional[dict] = None,
+                body: Optional[dict] = None,
+                pin: Optional["_PinnedPool"] = None):
+        index = self._acquire(path, pin)
+        succeeded = False
+        try:
+            rsp = self.clients[index].request(method, path, query, body)
+            succeeded = True
+            return rsp
+        finally:
+            self._release(index, method, path, succeeded)
+
+    def _stream_results(self,
+                        method: str,
+                        path: str,
+                        query: Optional[dict],
+                        body: Optional[dict],
+                        parser: ResultsStreamParser,
+                        pin: Optional["_PinnedPool"] = None) -> typing.Iterator[typing.Dict]:
+        index = self._acquire(path, pin)
+        succeeded = False
+        try:
+            yield from self.clients[index]._stream_results(method, path, query, body, parser)
+            succeeded = True
+        finally:
+            self._release(index, method, path, succeeded)
+
+    def close(self) -> None:
+        """ Closes the connections of all the clients. """
+        for client in self.clients:
+            client.close()
+
+    def __enter__(self):
+        for client in self.clients:
+            client.prewarm()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # Specific Request Methods
+    get = functools.partialmethod(request, "get")
+    post = functools.partialmethod(request, "post")
+    patch = functools.partialmethod(request, "patch")
+    delete = functools.partialmethod(request, "delete")
+
+
+class AsyncClientPool(ClientPool):
+    """ The asynchronous version of `ClientPool`, made of `AsyncClient`s. """
+    _client_cls = AsyncClient
+    _iterate_paginated_api = staticmethod(async_iterate_paginated_api)
+    _iterate_streamed_api = staticmethod(async_iterate_streamed_api)
+    _map_concurrently = staticmethod(async_map_concurrently)
+    _fetch_block_tree = staticmethod(async_fetch_block_tree)
+    _append_block_tree = staticmethod(async_append_block_tree)
+
+    async def request(self,
+                      method: str,
+                      path: str,
+                      query: Optional[dict] = None,
+                      body: Optional[dict] = None,
+                      pin: Optional["_PinnedPool"] = None):
+        index = self._acquire(path, pin)
+        succeeded = False
+        try:
+            rsp = await self.clients[index].request(method, path, query, body)
+            succeeded = True
+            return rsp
+        finally:
+            self._release(index, method, path, succeeded)
+
+    async def _stream_results(self,
+                              method: str,
+                              path: str,
+                              query: Optional[dict],
+                              body: Optional[dict],
+                              parser: ResultsStreamParser,
+                              pin: Optional["_PinnedPool"] = None) -> typing.AsyncIterator[typing.Dict]:
+        index = self._acquire(path, pin)
+        succeeded = False
+        try:
+            async for result in self.clients[index]._stream_results(method, path, query, body, parser):
+                yield result
+            succeeded = True
+        finally:
+            self._release(index, method, path, succeeded)
+
+    async def close(self) -> None:
+        for client in self.clients:
+            await client.close()
+
+    def __enter__(self):
+        raise TypeError("An AsyncClientPool must be used with `async with`.")
+
+    async def __aenter__(self):
+        for client in self.clients:
+            await client.prewarm()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    # Specific Request Methods
+    get = functools.partialmethod(request, "get")
+    post = functools.partialmethod(request, "post")
+    patch = functools.partialmethod(request, "patch")
+    delete = functools.partialmethod(request, "delete")
+
+
+class _PinnedPool:
+    """ Stands in for a pool during an operation made of several dependent requests (see `Client._pinned`),
+    so that they are all sent by the client of the first one: the cursors and the new blocks returned to
+    an integration are not meant to be used by another one.
+    """
+
+    def __init__(self, pool: ClientPool):
+        self._pool = pool
+        self.index: Optional[int] = None
+
+    def __getattr__(self, name: str):
+        return getattr(self._pool, name)
+
+    def _pinned(self) -> "_PinnedPool":
+        return self
+
+    def request(self,
+                method: str,
+                path: str,
+                query: Optional[dict] = None,
+                body: Optional[dict] = None):
+        return self._pool.request(method, path, query, body, pin=self)
+
+    def _stream_results(self,
+                        method: str,
+                        path: str,
+                        query: Optional[dict],
+                        body: Optional[dict],
+                        parser: ResultsStreamParser):
+        return self._pool._stream_results(method, path, query, body, parser, pin=self)
+
+    # Specific Request Methods
+    get = functools.partialmethod(request, "get")
+    post = functools.partialmethod(request, "post")
+    patch = functools.partialmethod(request, "patch")
+    delete = functools.partialmethod(request, "delete")
@@ -0,0 +1,132 @@
+""" Client-side rate limiting """
+import asyncio
+import os
+import struct
+import threading
+import time
+import typing
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+__all__ = ["TokenBucket", "FileTokenBucket"]
+
+# The state of a shared bucket: its tokens and the time they were last refilled
+_FILE_STATE = struct.Struct("<dd")
+
+
+class TokenBucket:
+    """ A thread-safe token bucket used to pace the requests sent by a client.
+    Tokens are refilled continuously at `rate` tokens per second and at most `burst` tokens can be saved up.
+    Every request consumes one token; if the bucket is empty, the caller waits until its token is due.
+
+    Waiting callers reserve their tokens in order, so a bucket shared by many threads or coroutines
+    keeps the overall throughput at `rate` instead of waking everyone up at the same time.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("The `rate` of a token bucket must be positive.")
+        if burst < 1:
+            raise ValueError("The `burst` of a token bucket must be at least 1.")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _take(self, max_delay: Optional[float]) -> Optional[float]:
+        """ Take one token from the refilled bucket, unless it would be due in more than `max_delay` seconds. """
+        delay = max(0.0, -(self._tokens - 1) / self.rate)
+        if max_delay is not None and delay > max_delay:
+            return None
+        self._tokens -= 1
+        return delay
+
+    def _reserve(self, max_delay: Optional[float] = None) -> Optional[float]:
+        """ Take one token and return the number of seconds to wait before it may be used,
+        or None without taking it if that would be more than `max_delay` seconds.
+        The bucket is allowed to go into debt, which is how waiting callers are queued.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._take(max_delay)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """ Take one token, blocking the current thread until it is available.
+        Returns False at once if the token would not be available within `timeout` seconds.
+        """
+        delay = self._reserve(timeout)
+        if delay is None:
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    async def async_acquire(self, timeout: Optional[float] = None) -> bool:
+        """ Take one token, suspending the current coroutine until it is available. """
+        delay = self._reserve(timeout)
+        if delay is None:
+            return False
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return True
+
+    def close(self) -> None:
+        """ Nothing to release, the state of the bucket is kept in memory. """
+
+
+class FileTokenBucket(TokenBucket):
+    """ A token bucket whose state is stored in the file at `path`, so that it is shared by all the processes
+    of the host using the same file, e.g. the workers of a same integration token.
+    The file is locked with `flock` while a token is taken, which requires a POSIX system.
+
+    All the processes should use the same `rate` and `burst`, each one refilling the bucket with its own values.
+    """
+
+    def __init__(self, path: typing.Union[str, "os.PathLike[str]"], rate: float, burst: int = 1):
+        if fcntl is None:
+            raise OSError("A `FileTokenBucket` requires `fcntl.flock`, which is not available on this system.")
+        super().__init__(rate, burst)
+        self.path = os.fspath(path)
+        self._fd: Optional[int] = None
+        self._pid: Optional[int] = None
+
+    def _open(self) -> int:
+        # flock locks are shared by the descriptors inherited through a fork, each process opens its own one
+        if self._fd is None or self._pid != os.getpid():
+            self._fd, self._pid = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644), os.getpid()
+        return self._fd
+
+    def _reserve(self, max_delay: Optional[float] = None) -> Optional[float]:
+        with self._lock:
+            fd = self._open()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                state = os.pread(fd, _FILE_STATE.size, 0)
+                now = time.time()  # the wall clock is the one shared by the processes
+                if len(state) == _FILE_STATE.size:
+                    self._tokens, self._updated_at = _FILE_STATE.unpack(state)
+                    now = max(now, self._updated_at)
+                else:  # a new bucket
+                    self._tokens, self._updated_at = float(self.burst), now
+                self._refill(now)
+                delay = self._take(max_delay)
+                os.pwrite(fd, _FILE_STATE.pack(self._tokens, self._updated_at), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            return delay
+
+    def close(self) -> None:
+        """ Closes the file of the bucket, it is opened again by the next `acquire`. """
+        with self._lock:
+            if self._fd is not None and self._pid == os.getpid():
+                os.close(self._fd)
+            self._fd = None
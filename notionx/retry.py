@@ -0,0 +1,103 @@
+""" Retrying requests that failed because of transient Notion errors """
+import email.utils
+import random
+import time
+from typing import Optional
+
+from notionx.errors import RateLimitedError, InternalServerError, ServiceUnavailableError, \
+    DatabaseConnectionUnavailableError, GatewayTimeoutError
+
+__all__ = ["RetryPolicy", "parse_retry_after", "is_read_only"]
+
+# Errors that are worth retrying, the request is likely to succeed if it is sent again later.
+RETRYABLE_ERRORS = (
+    RateLimitedError,
+    InternalServerError,
+    ServiceUnavailableError,
+    DatabaseConnectionUnavailableError,
+    GatewayTimeoutError,
+)
+
+# Requests that can be sent twice without changing anything on the Notion side:
+# the read-only requests (see `is_read_only`) and the writes of these methods.
+_IDEMPOTENT_WRITE_METHODS = frozenset(("delete",))
+# `databases/{id}/query` and `search` are read-only even though they are POST requests
+_READ_ONLY_POST_PATH_SUFFIXES = ("/query", "search")
+
+
+def is_read_only(method: str, path: str) -> bool:
+    """ Whether a request only reads data, i.e. a GET request, a database query or a search. """
+    method = method.lower()
+    return method == "get" or (method == "post" and path.rstrip("/").endswith(_READ_ONLY_POST_PATH_SUFFIXES))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """ Parse the value of a `Retry-After` header, which is either a number of seconds or an HTTP date.
+    Returns the number of seconds to wait, or None if the value is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """ Decides whether and when a failed request is sent again.
+
+    - `RateLimitedError` is always retried, since Notion rejected the request without processing it.
+    - Server errors are only retried for requests that are safe to send twice,
+      i.e. GET and DELETE requests, database queries and searches.
+    - The delay honors the `Retry-After` header when Notion sends one,
+      otherwise it is an exponential backoff with full jitter.
+    - No retry is scheduled once `max_retries` is reached or the delay would exceed the total time budget.
+    """
+
+    def __init__(self,
+                 max_retries: int = 0,
+                 backoff_ms: int = 500,
+                 max_backoff_ms: int = 30_000,
+                 max_elapsed_ms: Optional[int] = 120_000):
+        if max_retries < 0:
+            raise ValueError("`max_retries` cannot be negative.")
+        self.max_retries = max_retries
+        self.backoff = backoff_ms / 1_000
+        self.max_backoff = max_backoff_ms / 1_000
+        self.max_elapsed = max_elapsed_ms / 1_000 if max_elapsed_ms is not None else None
+
+    @staticmethod
+    def is_retryable(method: str, path: str, err: Exception) -> bool:
+        if isinstance(err, RateLimitedError):
+            return True
+        if not isinstance(err, RETRYABLE_ERRORS):
+            return False
+        return method.lower() in _IDEMPOTENT_WRITE_METHODS or is_read_only(method, path)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """ The jittered delay before the retry following the `attempt`-th failure (starting from 0). """
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def next_delay(self,
+                   method: str,
+                   path: str,
+                   err: Exception,
+                   attempt: int,
+                   elapsed: float,
+                   retry_after: Optional[float] = None) -> Optional[float]:
+        """ Returns the number of seconds to wait before retrying, or None if the error should be raised. """
+        if attempt >= self.max_retries or not self.is_retryable(method, path, err):
+            return None
+        delay = self.backoff_delay(attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if self.max_elapsed is not None and elapsed + delay > self.max_elapsed:
+            return None
+        return delay
@@ -0,0 +1,98 @@
+""" Scheduling of the requests of an `AsyncClient` by priority """
+import asyncio
+import collections
+import contextlib
+import contextvars
+import typing
+from typing import Optional
+
+from notionx.rate_limit import TokenBucket
+
+__all__ = ["LANES", "priority", "current_priority", "PriorityScheduler"]
+
+# The priority lanes, from the highest priority to the lowest one
+LANES = ("interactive", "default", "bulk")
+
+_current_priority: "contextvars.ContextVar[Optional[str]]" = contextvars.ContextVar("notionx_priority", default=None)
+
+
+def _check_lane(lane: str) -> None:
+    if lane not in LANES:
+        raise ValueError(f"Unknown priority lane `{lane}`, expected one of {list(LANES)}.")
+
+
+@contextlib.contextmanager
+def priority(lane: str) -> typing.Iterator[None]:
+    """ Sends the requests made in the context (including by the tasks it creates) in the priority lane `lane`,
+    e.g. `with priority("bulk"): await client.pages.create_many(...)`.
+    """
+    _check_lane(lane)
+    token = _current_priority.set(lane)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Optional[str]:
+    """ The priority lane set by the innermost `priority` context, None outside of one. """
+    return _current_priority.get()
+
+
+class PriorityScheduler:
+    """ Hands out the tokens of `rate_limiter` to the requests waiting for them by priority lane,
+    instead of first come, first served. The requests of a lane are served in order.
+
+    A lower lane is guaranteed `min_share` of the tokens while it has requests waiting: each token handed out to
+    a higher lane earns it `min_share` of a credit, and a lane with a whole credit is served first.
+    """
+
+    def __init__(self, rate_limiter: TokenBucket, min_share: float = 0.1):
+        if not 0 <= min_share <= 1 / (len(LANES) - 1):
+            raise ValueError(f"The `min_share` of a priority scheduler must be between 0 and {1 / (len(LANES) - 1)}.")
+        self.rate_limiter = rate_limiter
+        self.min_share = min_share
+        self._queues: typing.Dict[str, typing.Deque[asyncio.Future]] = {lane: collections.deque() for lane in LANES}
+        self._credits = {lane: 0.0 for lane in LANES[1:]}
+        self._dispatcher: Optional[asyncio.Future] = None
+
+    def waiting(self, lane: str) -> int:
+        """ The number of requests of `lane` waiting for a token. """
+        return sum(1 for waiter in self._queues[lane] if not waiter.done())
+
+    async def acquire(self, lane: str = "default") -> None:
+        """ Waits until a token of the rate limiter is handed out to this request of `lane`. """
+        _check_lane(lane)
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[lane].append(waiter)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        await waiter
+
+    async def _dispatch(self) -> None:
+        while any(self._queues.values()):
+            await self.rate_limiter.async_acquire()
+            waiter = self._next_waiter()
+            if waiter is not None:
+                waiter.set_result(None)
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        for queue in self._queues.values():
+            while queue and queue[0].done():  # cancelled
+                queue.popleft()
+        for lane in self._credits:
+            if not self._queues[lane]:
+                self._credits[lane] = 0.0
+
+        for lane in reversed(LANES[1:]):
+            if self._credits[lane] >= 1 - 1e-9:  # tolerates the rounding errors of the sum of the shares
+                self._credits[lane] -= 1
+                return self._queues[lane].popleft()
+        served = next((index for index, lane in enumerate(LANES) if self._queues[lane]), None)
+        if served is None:
+            return None
+        # The lower lanes waiting earn credits for the tokens handed out to a higher lane
+        for lane in LANES[served + 1:]:
+            if self._queues[lane]:
+                self._credits[lane] += self.min_share
+        return self._queues[LANES[served]].popleft()
@@ -0,0 +1,104 @@
+""" Coalescing of identical concurrent requests """
+import asyncio
+import sys
+import threading
+import typing
+
+if sys.version_info >= (3, 9):
+    # Deprecated since version 3.9: collections.abc.Awaitable now supports [].
+    from collections.abc import Awaitable
+else:
+    from typing import Awaitable
+
+from notionx.deadline import remaining
+from notionx.errors import DeadlineExceededError
+
+__all__ = ["SingleFlight", "AsyncSingleFlight"]
+
+T = typing.TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: typing.Optional[BaseException] = None
+
+
+class SingleFlight:
+    """ Makes the threads calling `do` with the same key at the same time share a single call.
+    The first caller of a key runs the function, the others wait for it and get the same result (or error).
+    The result is shared as is, so it must not be modified by the callers.
+    A caller waiting for the call of another one gives up with a `DeadlineExceededError` at its own deadline.
+    The call runs within the deadline of the caller running it: when that deadline passes, the other callers
+    make the call again rather than failing with the `DeadlineExceededError` of another caller.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: typing.Dict[typing.Hashable, _Call] = {}
+
+    def do(self, key: typing.Hashable, func: typing.Callable[[], T]) -> T:
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                is_leader = call is None
+                if is_leader:
+                    call = self._calls[key] = _Call()
+            if is_leader:
+                break
+
+            if not call.done.wait(remaining()):
+                raise DeadlineExceededError("The identical request in flight did not complete before the deadline.")
+            if isinstance(call.error, DeadlineExceededError):  # the deadline of the caller running it
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """ The asynchronous version of `SingleFlight`, for coroutines of the same event loop.
+    The shared call runs in its own task, so cancelling one of the callers does not cancel it for the others.
+    Like in `SingleFlight`, the task runs within the deadline of the caller starting it, and the other callers
+    make the call again when that deadline passes.
+    """
+
+    def __init__(self):
+        self._calls: typing.Dict[typing.Hashable, asyncio.Future] = {}
+
+    async def do(self, key: typing.Hashable, func: typing.Callable[[], Awaitable[T]]) -> T:
+        while True:
+            task = self._calls.get(key)
+            is_leader = task is None
+            if is_leader:
+                task = asyncio.ensure_future(func())  # the task copies the context, and so the deadline, of the leader
+                self._calls[key] = task
+                task.add_done_callback(lambda _, task=task: self._forget(key, task))
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), remaining())
+            except DeadlineExceededError:
+                if is_leader:
+                    raise
+            except asyncio.TimeoutError:
+                if task.done():  # raised by the shared call itself
+                    raise
+                raise DeadlineExceededError("The identical request in flight did not complete before the deadline.") \
+                    from None
+
+    def _forget(self, key: typing.Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
@@ -0,0 +1,123 @@
+""" Incremental parsing of list responses, yielding the results while the response is being received """
+import functools
+import re
+import typing
+from typing import Optional
+
+from notionx.codec import JSONCodec
+
+__all__ = ["ResultsStreamParser", "StreamingClientView"]
+
+# The tokens changing the nesting depth, strings are matched as a whole so that their content is skipped
+_TOKEN = re.compile(rb'["{}\[\]]')
+_STRING_REST = re.compile(rb'(?:[^"\\]|\\.)*"', re.DOTALL)
+
+
+class ResultsStreamParser:
+    """ An incremental parser of the JSON object of a list response, fed with the chunks of the body.
+    Each object of the top-level `results` array is decoded as soon as its last byte is received,
+    so that only the current result is buffered instead of the whole page.
+    The other fields of the response (`next_cursor`, `has_more`...) are collected in `envelope`,
+    with an empty `results` list, once the parser is closed.
+    A response without `results` ends up in `envelope` as a whole.
+    """
+
+    def __init__(self, codec: JSONCodec):
+        self._codec = codec
+        self._buffer = bytearray()
+        self._envelope = bytearray()
+        self._pos = 0  # where to resume scanning in the buffer
+        self._mark: Optional[int] = 0  # the start of the bytes to be copied to the envelope, None inside `results`
+        self._result_start: Optional[int] = None
+        self._depth = 0
+        self._last_key = b""
+        self.envelope: Optional[typing.Dict] = None
+
+    def feed(self, chunk: bytes) -> typing.List[typing.Dict]:
+        """ Consumes a chunk of the body and returns the results completed by it. """
+        self._buffer += chunk
+        buffer = self._buffer
+        results = []
+        pos, depth = self._pos, self._depth
+        while True:
+            m = _TOKEN.search(buffer, pos)
+            if m is None:
+                pos = len(buffer)
+                break
+            token, start = m.group(), m.start()
+            if token == b'"':
+                string_end = _STRING_REST.match(buffer, start + 1)
+                if string_end is None:  # the string continues in the next chunk
+                    pos = start
+                    break
+                if depth == 1:
+                    self._last_key = bytes(buffer[start + 1:string_end.end() - 1])
+                pos = string_end.end()
+                continue
+
+            pos = start + 1
+            if token in b"{[":
+                depth += 1
+                if self._mark is None:
+                    if depth == 3 and self._result_start is None:
+                        self._result_start = start
+                elif depth == 2 and token == b"[" and self._last_key == b"results":
+                    # Entering the results, the array is left empty in the envelope
+                    self._envelope += buffer[self._mark:pos]
+                    self._mark = None
+            else:
+                depth -= 1
+                if self._mark is None:
+                    if depth == 2 and self._result_start is not None:
+                        results.append(self._codec.loads(bytes(buffer[self._result_start:pos])))
+                        self._result_start = None
+                    elif depth == 1:
+                        self._mark = start
+
+        # Drop the bytes that are no longer needed
+        if self._mark is not None:
+            self._envelope += buffer[self._mark:pos]
+            self._mark = 0
+            keep_from = pos
+        elif self._result_start is not None:
+            keep_from = self._result_start
+            self._result_start = 0
+        else:
+            keep_from = pos
+        del buffer[:keep_from]
+        self._pos, self._depth = pos - keep_from, depth
+        return results
+
+    def close(self) -> typing.Dict:
+        """ Checks that the whole body has been fed, and decodes the fields of the response other than the results. """
+        if self._mark is None or self._depth != 0:
+            raise ValueError("The response body is incomplete.")
+        self._envelope += self._buffer
+        self._buffer.clear()
+        self.envelope = self._codec.loads(bytes(self._envelope))
+        return self.envelope
+
+
+class StreamingClientView:
+    """ Stands in for the client of an endpoint, so that a list method of the endpoint
+    streams the results of its request through `parser` instead of returning the decoded response.
+    """
+
+    def __init__(self, client: typing.Any, parser: ResultsStreamParser):
+        self._client = client
+        self._parser = parser
+        self.options = client.options
+
+    def request(self,
+                method: str,
+                path: str,
+                query: Optional[dict] = None,
+                body: Optional[dict] = None) -> typing.Union[typing.Iterator[typing.Dict],
+                                                             typing.AsyncIterator[typing.Dict]]:
+        return self._client._stream_results(method, path, query, body, self._parser)
+
+    # Specific Request Methods
+    get = functools.partialmethod(request, "get")
+    post = functools.partialmethod(request, "post")
+    patch = functools.partialmethod(request, "patch")
+    delete = functools.partialmethod(request, "delete")
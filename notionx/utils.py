@@ -1,8 +1,11 @@
 import functools
 import inspect
+import re
 import urllib.parse
+from collections.abc import Mapping, Sequence
 
-__all__ = ["organize_kwargs_as_a_dict_param", "iterable", "unquote_params"]
+__all__ = ["organize_kwargs_as_a_dict_param", "iterable", "unquote_params", "is_contained_in", "endpoint_template",
+           "path_object_ids", "query_object_ids"]
 
 import typing
 
@@ -70,3 +73,82 @@ def unquote_params(params: typing.Dict[str, typing.Union[str, typing.List[str]]]
             params[key] = urllib.parse.unquote(value)
         elif iterable(value):
             params[key] = [urllib.parse.unquote(v) for v in value]
+
+
+# The annotations of a rich text object sent without them
+_DEFAULT_ANNOTATIONS = {"bold": False, "italic": False, "strikethrough": False, "underline": False, "code": False,
+                        "color": "default"}
+_RICH_TEXT_TYPES = ("text", "mention", "equation")
+# The fields that Notion resets when the object of these keys, which it replaces in full, is sent without them
+_OBJECT_DEFAULTS = {"date": {"end": None, "time_zone": None}}
+
+
+def _with_rich_text_defaults(value: typing.Any) -> typing.Any:
+    """ Fills the fields that Notion resets when a rich text object is sent without them:
+    the missing annotations are the default ones and a missing link is no link.
+    """
+    if not isinstance(value, dict) or not any(key in value for key in _RICH_TEXT_TYPES):
+        return value
+    value = dict(value, annotations={**_DEFAULT_ANNOTATIONS, **value.get("annotations", {})})
+    if isinstance(value.get("text"), dict):
+        value["text"] = {"link": None, **value["text"]}
+    return value
+
+
+def _with_object_defaults(key: str, value: typing.Any) -> typing.Any:
+    defaults = _OBJECT_DEFAULTS.get(key)
+    if defaults is None or not isinstance(value, dict):
+        return value
+    return {**defaults, **value}
+
+
+def is_contained_in(value: typing.Any, state: typing.Any) -> bool:
+    """ Check if `value` is contained in `state`, e.g. if a request body would not change a known object.
+    - A dict is contained if each of its keys exists in `state` with a contained value,
+      the keys only present in `state` (e.g. `id` or `plain_text` in Notion objects) are ignored,
+      except the fields that Notion resets when they are missing, e.g. the `end` of a `date`, compared as None.
+    - A list is contained if `state` is a list of the same length whose items contain the items of `value`.
+      As Notion replaces the rich text arrays in full, the rich text objects of a list are compared with
+      their missing `annotations` and `link` set to the defaults, e.g. a plain title does not contain a bold one.
+    - Any other value is contained if it is equal to `state`.
+    """
+    if isinstance(value, dict):
+        return isinstance(state, Mapping) and all(
+            key in state and is_contained_in(_with_object_defaults(key, sub_value), state[key])
+            for key, sub_value in value.items()
+        )
+    if isinstance(value, list):
+        return isinstance(state, Sequence) and not isinstance(state, str) and len(value) == len(state) and all(
+            is_contained_in(_with_rich_text_defaults(sub_value), sub_state) for sub_value, sub_state in zip(value, state)
+        )
+    return value == state
+
+
+def _is_object_id_segment(index: int, segment: str) -> bool:
+    # The paths of the API alternate between collections and object ids, e.g. `blocks/{id}/children`,
+    # `users/me` being the only exception
+    return index % 2 == 1 and segment != "me"
+
+
+def endpoint_template(path: str) -> str:
+    """ The template of the endpoint of `path`, e.g. `blocks/{id}/children` for `blocks/b55c9c91/children`.
+    """
+    return "/".join("{id}" if _is_object_id_segment(index, segment) else segment
+                    for index, segment in enumerate(path.strip("/").split("/")))
+
+
+def path_object_ids(path: str) -> typing.List[str]:
+    """ The ids of the objects contained in `path`, normalized without dashes. """
+    return [segment.replace("-", "").lower()
+            for index, segment in enumerate(path.strip("/").split("/")) if _is_object_id_segment(index, segment)]
+
+
+_OBJECT_ID_PATTERN = re.compile(r"[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}", re.IGNORECASE)
+
+
+def query_object_ids(url: str) -> typing.List[str]:
+    """ The ids of the objects given in the query string of `url`, e.g. the `block_id` of `comments?block_id=...`,
+    normalized without dashes.
+    """
+    return [value.replace("-", "").lower() for _, value in urllib.parse.parse_qsl(url.partition("?")[2])
+            if _OBJECT_ID_PATTERN.fullmatch(value)]
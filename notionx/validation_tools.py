@@ -9,7 +9,7 @@ from abc import ABCMeta, abstractmethod
 
 from notionx.errors import LocalValidationError
 
-__all__ = ["DictSubValidator", "OneOf", "validate_dict_parameter"]
+__all__ = ["DictSubValidator", "OneOf", "validate_dict_parameter", "organize_and_validate_dict_parameter"]
 
 
 class DictSubValidator(metaclass=ABCMeta):
@@ -95,3 +95,119 @@ def validate_dict_parameter(dict_param_name: str,
         return wrapper
 
     return decorator
+
+
+# The keyword argument forcing or skipping the validation of a call to a function decorated by
+# `organize_and_validate_dict_parameter`
+_LOCAL_VALIDATION_KWARG = "local_validation"
+
+
+def _compile_dict_validator(dict_param_name: str,
+                            key_scope: typing.Iterable[str],
+                            required_keys: typing.Optional[
+                                typing.Iterable[typing.Union[str, DictSubValidator]]
+                            ] = None) -> typing.Callable[[typing.Any], None]:
+    """ Builds a function running the checks of `validate_dict_parameter` on a dict,
+    with the key scope and the required conditions prepared once for all.
+    """
+    key_scope = frozenset(key_scope)
+    required_conditions = tuple(required_keys or ())
+    for required_cond in required_conditions:
+        if not isinstance(required_cond, (str, DictSubValidator)):
+            raise TypeError(f"Unexpected type of {required_cond}")
+
+    def validate(target_dict_value: typing.Any) -> None:
+        if not isinstance(target_dict_value, dict):
+            raise LocalValidationError(f"The parameter `{dict_param_name}` must be a dict.")
+
+        for required_cond in required_conditions:
+            if required_cond.__class__ is str:
+                if required_cond not in target_dict_value:
+                    raise LocalValidationError(
+                        f"The parameter `{dict_param_name}` is missing the required key `{required_cond}`."
+                    )
+            else:
+                required_cond.validate(target_dict_value)
+
+        if not key_scope.issuperset(target_dict_value):
+            for key in target_dict_value:
+                if key not in key_scope:
+                    raise LocalValidationError(
+                        f"The key `{key}` contained in the parameter `{dict_param_name}` is invalid. "
+                        f"Please remove it."
+                    )
+
+    return validate
+
+
+def organize_and_validate_dict_parameter(dict_param_name: str,
+                                         key_scope: typing.Iterable[str],
+                                         required_keys: typing.Optional[
+                                             typing.Iterable[typing.Union[str, DictSubValidator]]
+                                         ] = None) -> typing.Callable:
+    """ A decorator equivalent to stacking `organize_kwargs_as_a_dict_param(dict_param_name)`
+    on top of `validate_dict_parameter(dict_param_name, key_scope, required_keys)`, used by the endpoints.
+
+    Everything that depends on the signature of the decorated function is computed once at decoration time,
+    so that a call only costs a split of the keyword arguments and the checks of the dict,
+    instead of binding the signature twice.
+    The decorated function can only have positional-or-keyword parameters.
+
+    The keyword argument `local_validation` is reserved: `True` or `False` forces or skips the validation of a call.
+    Otherwise, if the first argument (e.g. the endpoint of a method) has a `_should_validate_locally` method,
+    the validation only runs when it returns True.
+    """
+    validate = _compile_dict_validator(dict_param_name, key_scope, required_keys)
+
+    def decorator(func: typing.Callable) -> typing.Callable:
+        sig = inspect.signature(func)
+        if dict_param_name not in sig.parameters:
+            raise TypeError(f"The decorated function must have the `{dict_param_name}` parameter.")
+        if _LOCAL_VALIDATION_KWARG in sig.parameters:
+            raise TypeError(f"The parameter name `{_LOCAL_VALIDATION_KWARG}` is reserved.")
+
+        for name, param in sig.parameters.items():
+            if name == dict_param_name and param.default is param.empty:
+                raise TypeError(f"The parameter `{dict_param_name}` need to have a default value.")
+            if param.kind == param.VAR_KEYWORD:
+                raise TypeError(f"The decorated function cannot have the **{name} parameter.")
+            if param.kind != param.POSITIONAL_OR_KEYWORD:
+                raise TypeError(f"The parameter `{name}` of the decorated function must be a positional-or-keyword "
+                                f"parameter.")
+
+        param_names = frozenset(sig.parameters)
+        dict_param_index = list(sig.parameters).index(dict_param_name)
+        dict_param_default = sig.parameters[dict_param_name].default
+
+        @functools.wraps(func)
+        def wrapper(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+            # Split the keyword arguments into the real parameters and the ones forming the dict
+            local_validation = kwargs.pop(_LOCAL_VALIDATION_KWARG, None) if kwargs else None
+            if local_validation is None and args:
+                should_validate_locally = getattr(args[0], "_should_validate_locally", None)
+                local_validation = should_validate_locally is None or should_validate_locally()
+
+            kwargs_to_form_dict = {}
+            if kwargs and not param_names.issuperset(kwargs):
+                for key in [k for k in kwargs if k not in param_names]:
+                    kwargs_to_form_dict[key] = kwargs.pop(key)
+
+            if len(args) > dict_param_index:
+                dict_param_value = args[dict_param_index]
+                if dict_param_value is None:
+                    dict_param_value = kwargs_to_form_dict
+                    args = args[:dict_param_index] + (dict_param_value,) + args[dict_param_index + 1:]
+            else:
+                dict_param_value = kwargs.get(dict_param_name, dict_param_default)
+                if dict_param_value is None:
+                    # The user does not specify the parameter specified by dict_param_name
+                    dict_param_value = kwargs_to_form_dict
+                kwargs[dict_param_name] = dict_param_value
+
+            if local_validation is not False:
+                validate(dict_param_value)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -15,11 +15,17 @@ setup(
     description="NotionX, a simple, easy-to-use Notion client, is based on the official SDK modification",
     long_description=get_description(),
     long_description_content_type="text/markdown",
-    packages=find_packages(exclude=("*examples", "*examples.*")),
+    packages=find_packages(exclude=("*examples", "*examples.*", "benchmarks", "benchmarks.*")),
     python_requires=">=3.7, <4",
     install_requires=[
         "httpx >= 0.23.0",
     ],
+    extras_require={
+        "orjson": ["orjson >= 3.0.0"],
+        "ujson": ["ujson >= 5.0.0"],
+        "simdjson": ["pysimdjson >= 5.0.0"],
+        "http2": ["httpx[http2]"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
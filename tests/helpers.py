@@ -1,5 +1,8 @@
 import contextlib
 import os
+import typing
+
+import httpx
 
 from notionx import Client
 from tests.constants import NOTION_AUTH_TOKEN_KEY, NOTION_BASE_PAGE_ID_KEY
@@ -39,3 +42,14 @@ def keep_notion_environment_variables():
         if os.getenv(NOTION_AUTH_TOKEN_KEY) is None or os.getenv(NOTION_BASE_PAGE_ID_KEY) is None:
             os.environ[NOTION_AUTH_TOKEN_KEY] = auth_token
             os.environ[NOTION_BASE_PAGE_ID_KEY] = base_page_id
+
+
+def get_mocked_client(handler: typing.Callable[[httpx.Request], httpx.Response],
+                      client_cls: typing.Type[Client] = Client,
+                      **options: typing.Any) -> Client:
+    """ Create a client whose requests are answered by `handler` instead of the Notion API,
+    so that tests which only check the client behaviour can run without an integration token.
+    """
+    client = client_cls(auth_token="fake_token", **options)
+    client._http_client = client._make_http_client(transport=httpx.MockTransport(handler))
+    return client
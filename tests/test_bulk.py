@@ -0,0 +1,446 @@
+import asyncio
+import json
+import random
+import threading
+import time
+
+import httpx
+import pytest
+
+from notionx import AsyncClient, LocalValidationError
+from notionx.bulk import map_concurrently, async_map_concurrently
+from tests.helpers import get_mocked_client
+
+
+class _ConcurrencyProbe:
+    """ Records the maximum number of concurrent calls. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.in_flight -= 1
+
+
+def _create_page_handler(request: httpx.Request) -> httpx.Response:
+    body = json.loads(request.content)
+    if body["properties"].get("fail"):
+        return httpx.Response(400, json={"object": "error", "status": 400, "code": "validation_error",
+                                         "message": "invalid property"})
+    return httpx.Response(200, json={"object": "page", "id": body["properties"]["Name"],
+                                     "properties": body["properties"]})
+
+
+def _page_bodies(count: int):
+    return [{"parent": {"database_id": "database_id"}, "properties": {"Name": str(i)}} for i in range(count)]
+
+
+def test_map_concurrently():
+    probe = _ConcurrencyProbe()
+
+    def func(item):
+        with probe:
+            time.sleep(random.uniform(0, 0.01))
+            return item * 2
+
+    # `items` can be a lazy iterator
+    assert map_concurrently(func, iter(range(20)), 4) == [i * 2 for i in range(20)]
+    assert 1 < probe.max_in_flight <= 4
+
+    assert map_concurrently(func, [], 4) == []
+    with pytest.raises(ValueError):
+        map_concurrently(func, [1], 0)
+
+
+def test_map_concurrently_exceptions():
+    calls = []
+
+    def func(item):
+        calls.append(item)
+        if item == 3:
+            raise KeyError(item)
+        return item
+
+    with pytest.raises(KeyError):
+        map_concurrently(func, range(100), 2)
+    # no more items are submitted after the failure
+    assert len(calls) < 100
+
+    results = map_concurrently(func, range(5), 2, return_exceptions=True)
+    assert results[:3] == [0, 1, 2] and results[4] == 4
+    assert isinstance(results[3], KeyError)
+
+
+@pytest.mark.asyncio
+async def test_async_map_concurrently():
+    probe = _ConcurrencyProbe()
+
+    async def func(item):
+        with probe:
+            await asyncio.sleep(random.uniform(0, 0.01))
+            if item == 7:
+                raise KeyError(item)
+            return item * 2
+
+    results = await async_map_concurrently(func, range(10), 3, return_exceptions=True)
+    assert 1 < probe.max_in_flight <= 3
+    assert [r for i, r in enumerate(results) if i != 7] == [i * 2 for i in range(10) if i != 7]
+    assert isinstance(results[7], KeyError)
+
+    with pytest.raises(KeyError):
+        await async_map_concurrently(func, range(10), 3)
+
+
+def test_pages_create_many():
+    client = get_mocked_client(_create_page_handler, bulk_concurrency=4)
+    pages = client.pages.create_many(_page_bodies(10))
+    assert [page["id"] for page in pages] == [str(i) for i in range(10)]
+
+    # every body is validated like the body of `create`
+    with pytest.raises(LocalValidationError):
+        client.pages.create_many([{"parent": {"database_id": "database_id"}}])
+
+    bodies = _page_bodies(3)
+    bodies[1]["properties"]["fail"] = True
+    results = client.pages.create_many(bodies, concurrency=2, return_exceptions=True)
+    assert results[0]["id"] == "0" and results[2]["id"] == "2"
+    assert isinstance(results[1], Exception)
+
+
+@pytest.mark.asyncio
+async def test_async_pages_create_many():
+    client = get_mocked_client(_create_page_handler, AsyncClient)
+    pages = await client.pages.create_many(_page_bodies(10), concurrency=5)
+    assert [page["id"] for page in pages] == [str(i) for i in range(10)]
+
+
+def _update_page_handler():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        page_id = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, json={"object": "page", "id": page_id, **json.loads(request.content)})
+
+    return handler, requests
+
+
+def _known_pages(count: int):
+    return {str(i): {"object": "page", "id": str(i), "archived": False,
+                     "properties": {"Price": {"id": "abc", "type": "number", "number": i}}}
+            for i in range(count)}
+
+
+def test_pages_update_many():
+    handler, requests = _update_page_handler()
+    client = get_mocked_client(handler)
+    known_pages = _known_pages(10)
+    # only the odd pages have a new price
+    updates = [(str(i), {"properties": {"Price": {"number": i + i % 2}}}) for i in range(10)]
+
+    pages = client.pages.update_many(updates, known_pages=known_pages)
+    assert [page["id"] for page in pages] == [str(i) for i in range(10)]
+    assert len(requests) == 5
+    assert all(pages[i] is known_pages[str(i)] for i in range(0, 10, 2))
+
+    # without known states, every page is updated
+    handler, requests = _update_page_handler()
+    client = get_mocked_client(handler)
+    client.pages.update_many(updates)
+    assert len(requests) == 10
+
+    # a plain title resets the annotations of a bold one, it is sent
+    handler, requests = _update_page_handler()
+    client = get_mocked_client(handler)
+    bold_title = [{"type": "text", "text": {"content": "Mango", "link": None}, "plain_text": "Mango",
+                   "annotations": {"bold": True, "italic": False, "strikethrough": False, "underline": False,
+                                   "code": False, "color": "default"}}]
+    known_page = {"object": "page", "id": "0", "properties": {"Name": {"type": "title", "title": bold_title}}}
+    client.pages.update_many([("0", {"properties": {"Name": {"title": [{"text": {"content": "Mango"}}]}}})],
+                             known_pages={"0": known_page})
+    assert len(requests) == 1
+
+    # skipped bodies are validated too
+    with pytest.raises(LocalValidationError):
+        client.pages.update_many([("0", {"parent": {}})], known_pages=known_pages)
+
+
+@pytest.mark.asyncio
+async def test_async_pages_update_many():
+    handler, requests = _update_page_handler()
+    client = get_mocked_client(handler, AsyncClient)
+    updates = [(str(i), {"properties": {"Price": {"number": i + i % 2}}}) for i in range(10)]
+    pages = await client.pages.update_many(updates, known_pages=_known_pages(10))
+    assert [page["id"] for page in pages] == [str(i) for i in range(10)]
+    assert len(requests) == 5
+
+    results = await client.pages.update_many([("0", {"parent": {}}), ("1", {"archived": True})],
+                                             return_exceptions=True)
+    assert isinstance(results[0], LocalValidationError)
+    assert results[1]["archived"] is True
+
+
+_BLOCK_TREE = {
+    "root": ["a", "b", "page"],
+    "a": ["a1", "a2", "a3"],
+    "a1": ["a1x"],
+    "b": ["b1"],
+    "page": ["page_content"],
+}
+
+
+def _block(block_id: str, block_type: str = "paragraph"):
+    if block_id == "page":
+        block_type = "child_page"
+    return {"object": "block", "id": block_id, "type": block_type, "has_children": block_id in _BLOCK_TREE,
+            block_type: {"rich_text": []}}
+
+
+def _block_children_handler(page_size: int = 2, delay: float = 0.0):
+    """ Serves the children of `_BLOCK_TREE` in pages of `page_size` blocks. """
+    probe = _ConcurrencyProbe()
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        with probe:
+            time.sleep(delay)
+            requests.append(request)
+            block_id = request.url.path.split("/")[-2]
+            start = int(request.url.params.get("start_cursor", 0))
+            children = _BLOCK_TREE[block_id][start:start + page_size]
+            has_more = start + page_size < len(_BLOCK_TREE[block_id])
+            return httpx.Response(200, json={
+                "object": "list", "results": [_block(child) for child in children],
+                "next_cursor": str(start + page_size) if has_more else None, "has_more": has_more
+            })
+
+    return handler, requests, probe
+
+
+def _tree_ids(blocks):
+    """ Converts the fetched tree to nested (id, children) tuples. """
+    return [(block["id"], _tree_ids(block[block["type"]].get("children", []))) for block in blocks]
+
+
+def test_blocks_fetch_tree():
+    handler, requests, probe = _block_children_handler(delay=0.01)
+    client = get_mocked_client(handler)
+    tree = client.blocks.fetch_tree("root", concurrency=3)
+    assert _tree_ids(tree) == [
+        ("a", [("a1", [("a1x", [])]), ("a2", []), ("a3", [])]),
+        ("b", [("b1", [])]),
+        ("page", []),  # child pages are not expanded
+    ]
+    assert all(request.url.params["page_size"] == "100" for request in requests)
+    assert 1 < probe.max_in_flight <= 3
+
+    # max depth
+    tree = client.blocks.fetch_tree("root", max_depth=1)
+    assert _tree_ids(tree) == [("a", []), ("b", []), ("page", [])]
+    tree = client.blocks.fetch_tree("root", max_depth=2)
+    assert _tree_ids(tree)[0] == ("a", [("a1", []), ("a2", []), ("a3", [])])
+
+
+@pytest.mark.asyncio
+async def test_async_blocks_fetch_tree():
+    handler, requests, probe = _block_children_handler()
+    client = get_mocked_client(handler, AsyncClient)
+    tree = await client.blocks.fetch_tree("root", concurrency=2)
+    assert _tree_ids(tree) == [
+        ("a", [("a1", [("a1x", [])]), ("a2", []), ("a3", [])]),
+        ("b", [("b1", [])]),
+        ("page", []),
+    ]
+    tree = await client.blocks.fetch_tree("root", max_depth=1)
+    assert _tree_ids(tree) == [("a", []), ("b", []), ("page", [])]
+
+
+class _FakeBlockStore:
+    """ A fake Notion server handling append and list block children requests and checking the request limits. """
+
+    def __init__(self):
+        self.children = {"root": []}
+        self.requests = []
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    # the blocks which cannot be created without children
+    _MIN_CHILDREN = {"column_list": 2, "column": 1, "table": 1}
+
+    def _create(self, block):
+        self._next_id += 1
+        block_id = f"id{self._next_id}"
+        block_type = block["type"]
+        children = block[block_type].get("children", [])
+        assert len(children) >= self._MIN_CHILDREN.get(block_type, 0)
+        self.children[block_id] = [self._create(child) for child in children]
+        type_object = {key: value for key, value in block[block_type].items() if key != "children"}
+        return {"object": "block", "id": block_id, "type": block_type, block_type: type_object}
+
+    @staticmethod
+    def _check_limits(blocks, level=0):
+        assert len(blocks) <= 100
+        count = 0
+        for block in blocks:
+            children = block[block["type"]].get("children", [])
+            assert not children or level < 2
+            count += 1 + _FakeBlockStore._check_limits(children, level + 1)
+        return count
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            return self._handle(request)
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        parent_id = request.url.path.split("/")[-2]
+        if request.method == "GET":
+            self.requests.append(None)
+            results = [{**block, "has_children": bool(self.children[block["id"]])}
+                       for block in self.children[parent_id]]
+            return httpx.Response(200, json={"object": "list", "results": results,
+                                             "next_cursor": None, "has_more": False})
+        body = json.loads(request.content)
+        self.requests.append(body)
+        assert self._check_limits(body["children"]) <= 1000
+        siblings = self.children[parent_id]
+        position = len(siblings)
+        if "after" in body:
+            position = [block["id"] for block in siblings].index(body["after"]) + 1
+        created = [self._create(block) for block in body["children"]]
+        siblings[position:position] = created
+        return httpx.Response(200, json={"object": "list", "results": created, "next_cursor": None, "has_more": False})
+
+    def tree(self, block_id="root"):
+        return [(_label(block), self.tree(block["id"])) for block in self.children[block_id]]
+
+
+def _label(block):
+    rich_text = block[block["type"]].get("rich_text")
+    return rich_text[0]["text"]["content"] if rich_text else block["type"]
+
+
+def _paragraph(text, children=()):
+    block = {"object": "block", "type": "paragraph",
+             "paragraph": {"rich_text": [{"type": "text", "text": {"content": text}}]}}
+    if children:
+        block["paragraph"]["children"] = list(children)
+    return block
+
+
+def _expected_tree(blocks):
+    return [(_label(block), _expected_tree(block[block["type"]].get("children", []))) for block in blocks]
+
+
+def test_append_in_batches_long_list():
+    store = _FakeBlockStore()
+    client = get_mocked_client(store.handler)
+    blocks = [_paragraph(str(i)) for i in range(250)]
+    created = client.blocks.children.append_in_batches("root", blocks)
+    assert len(store.requests) == 3
+    assert "after" not in store.requests[0]
+    assert store.requests[1]["after"] == created[99]["id"]
+    assert len(created) == 250
+    assert store.tree() == _expected_tree(blocks)
+
+    # empty list, no request
+    assert client.blocks.children.append_in_batches("root", []) == []
+    assert len(store.requests) == 3
+
+
+def test_append_in_batches_deep_and_wide_nesting():
+    store = _FakeBlockStore()
+    client = get_mocked_client(store.handler, bulk_concurrency=2)
+    deep = _paragraph("d0", [_paragraph("d1", [_paragraph("d2", [_paragraph("d3", [_paragraph("d4")])])])])
+    wide = _paragraph("w", [_paragraph(f"w{i}") for i in range(150)])
+    large = _paragraph("l", [_paragraph(f"l{i}", [_paragraph(f"l{i}.{j}") for j in range(20)]) for i in range(60)])
+    small = _paragraph("s", [_paragraph("s0", [_paragraph("s00")])])
+    blocks = [_paragraph("first"), deep, wide, large, small, _paragraph("last")]
+
+    created = client.blocks.children.append_in_batches("root", blocks)
+    assert [block["paragraph"]["rich_text"][0]["text"]["content"] for block in created] == \
+           ["first", "d0", "w", "l", "s", "last"]
+    assert store.tree() == _expected_tree(blocks)
+    # the blocks which do not fit are sent with as many children as the first request can hold,
+    # the blocks which fit are sent with all their children in the next one
+    assert [child["paragraph"]["rich_text"][0]["text"]["content"] for child in store.requests[0]["children"]] == \
+           ["first", "d0", "w", "l"]
+    assert len(store.requests[0]["children"][2]["paragraph"]["children"]) == 100
+    assert store.requests[1]["children"][0] == small
+
+
+def test_append_in_batches_after():
+    store = _FakeBlockStore()
+    client = get_mocked_client(store.handler)
+    client.blocks.children.append_in_batches("root", [_paragraph("a"), _paragraph("z")])
+    anchor = store.children["root"][0]["id"]
+    client.blocks.children.append_in_batches("root", [_paragraph(str(i)) for i in range(120)], after=anchor)
+    assert [text for text, _ in store.tree()] == ["a"] + [str(i) for i in range(120)] + ["z"]
+
+
+@pytest.mark.asyncio
+async def test_async_append_in_batches():
+    store = _FakeBlockStore()
+    client = get_mocked_client(store.handler, AsyncClient)
+    blocks = [_paragraph(str(i), [_paragraph(f"{i}.{j}", [_paragraph("x", [_paragraph("y")])]) for j in range(3)])
+              for i in range(120)]
+    created = await client.blocks.children.append_in_batches("root", blocks)
+    assert len(created) == 120
+    assert store.tree() == _expected_tree(blocks)
+
+
+def _container(block_type, children, **type_object):
+    return {"type": block_type, block_type: {**type_object, "children": list(children)}}
+
+
+def test_append_in_batches_containers():
+    store = _FakeBlockStore()
+    client = get_mocked_client(store.handler, bulk_concurrency=2)
+    column = _container("column", [_paragraph("c0", [_paragraph("c1", [_paragraph("c2")])])])
+    columns = _container("column_list", [column, _container("column", [_paragraph("x")])])
+    rows = [{"type": "table_row", "table_row": {"cells": [[{"type": "text", "text": {"content": str(i)}}]]}}
+            for i in range(150)]
+    table = _container("table", rows, table_width=1, has_column_header=False, has_row_header=False)
+    toggle = _paragraph("t", [columns])
+
+    created = client.blocks.children.append_in_batches("root", [columns, table, toggle])
+    assert [block["type"] for block in created] == ["column_list", "table", "paragraph"]
+    # the containers are created with their children, the fake server checking it
+    assert store.tree() == _expected_tree([columns, table, toggle])
+    first = store.requests[0]["children"]
+    assert first[0]["column_list"]["children"][0]["column"]["children"] == [_paragraph("c0")]
+    assert len(first[1]["table"]["children"]) == 100
+    # the column list is too deep to be sent in the toggle, it is appended to the toggle once created
+    assert "children" not in first[2]["paragraph"]
+
+
+def test_append_in_batches_impossible_container():
+    store = _FakeBlockStore()
+    client = get_mocked_client(store.handler)
+    table = _container("table", [{"type": "table_row", "table_row": {"cells": []}}], table_width=1)
+    columns = _container("column_list", [_container("column", [table]), _container("column", [_paragraph("x")])])
+    with pytest.raises(ValueError):
+        client.blocks.children.append_in_batches("root", [columns])
+    assert store.requests == []
+
+
+def test_append_in_batches_lazy_tree():
+    pytest.importorskip("simdjson")
+    store = _FakeBlockStore()
+    client = get_mocked_client(store.handler)
+    blocks = [_paragraph("a", [_paragraph(f"a{i}", [_paragraph(f"a{i}x")]) for i in range(150)])]
+    client.blocks.children.append_in_batches("root", blocks)
+
+    # a tree fetched with lazy responses is made of mappings which are not dicts, it is split all the same
+    tree = get_mocked_client(store.handler, lazy_responses=True).blocks.fetch_tree("root")
+    assert not isinstance(tree[0], dict)
+    copy = _FakeBlockStore()
+    get_mocked_client(copy.handler).blocks.children.append_in_batches("root", tree)
+    assert copy.tree() == store.tree() == _expected_tree(blocks)
@@ -0,0 +1,366 @@
+import asyncio
+import sqlite3
+import time
+import typing
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+import pytest
+
+from notionx import Client, AsyncClient
+from notionx.cache import ResponseCache, SQLiteResponseCache
+from notionx.utils import endpoint_template, path_object_ids, query_object_ids
+from tests.helpers import get_mocked_client
+
+_TTL_MS = {"databases/{id}": 60_000, "users/{id}": 60_000, "users/me": 60_000, "blocks/{id}": 60_000}
+
+
+@pytest.mark.parametrize("path, template, ids", [
+    ("databases/abc", "databases/{id}", ["abc"]),
+    ("users/me", "users/me", []),
+    ("/blocks/AB-CD/children", "blocks/{id}/children", ["abcd"]),
+    ("pages/abc/properties/title", "pages/{id}/properties/{id}", ["abc", "title"]),
+    ("search", "search", []),
+])
+def test_endpoint_template(path, template, ids):
+    assert endpoint_template(path) == template
+    assert path_object_ids(path) == ids
+
+
+def test_query_object_ids():
+    assert query_object_ids("https://api.notion.com/v1/comments?block_id=B55C9C91-384D-452B-81DB-D1EF79372B75"
+                            "&page_size=100") == ["b55c9c91384d452b81dbd1ef79372b75"]
+    assert query_object_ids("https://api.notion.com/v1/users?start_cursor=abc") == []
+
+
+def test_response_cache_ttl_and_lru():
+    cache = ResponseCache({"blocks/{id}": 50, "users/me": 0}, max_bytes=10)
+    cache.put("blocks/a", "a", b"aaaa")
+    cache.put("users/me", "me", b"me")
+    cache.put("search", "search", b"s")
+    assert cache.get("blocks/a", "a") == b"aaaa"
+    assert len(cache) == 1 and cache.size == 4
+
+    cache.put("blocks/b", "b", b"bbbb")
+    cache.get("blocks/a", "a")  # `a` becomes the most recently used
+    cache.put("blocks/c", "c", b"cccc")
+    assert cache.get("blocks/b", "b") is None
+    assert cache.get("blocks/a", "a") == b"aaaa" and cache.get("blocks/c", "c") == b"cccc"
+    assert cache.size == 8
+
+    # too large to be cached
+    cache.put("blocks/d", "d", b"d" * 11)
+    assert cache.get("blocks/d", "d") is None
+
+    time.sleep(0.06)
+    assert cache.get("blocks/a", "a") is None
+    assert cache.size == 4
+
+
+def test_response_cache_invalidation():
+    cache = ResponseCache({"blocks/{id}": 60_000, "blocks/{id}/children": 60_000})
+    cache.put("blocks/ab-cd", "1", b"1")
+    cache.put("blocks/abcd/children", "2", b"2")
+    cache.put("blocks/ef", "3", b"3")
+    cache.invalidate("ABCD")
+    assert cache.get("blocks/ab-cd", "1") is None and cache.get("blocks/abcd/children", "2") is None
+    assert cache.get("blocks/ef", "3") == b"3"
+    cache.invalidate_path("blocks/ef/children")
+    assert len(cache) == 0 and cache.size == 0
+
+
+def _counting_handler():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"object": "block", "id": request.url.path.rsplit("/", 1)[-1],
+                                         "has_children": False})
+
+    return handler, requests
+
+
+def test_client_cache():
+    handler, requests = _counting_handler()
+    client = get_mocked_client(handler, cache_ttl_ms=_TTL_MS)
+    first = client.blocks.retrieve("abc")
+    first["has_children"] = True  # every hit returns new objects
+    assert client.blocks.retrieve("abc") == {"object": "block", "id": "abc", "has_children": False}
+    client.users.me()
+    client.users.me()
+    client.databases.query("abc")  # not cached
+    client.databases.query("abc")
+    assert len(requests) == 4
+
+    # read-only POST requests do not evict anything
+    client.databases.retrieve("abc")
+    client.databases.query("abc")
+    client.search(query="abc")
+    client.databases.retrieve("abc")
+    assert len(requests) == 7
+
+    # writes evict the entries of the objects they change
+    client.blocks.update("abc", archived=True)
+    client.blocks.retrieve("abc")
+    assert len(requests) == 9
+    client.blocks.delete("a-b-c")
+    client.blocks.retrieve("abc")
+    assert len(requests) == 11
+
+    client.cache.invalidate("abc")
+    client.blocks.retrieve("abc")
+    assert len(requests) == 12
+
+    # disabled by default
+    assert get_mocked_client(handler).cache is None
+
+
+@pytest.mark.parametrize("sqlite", [False, True])
+def test_client_cache_evicts_parent_listings(tmp_path, sqlite):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("/children"):
+            return httpx.Response(200, json={"object": "list", "results": [], "has_more": False, "next_cursor": None})
+        # the written objects are children of the page `p-1`
+        object_type = "page" if "/pages/" in request.url.path else "block"
+        return httpx.Response(200, json={"object": object_type, "id": request.url.path.rsplit("/", 1)[-1],
+                                         "parent": {"type": "page_id", "page_id": "p-1"}})
+
+    options = {"cache_path": str(tmp_path / "cache.db")} if sqlite else {}
+    client = get_mocked_client(handler, cache_ttl_ms={"blocks/{id}/children": 60_000}, **options)
+    client.blocks.children.list("p1")
+    client.blocks.children.list("p1")
+    assert len(requests) == 1
+
+    # deleting a child or archiving a sub-page changes the list of the children of its parent
+    client.blocks.delete("child")
+    client.blocks.children.list("p1")
+    assert len(requests) == 3
+    client.pages.update("sub_page", archived=True)
+    client.blocks.children.list("p1")
+    assert len(requests) == 5
+    client.blocks.children.list("p1")
+    assert len(requests) == 5
+
+
+_PAGE_ID = "b55c9c91-384d-452b-81db-d1ef79372b75"
+
+
+@pytest.mark.parametrize("sqlite", [False, True])
+def test_client_cache_evicts_comments_and_children(tmp_path, sqlite):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.method == "GET":
+            return httpx.Response(200, json={"object": "list", "results": [], "has_more": False, "next_cursor": None})
+        if request.url.path.endswith("/comments"):
+            return httpx.Response(200, json={"object": "comment", "id": "c1", "discussion_id": "d1",
+                                             "parent": {"type": "page_id", "page_id": _PAGE_ID}})
+        return httpx.Response(200, json={"object": "list", "results": [{"object": "block", "id": "b1"}]})
+
+    options = {"cache_path": str(tmp_path / "cache.db")} if sqlite else {}
+    client = get_mocked_client(handler, cache_ttl_ms={"comments": 60_000, "blocks/{id}/children": 60_000}, **options)
+    client.comments.list(block_id=_PAGE_ID)
+    client.blocks.children.list(_PAGE_ID)
+    client.comments.list(block_id=_PAGE_ID)
+    client.blocks.children.list(_PAGE_ID)
+    assert len(requests) == 2
+
+    # the comments listed with the id of the page in the query are evicted by a comment on the page
+    client.comments.create(parent={"page_id": _PAGE_ID}, rich_text=[{"text": {"content": "Hi"}}])
+    client.comments.list(block_id=_PAGE_ID)
+    assert len(requests) == 4
+    client.blocks.children.list(_PAGE_ID)
+    assert len(requests) == 5
+
+    client.comments.list(block_id=_PAGE_ID)
+    client.blocks.children.append(_PAGE_ID, children=[{"paragraph": {"rich_text": []}}])
+    client.blocks.children.list(_PAGE_ID)
+    assert len(requests) == 7
+    client.blocks.children.list(_PAGE_ID)
+    assert len(requests) == 7
+
+
+@pytest.mark.asyncio
+async def test_async_client_cache():
+    handler, requests = _counting_handler()
+    client = get_mocked_client(handler, AsyncClient, cache_ttl_ms=_TTL_MS)
+    await client.databases.retrieve("abc")
+    await client.databases.query("abc")
+    await client.databases.retrieve("abc")
+    assert len(requests) == 2
+    await client.databases.update("abc", title=[])
+    await client.databases.retrieve("abc")
+    assert len(requests) == 4
+
+
+def _put_entries(path: str, start: int) -> None:
+    cache = SQLiteResponseCache(path, {"blocks/{id}": 60_000})
+    for i in range(start, start + 20):
+        cache.put(f"blocks/b{i}", str(i), b"x" * 10)
+
+
+def test_sqlite_response_cache(tmp_path):
+    path = tmp_path / "cache.db"
+    cache = SQLiteResponseCache(path, {"blocks/{id}": 50, "blocks/{id}/children": 60_000}, max_bytes=10)
+    cache.put("blocks/a", "a", b"aaaa")
+    cache.put("search", "search", b"s")
+    assert cache.get("blocks/a", "a") == b"aaaa"
+    assert len(cache) == 1 and cache.size == 4
+
+    # another process sees the same entries
+    other = SQLiteResponseCache(path, {"blocks/{id}": 50, "blocks/{id}/children": 60_000}, max_bytes=10)
+    assert other.get("blocks/a", "a") == b"aaaa"
+    other.put("blocks/ab-cd/children", "b", b"bbbb")
+    other.put("blocks/c", "c", b"cccc")
+    assert cache.get("blocks/a", "a") is None  # evicted as the least recently used
+    cache.invalidate("ABCD")
+    assert other.get("blocks/abcd/children", "b") is None
+
+    time.sleep(0.06)
+    assert cache.get("blocks/c", "c") is None
+    assert len(other) == 0
+    cache.close()
+    other.close()
+
+
+def test_sqlite_response_cache_reads_without_write_lock(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteResponseCache(path, {"blocks/{id}": 60_000}, timeout_ms=50)
+    cache.put("blocks/a", "a", b"aaaa")
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        # a hit is served while another process holds the write lock
+        assert cache.get("blocks/a", "a") == b"aaaa"
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+
+    # the access times of the hits are written later
+    accessed_at = time.time()
+    assert cache.get("blocks/a", "a") == b"aaaa"
+    cache.close()
+    row = sqlite3.connect(path).execute("SELECT accessed_at FROM responses WHERE key = 'a'").fetchone()
+    assert row[0] >= accessed_at
+
+
+def test_sqlite_cache_is_scoped_to_the_token_and_version(tmp_path):
+    def handler(request: httpx.Request) -> httpx.Response:
+        token = request.headers["Authorization"].split()[-1]
+        return httpx.Response(200, json={"object": "block", "id": "abc", "token": token})
+
+    options = dict(cache_ttl_ms=_TTL_MS, cache_path=str(tmp_path / "cache.db"))
+    assert get_mocked_client(handler, **options).blocks.retrieve("abc")["token"] == "fake_token"
+    other = Client(auth_token="other_token", **options)
+    other._http_client = other._make_http_client(transport=httpx.MockTransport(handler))
+    # another integration does not read the responses cached for the first one
+    assert other.blocks.retrieve("abc")["token"] == "other_token"
+    newer = get_mocked_client(handler, notion_version="2025-09-03", **options)
+    newer._http_client = newer._make_http_client(transport=httpx.MockTransport(lambda request: httpx.Response(
+        200, json={"object": "block", "id": "abc", "token": "newer"})))
+    assert newer.blocks.retrieve("abc")["token"] == "newer"
+    # the same integration reads it from the cache
+    offline = get_mocked_client(lambda request: httpx.Response(500), **options)
+    assert offline.blocks.retrieve("abc")["token"] == "fake_token"
+
+
+def test_client_closes_its_cache(tmp_path):
+    client = get_mocked_client(lambda request: httpx.Response(200, json={}), cache_ttl_ms=_TTL_MS,
+                               cache_path=str(tmp_path / "cache.db"))
+    client.users.me()
+    assert client.cache._connection is not None
+    client.close()
+    assert client.cache._connection is None
+
+
+def test_sqlite_response_cache_processes(tmp_path):
+    path = str(tmp_path / "cache.db")
+    with ProcessPoolExecutor(4) as executor:
+        list(executor.map(_put_entries, [path] * 4, range(0, 80, 20)))
+    assert len(SQLiteResponseCache(path, {})) == 80
+
+
+def _page_handler(page: typing.Dict):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        if request.url.path.endswith("/children"):
+            return httpx.Response(200, json={"object": "list", "has_more": False, "next_cursor": None, "results": [
+                {"object": "block", "id": "b1", "type": "paragraph", "has_children": True,
+                 "last_edited_time": page["last_edited_time"], "parent": {"type": "page_id", "page_id": "p-1"}},
+            ]})
+        return httpx.Response(200, json=page)
+
+    return handler, requests
+
+
+def test_client_sqlite_cache_revalidation(tmp_path):
+    page = {"object": "page", "id": "p-1", "last_edited_time": "2022-03-01T19:05:00.000Z"}
+    handler, requests = _page_handler(page)
+    options = dict(cache_ttl_ms={"blocks/{id}/children": 50}, cache_path=str(tmp_path / "cache.db"))
+    client = get_mocked_client(handler, **options)
+    client.pages.retrieve("p-1")
+    client.blocks.children.list("p1")
+    client.blocks.children.list("b1")
+    assert client.blocks.children.list("p1")["results"][0]["id"] == "b1"
+    assert len(requests) == 3
+
+    # a new process revalidates both expired lists with a single retrieval of their page
+    time.sleep(0.06)
+    client = get_mocked_client(handler, **options)
+    client.blocks.children.list("p1")
+    client.blocks.children.list("b1")
+    assert requests[3:] == ["/v1/pages/p1"]
+    client.blocks.children.list("p1")
+    assert len(requests) == 4
+
+    # once the page has been edited, its lists are fetched again
+    time.sleep(0.06)
+    page["last_edited_time"] = "2022-03-02T08:00:00.000Z"
+    client.blocks.children.list("b1")
+    client.blocks.children.list("p1")
+    assert requests[4:] == ["/v1/pages/p1", "/v1/blocks/b1/children", "/v1/blocks/p1/children"]
+
+
+@pytest.mark.asyncio
+async def test_async_client_sqlite_cache_revalidation(tmp_path):
+    page = {"object": "page", "id": "p-1", "last_edited_time": "2022-03-01T19:05:00.000Z"}
+    handler, requests = _page_handler(page)
+    client = get_mocked_client(handler, AsyncClient, cache_ttl_ms={"blocks/{id}/children": 50},
+                               cache_path=str(tmp_path / "cache.db"))
+    await client.pages.retrieve("p1")
+    await client.blocks.children.list("p1")
+    time.sleep(0.06)
+    await client.blocks.children.list("p1")
+    assert requests == ["/v1/pages/p1", "/v1/blocks/p1/children", "/v1/pages/p1"]
+
+
+@pytest.mark.asyncio
+async def test_async_client_sqlite_cache_does_not_block_the_loop(tmp_path):
+    path = str(tmp_path / "cache.db")
+    client = get_mocked_client(lambda request: httpx.Response(200, json={"object": "block", "id": "abc"}),
+                               AsyncClient, cache_ttl_ms=_TTL_MS, cache_path=path)
+    # another process holds the write lock for 200ms
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    asyncio.get_running_loop().call_later(0.2, writer.execute, "ROLLBACK")
+    ticks = []
+
+    async def tick():
+        while len(ticks) < 10:
+            ticks.append(None)
+            await asyncio.sleep(0.01)
+
+    retrieval = asyncio.ensure_future(client.blocks.retrieve("abc"))
+    await tick()
+    # the loop kept running while the response was waiting to be cached
+    assert not retrieval.done()
+    assert (await retrieval)["id"] == "abc"
+    assert len(client.cache) == 1
+    writer.close()
+    await client.close()
@@ -0,0 +1,139 @@
+import time
+
+import httpx
+import pytest
+
+from notionx import AsyncClient, CircuitOpenError, ServiceUnavailableError, ObjectNotFoundError
+from notionx.circuit_breaker import CircuitBreaker
+from tests.helpers import get_mocked_client
+
+
+def test_circuit_breaker_arguments():
+    with pytest.raises(ValueError):
+        CircuitBreaker(failure_rate=0)
+    with pytest.raises(ValueError):
+        CircuitBreaker(window=5, min_requests=10)
+    with pytest.raises(ValueError):
+        CircuitBreaker(probes=0)
+
+
+def test_circuit_breaker_states():
+    breaker = CircuitBreaker(failure_rate=0.5, window=4, min_requests=4, open_ms=50)
+    for failed in (True, False, True):
+        breaker.before_request()
+        breaker.record(failed)
+    assert breaker.state == CircuitBreaker.CLOSED  # not enough requests yet
+    breaker.before_request()
+    breaker.record(None)  # not completed, not counted
+    breaker.before_request()
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.before_request()
+    assert 0 < exc_info.value.retry_after <= 0.05
+
+    # a single probe at a time once the circuit is half-open
+    time.sleep(0.06)
+    breaker.before_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    breaker.before_request()
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_request()
+
+
+def _outage_handler():
+    statuses = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = statuses.pop(0) if statuses else 200
+        if status == 503:
+            return httpx.Response(503, json={"object": "error", "code": "service_unavailable", "message": ""})
+        if status == 404:
+            return httpx.Response(404, json={"object": "error", "code": "object_not_found", "message": ""})
+        if status == 0:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"object": "user", "id": "me"})
+
+    return handler, statuses
+
+
+def test_client_circuit_breaker():
+    handler, statuses = _outage_handler()
+    client = get_mocked_client(handler, circuit_failure_rate=0.5, circuit_window=4, circuit_open_ms=50)
+    statuses.extend([404, 404, 503, 0])
+    with pytest.raises(ObjectNotFoundError):
+        client.users.me()
+    with pytest.raises(ObjectNotFoundError):
+        client.users.me()
+    with pytest.raises(ServiceUnavailableError):
+        client.users.me()
+    with pytest.raises(httpx.ConnectError):
+        client.users.me()
+    assert client.circuit_breaker.state == CircuitBreaker.OPEN
+
+    # the requests fail fast, even when they would be retried
+    client._retry_policy.max_retries = 3
+    with pytest.raises(CircuitOpenError):
+        client.users.me()
+    assert not statuses
+
+    time.sleep(0.06)
+    assert client.users.me() == {"object": "user", "id": "me"}
+    assert client.circuit_breaker.state == CircuitBreaker.CLOSED
+    assert get_mocked_client(handler).circuit_breaker is None
+
+
+def test_open_circuit_fails_before_the_rate_limit():
+    handler, statuses = _outage_handler()
+    client = get_mocked_client(handler, circuit_failure_rate=1, circuit_window=1, rate_limit_per_second=2,
+                               rate_limit_burst=1)
+    client.circuit_breaker.record(failed=True)
+    start = time.monotonic()
+    for _ in range(4):
+        with pytest.raises(CircuitOpenError):
+            client.users.me()
+    # no token of the rate limit is taken nor waited for
+    assert time.monotonic() - start < 0.1
+    assert client._rate_limiter.acquire(timeout=0)
+
+    # a half-open circuit is not reserved by the check
+    breaker = CircuitBreaker(failure_rate=1, window=1, min_requests=1, open_ms=0)
+    breaker.record(failed=True)
+    breaker.check()
+    breaker.before_request()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+@pytest.mark.asyncio
+async def test_async_client_circuit_breaker():
+    handler, statuses = _outage_handler()
+    client = get_mocked_client(handler, AsyncClient, circuit_failure_rate=1, circuit_window=2)
+    statuses.extend([503, 503])
+    for _ in range(2):
+        with pytest.raises(ServiceUnavailableError):
+            await client.users.me()
+    with pytest.raises(CircuitOpenError):
+        await client.users.me()
+
+
+@pytest.mark.asyncio
+async def test_async_open_circuit_fails_before_the_scheduler():
+    handler, _ = _outage_handler()
+    client = get_mocked_client(handler, AsyncClient, circuit_failure_rate=1, circuit_window=1,
+                               rate_limit_per_second=2, rate_limit_burst=1, priority_scheduling=True)
+    client.circuit_breaker.record(failed=True)
+    start = time.monotonic()
+    for _ in range(4):
+        with pytest.raises(CircuitOpenError):
+            await client.users.me()
+    assert time.monotonic() - start < 0.1
+    assert client.scheduler.waiting("default") == 0
+    assert client._rate_limiter.acquire(timeout=0)
@@ -0,0 +1,72 @@
+import json
+
+import httpx
+import pytest
+
+from notionx import ObjectNotFoundError, UnknownAPIResponseError
+from notionx.codec import JSONCodec, StdlibCodec, OrjsonCodec, get_codec, orjson
+from tests.helpers import get_mocked_client
+
+_DATA = {"object": "page", "id": "abc", "title": [{"plain_text": "Tuscan kale 🥬 / 羽衣甘蓝"}],
+         "number": 1.5, "checkbox": True, "date": None}
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "ujson"])
+def test_codec_round_trip(name):
+    try:
+        codec = get_codec(name)
+    except ImportError:
+        pytest.skip(f"{name} is not installed")
+    assert codec.name == name
+    encoded = codec.dumps(_DATA)
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == _DATA
+    assert codec.loads(encoded) == _DATA
+    assert codec.loads(json.dumps(_DATA).encode()) == _DATA
+    with pytest.raises(ValueError):
+        codec.loads(b"not json")
+
+
+def test_get_codec():
+    expected = OrjsonCodec if orjson is not None else JSONCodec
+    assert isinstance(get_codec(), expected)
+    codec = StdlibCodec()
+    assert get_codec(codec) is codec
+    with pytest.raises(ValueError, match="Unknown JSON codec"):
+        get_codec("simplejson")
+
+
+def test_incomplete_codec():
+    class DumpsOnlyCodec(JSONCodec):
+        def dumps(self, obj):
+            return b"{}"
+
+    with pytest.raises(TypeError):
+        DumpsOnlyCodec()
+
+
+@pytest.mark.parametrize("codec", ["json", "auto"])
+def test_client_codec(codec):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("/missing"):
+            return httpx.Response(404, json={"object": "error", "status": 404, "code": "object_not_found",
+                                             "message": ""})
+        if request.url.path.endswith("/broken"):
+            return httpx.Response(500, content=b"<html>Internal error</html>")
+        return httpx.Response(200, content=request.content or json.dumps(_DATA).encode())
+
+    client = get_mocked_client(handler, json_codec=codec)
+    assert client.databases.query("database_id", page_size=10) == {"page_size": 10}
+    assert requests[-1].headers["Content-Type"] == "application/json"
+    assert json.loads(requests[-1].content) == {"page_size": 10}
+
+    assert client.users.retrieve("user_id") == _DATA
+    assert not requests[-1].content
+
+    with pytest.raises(ObjectNotFoundError):
+        client.users.retrieve("missing")
+    with pytest.raises(UnknownAPIResponseError, match="not a valid json object"):
+        client.users.retrieve("broken")
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from notionx import AsyncClient, RateLimitedError
+from notionx.concurrency import AdaptiveConcurrencyLimit
+from tests.helpers import get_mocked_client
+
+
+def test_adaptive_concurrency_limit_arguments():
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimit(1, min_limit=0)
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimit(1, min_limit=4, max_limit=2)
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimit(1, backoff=1)
+    assert AdaptiveConcurrencyLimit(100, max_limit=8).window == 8
+
+
+def test_adaptive_concurrency_limit_aimd():
+    limit = AdaptiveConcurrencyLimit(2, max_limit=4)
+    # one more request per window of healthy responses
+    for _ in range(2):
+        limit.release(limit.acquire(), overloaded=False)
+    assert limit.window == 3
+    for _ in range(10):
+        limit.release(limit.acquire(), overloaded=False)
+    assert limit.window == 4  # capped by `max_limit`
+
+    # a burst of overload signals halves the window once
+    started = [limit.acquire() for _ in range(4)]
+    for started_at in started:
+        limit.release(started_at, overloaded=True)
+    assert limit.window == 2 and limit.in_flight == 0
+    limit.release(limit.acquire(), overloaded=True)
+    assert limit.window == 1
+
+    # other errors leave the window unchanged
+    limit.release(limit.acquire(), overloaded=None)
+    assert limit.window == 1
+
+
+def test_adaptive_concurrency_limit_latency():
+    limit = AdaptiveConcurrencyLimit(2, max_limit=4)
+    limit.release(limit.acquire(), overloaded=False)
+    # the responses much slower than the average do not grow the window
+    for _ in range(4):
+        limit.release(limit.acquire() - 10, overloaded=False)
+    assert limit.window == 2
+
+
+def test_adaptive_concurrency_limit_blocks():
+    limit = AdaptiveConcurrencyLimit(1)
+    started_at = limit.acquire()
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: (limit.acquire(), acquired.set()))
+    thread.start()
+    assert not acquired.wait(0.05)
+    limit.release(started_at, overloaded=False)
+    assert acquired.wait(1)
+    thread.join()
+
+
+@pytest.mark.asyncio
+async def test_adaptive_concurrency_limit_async():
+    limit = AdaptiveConcurrencyLimit(1)
+    started_at = await limit.async_acquire()
+    waiting = asyncio.ensure_future(limit.async_acquire())
+    cancelled = asyncio.ensure_future(limit.async_acquire())
+    await asyncio.sleep(0.01)
+    assert not waiting.done()
+    cancelled.cancel()
+    limit.release(started_at, overloaded=False)
+    await asyncio.wait_for(waiting, 1)
+    assert limit.in_flight == 1
+
+
+def _overloaded_handler():
+    statuses = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = statuses.pop(0) if statuses else 200
+        if status == 429:
+            return httpx.Response(429, json={"object": "error", "code": "rate_limited", "message": ""})
+        return httpx.Response(200, json={"object": "user", "id": "me"})
+
+    return handler, statuses
+
+
+def test_client_adaptive_concurrency():
+    handler, statuses = _overloaded_handler()
+    client = get_mocked_client(handler, adaptive_concurrency=True, bulk_concurrency=4, adaptive_concurrency_max=8)
+    assert client.concurrency_limit.window == 4
+    for _ in range(4):
+        client.users.me()
+    assert client.concurrency_limit.window == 5
+
+    statuses.append(429)
+    with pytest.raises(RateLimitedError):
+        client.users.me()
+    assert client.concurrency_limit.window == 2 and client.concurrency_limit.in_flight == 0
+
+    # the bulk methods fan out up to the maximum window
+    assert client.users._bulk_concurrency() == 8
+    assert client.users._bulk_concurrency(3) == 3
+    assert get_mocked_client(handler).concurrency_limit is None
+
+
+@pytest.mark.asyncio
+async def test_async_client_adaptive_concurrency():
+    handler, statuses = _overloaded_handler()
+    client = get_mocked_client(handler, AsyncClient, adaptive_concurrency=True, bulk_concurrency=2)
+    results = await client.users._run_concurrently(lambda _: client.users.me(), range(20))
+    assert len(results) == 20
+    assert client.concurrency_limit.window > 2 and client.concurrency_limit.in_flight == 0
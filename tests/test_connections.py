@@ -0,0 +1,99 @@
+import time
+
+import httpx
+import pytest
+
+from notionx import Client, AsyncClient
+from tests.helpers import get_mocked_client
+
+
+def _recording_client_cls(base_cls):
+    """ A client class recording the keyword arguments used to create its httpx client. """
+    created = []
+
+    def client_type(**kwargs):
+        created.append(kwargs)
+        return base_cls._client_type(**kwargs)
+
+    return type("RecordingClient", (base_cls,), {"_client_type": staticmethod(client_type)}), created
+
+
+def test_pool_options():
+    client_cls, created = _recording_client_cls(Client)
+    client_cls(auth_token="fake_token", max_connections=50, max_keepalive_connections=None,
+               keepalive_expiry_ms=30_000)
+    limits = created[-1]["limits"]
+    assert (limits.max_connections, limits.max_keepalive_connections, limits.keepalive_expiry) == (50, None, 30.0)
+    assert created[-1]["http2"] is False
+
+    client_cls(auth_token="fake_token", keepalive_expiry_ms=None)
+    assert created[-1]["limits"].keepalive_expiry is None
+
+
+def test_http2_option():
+    try:
+        import h2  # noqa
+    except ImportError:
+        with pytest.raises(ImportError):
+            Client(auth_token="fake_token", http2=True)
+    else:
+        Client(auth_token="fake_token", http2=True)
+
+
+def _prewarm_handler():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(404 if request.method == "HEAD" else 200, json={})
+
+    return handler, requests
+
+
+def test_prewarm_and_context_manager():
+    handler, requests = _prewarm_handler()
+    client = get_mocked_client(handler)
+    assert client.prewarm() == 0
+    assert client.prewarm(3) == 3
+    assert [request.method for request in requests] == ["HEAD"] * 3
+    assert requests[0].url.host == "api.notion.com"
+
+    handler, requests = _prewarm_handler()
+    with get_mocked_client(handler, prewarm_connections=2) as client:
+        assert len(requests) == 2
+        client.users.me()
+    assert client._http_client.is_closed
+
+    # prewarming is best-effort
+    def broken_handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("unreachable", request=request)
+
+    assert get_mocked_client(broken_handler).prewarm(2) == 0
+
+
+def test_prewarm_is_rate_limited():
+    handler, requests = _prewarm_handler()
+    client = get_mocked_client(handler, rate_limit_per_second=20, rate_limit_burst=1,
+                               circuit_failure_rate=0.5, circuit_window=1)
+    start = time.monotonic()
+    assert client.prewarm(3) == 3
+    # the warm-up requests take tokens of the rate limit like any other request
+    assert time.monotonic() - start >= 0.09
+    assert not client._rate_limiter.acquire(timeout=0)
+
+    client.circuit_breaker.record(failed=True)
+    assert client.prewarm(2) == 0
+    assert len(requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_async_prewarm_and_context_manager():
+    handler, requests = _prewarm_handler()
+    async with get_mocked_client(handler, AsyncClient, prewarm_connections=4) as client:
+        assert [request.method for request in requests] == ["HEAD"] * 4
+        await client.users.me()
+    assert client._http_client.is_closed
+
+    with pytest.raises(TypeError, match="async with"):
+        with get_mocked_client(handler, AsyncClient):
+            pass
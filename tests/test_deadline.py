@@ -0,0 +1,156 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from notionx import AsyncClient, DeadlineExceededError, RateLimitedError
+from notionx.deadline import deadline, remaining, check_deadline
+from notionx.rate_limit import TokenBucket
+from tests.helpers import get_mocked_client
+
+
+def test_deadline_context():
+    assert remaining() is None and check_deadline() is None
+    with deadline(1_000):
+        assert 0.9 < remaining() <= 1
+        with deadline(60_000):  # cannot extend the enclosing deadline
+            assert remaining() <= 1
+        with deadline(10):
+            time.sleep(0.02)
+            with pytest.raises(DeadlineExceededError):
+                check_deadline()
+        assert remaining() > 0.9
+    assert remaining() is None
+
+
+def test_token_bucket_timeout():
+    bucket = TokenBucket(rate=10, burst=1)
+    assert bucket.acquire(timeout=0)
+    assert not bucket.acquire(timeout=0.05)  # the next token is due in 0.1s, it is not taken
+    assert bucket.acquire(timeout=0.2)
+
+
+def _users_handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"object": "list", "results": [], "has_more": False, "next_cursor": None})
+
+
+def test_client_deadline():
+    client = get_mocked_client(_users_handler, rate_limit_per_second=10, rate_limit_burst=1)
+    with deadline(50):
+        client.users.list()
+        # the rate limit would let the next request through after the deadline
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceededError):
+            client.users.list()
+        assert time.monotonic() - start < 0.02
+
+
+def test_client_deadline_skips_retries():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(429, headers={"Retry-After": "1"},
+                              json={"object": "error", "code": "rate_limited", "message": ""})
+
+    client = get_mocked_client(handler, max_retries=3)
+    with deadline(500):
+        with pytest.raises(RateLimitedError):
+            client.users.list()
+    assert len(calls) == 1
+
+
+def test_client_deadline_shrinks_timeout():
+    timeouts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        timeouts.append(request.extensions["timeout"]["read"])
+        if len(timeouts) == 2:
+            raise httpx.ReadTimeout("timed out", request=request)
+        return _users_handler(request)
+
+    client = get_mocked_client(handler, circuit_failure_rate=0.5, circuit_window=1)
+    with deadline(1_000):
+        client.users.list()
+        with pytest.raises(DeadlineExceededError):
+            client.users.list()
+    assert timeouts[0] <= 1 and timeouts[1] <= 1
+    # the timeout caused by the deadline is not an outage
+    assert client.circuit_breaker.state == "closed"
+    client.users.list()
+    assert timeouts[2] == 90
+
+
+def test_slot_granted_at_the_deadline_is_released():
+    client = get_mocked_client(_users_handler, adaptive_concurrency=True, bulk_concurrency=1)
+    acquire = client.concurrency_limit.acquire
+
+    def slow_acquire(timeout):
+        time.sleep(0.03)  # the slot is granted once the deadline has passed
+        return acquire(timeout)
+
+    client.concurrency_limit.acquire = slow_acquire
+    with deadline(20):
+        with pytest.raises(DeadlineExceededError):
+            client.users.list()
+    assert client.concurrency_limit.in_flight == 0
+    client.users.list()
+
+
+def test_probe_granted_at_the_deadline_is_released():
+    client = get_mocked_client(_users_handler, circuit_failure_rate=0.5, circuit_window=1)
+    before_request = client.circuit_breaker.before_request
+
+    def slow_before_request():
+        before_request()
+        time.sleep(0.03)
+
+    client.circuit_breaker.before_request = slow_before_request
+    client.circuit_breaker._state = client.circuit_breaker.HALF_OPEN
+    with deadline(20):
+        with pytest.raises(DeadlineExceededError):
+            client.users.list()
+    assert client.circuit_breaker.state == "half_open"
+    client.users.list()  # the probe slot is free again
+    assert client.circuit_breaker.state == "closed"
+
+
+def test_bulk_methods_see_the_deadline():
+    client = get_mocked_client(_users_handler, bulk_concurrency=2)
+    with deadline(0):
+        with pytest.raises(DeadlineExceededError):
+            client.users._run_concurrently(lambda _: client.users.list(), range(4))
+        with pytest.raises(DeadlineExceededError):
+            list(client.users.iter_list(prefetch=1))
+
+
+@pytest.mark.asyncio
+async def test_async_client_deadline():
+    client = get_mocked_client(_users_handler, AsyncClient, rate_limit_per_second=10, rate_limit_burst=1,
+                               priority_scheduling=True)
+    with deadline(50):
+        await client.users.list()
+        with pytest.raises(DeadlineExceededError):
+            await client.users.list()
+        # the tasks inherit the deadline
+        with pytest.raises(DeadlineExceededError):
+            await asyncio.gather(*(client.users.list() for _ in range(2)))
+
+
+@pytest.mark.asyncio
+async def test_async_slot_granted_at_the_deadline_is_released():
+    client = get_mocked_client(_users_handler, AsyncClient, adaptive_concurrency=True, bulk_concurrency=1)
+    async_acquire = client.concurrency_limit.async_acquire
+
+    async def slow_async_acquire():
+        started_at = await async_acquire()
+        time.sleep(0.03)  # the slot is granted once the deadline has passed
+        return started_at
+
+    client.concurrency_limit.async_acquire = slow_async_acquire
+    with deadline(20):
+        with pytest.raises(DeadlineExceededError):
+            await client.users.list()
+    assert client.concurrency_limit.in_flight == 0
+    await client.users.list()
@@ -0,0 +1,117 @@
+import json
+
+import httpx
+import pytest
+
+from notionx import AsyncClient
+from notionx import documents
+from notionx.codec import StdlibCodec
+from notionx.documents import LazyDocument, LazyList, parse_lazy, materialize
+from tests.helpers import get_mocked_client
+
+simdjson = pytest.importorskip("simdjson")
+
+_RESPONSE = {
+    "object": "list",
+    "results": [
+        {"object": "page", "id": str(i), "properties": {"Name": {"title": [{"plain_text": f"Page {i}"}]},
+                                                        "Tags": {"multi_select": [{"name": "a"}, {"name": "b"}]}}}
+        for i in range(3)
+    ],
+    "next_cursor": None,
+    "has_more": False,
+}
+
+
+def _parse(data=_RESPONSE):
+    return parse_lazy(json.dumps(data).encode(), StdlibCodec())
+
+
+def test_lazy_document_reads():
+    doc = _parse()
+    assert isinstance(doc, LazyDocument)
+    assert isinstance(doc["results"], LazyList)
+    assert doc["object"] == "list" and doc.get("next_cursor") is None and doc.get("missing", 1) == 1
+    assert list(doc) == ["object", "results", "next_cursor", "has_more"]
+    assert len(doc) == 4 and "results" in doc and "missing" not in doc
+    assert doc["results"][-1]["properties"]["Name"]["title"][0]["plain_text"] == "Page 2"
+    assert [page["id"] for page in doc["results"][1:]] == ["1", "2"]
+    with pytest.raises(KeyError):
+        doc["missing"]
+    with pytest.raises(IndexError):
+        doc["results"][3]
+
+    assert doc == _RESPONSE
+    assert doc["results"] == _RESPONSE["results"]
+    assert doc.to_dict() == materialize(doc) == _RESPONSE
+    assert isinstance(materialize(doc)["results"][0], dict)
+
+
+def test_lazy_document_modifications():
+    doc = _parse()
+    page = doc["results"][0]
+    # the decoded values are kept, so the nested objects can be modified in place
+    page["properties"]["Name"]["title"] = []
+    page["archived"] = True
+    del page["object"]
+    assert "object" not in page
+    with pytest.raises(KeyError):
+        del page["object"]
+    assert list(page) == ["id", "properties", "archived"]
+    assert doc["results"][0]["properties"]["Name"] == {"title": []}
+
+    expected = json.loads(json.dumps(_RESPONSE))
+    expected["results"][0]["properties"]["Name"]["title"] = []
+    expected["results"][0]["archived"] = True
+    del expected["results"][0]["object"]
+    assert materialize(doc) == expected
+    # lazy documents can be sent back in a request body
+    assert json.loads(StdlibCodec().dumps({"properties": page["properties"]})) == \
+           {"properties": expected["results"][0]["properties"]}
+
+
+def test_parse_lazy_without_simdjson(monkeypatch):
+    monkeypatch.setattr(documents, "simdjson", None)
+    doc = _parse()
+    assert type(doc) is dict
+    assert doc == _RESPONSE
+
+
+def test_client_lazy_responses_without_simdjson(monkeypatch):
+    monkeypatch.setattr(documents, "simdjson", None)
+    with pytest.warns(RuntimeWarning, match="pysimdjson"):
+        client = get_mocked_client(lambda request: httpx.Response(200, json=_RESPONSE), lazy_responses=True)
+    assert type(client.databases.query("database_id")) is dict
+
+
+def test_client_lazy_responses():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.method == "PATCH":
+            return httpx.Response(200, content=request.content)
+        return httpx.Response(200, json=_RESPONSE)
+
+    client = get_mocked_client(handler, lazy_responses=True)
+    rsp = client.databases.query("database_id")
+    assert isinstance(rsp, LazyDocument)
+    pages = list(client.databases.iter_query("database_id"))
+    assert [page["properties"]["Name"]["title"][0]["plain_text"] for page in pages] == ["Page 0", "Page 1", "Page 2"]
+
+    # a known page from a lazy response still detects no-op updates
+    page = pages[0]
+    body = {"properties": {"Tags": {"multi_select": [{"name": "a"}, {"name": "b"}]}}}
+    assert client.pages.update_many([(page["id"], body)], known_pages={page["id"]: page}) == [page]
+    assert requests[-1].method != "PATCH"
+
+    client = get_mocked_client(handler)
+    assert type(client.databases.query("database_id")) is dict
+
+
+@pytest.mark.asyncio
+async def test_async_client_lazy_responses():
+    client = get_mocked_client(lambda request: httpx.Response(200, json=_RESPONSE), AsyncClient,
+                               lazy_responses=True)
+    ids = [page["id"] async for page in client.databases.iter_query("database_id")]
+    assert ids == ["0", "1", "2"]
@@ -0,0 +1,100 @@
+import asyncio
+
+import httpx
+import pytest
+
+from notionx import AsyncClient
+from notionx.hedging import HedgingPolicy
+from tests.helpers import get_mocked_client
+
+
+def test_hedging_policy():
+    with pytest.raises(ValueError):
+        HedgingPolicy(100)
+    with pytest.raises(ValueError):
+        HedgingPolicy(95, budget=2)
+
+    policy = HedgingPolicy(90, budget=0.5, min_samples=10)
+    assert policy.hedge_delay() is None
+    for latency in range(1, 11):
+        policy.record(latency / 100)
+    assert policy.hedge_delay() == 0.09
+
+    # every request earns half a hedge
+    assert policy.try_hedge()
+    assert not policy.try_hedge()
+    policy.hedge_delay()
+    assert not policy.try_hedge()
+    policy.hedge_delay()
+    assert policy.try_hedge()
+
+
+def test_hedging_is_async_only():
+    with pytest.raises(ValueError):
+        get_mocked_client(lambda request: httpx.Response(200, json={}), hedge_percentile=95)
+
+
+class _SlowFirstTransport(httpx.AsyncBaseTransport):
+    """ Answers the first request of every `slow_every` requests after `slow_delay` seconds. """
+
+    def __init__(self, slow_every: int, slow_delay: float):
+        self.slow_every = slow_every
+        self.slow_delay = slow_delay
+        self.paths = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.paths.append(request.url.path)
+        if len(self.paths) % self.slow_every == 0:
+            await asyncio.sleep(self.slow_delay)
+        else:
+            await asyncio.sleep(0.005)
+        return httpx.Response(200, json={"object": "page", "id": str(len(self.paths))})
+
+
+@pytest.mark.asyncio
+async def test_async_client_hedging():
+    client = AsyncClient(auth_token="fake_token", hedge_percentile=50, hedge_budget=1)
+    transport = _SlowFirstTransport(slow_every=25, slow_delay=1)
+    client._http_client = client._make_http_client(transport=transport)
+    # no hedge during the warm-up, whose latencies jitter around the median
+    client.hedging.budget = 0
+    for _ in range(24):
+        await client.pages.retrieve("abc")
+    assert len(transport.paths) == 24
+    client.hedging.budget = 1
+
+    # the 25th request is slow, it is hedged and the hedge answers first
+    page = await asyncio.wait_for(client.pages.retrieve("abc"), 0.5)
+    assert page["id"] == "26" and len(transport.paths) == 26
+
+    # writes are never hedged
+    transport.slow_every = 1
+    transport.slow_delay = 0.05
+    await client.pages.update("abc", archived=True)
+    assert len(transport.paths) == 27
+
+
+def _hedging_client(transport: httpx.AsyncBaseTransport, **options) -> AsyncClient:
+    """ A client hedging every request still in flight after 10ms. """
+    client = AsyncClient(auth_token="fake_token", hedge_percentile=50, hedge_budget=1, **options)
+    client._http_client = client._make_http_client(transport=transport)
+    client.hedging = HedgingPolicy(50, budget=1, min_samples=1)
+    client.hedging.record(0.01)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_async_client_hedging_needs_a_free_token():
+    transport = _SlowFirstTransport(slow_every=1, slow_delay=0.3)
+    client = _hedging_client(transport, rate_limit_per_second=2, rate_limit_burst=1)
+    # the bucket has no token left for the hedge, the request is not delayed by waiting for one
+    start = asyncio.get_running_loop().time()
+    await client.pages.retrieve("abc")
+    assert asyncio.get_running_loop().time() - start < 0.45
+    assert len(transport.paths) == 1
+
+    # with a free token, the slow request is hedged
+    transport = _SlowFirstTransport(slow_every=1, slow_delay=0.3)
+    client = _hedging_client(transport, rate_limit_per_second=2, rate_limit_burst=2)
+    await client.pages.retrieve("abc")
+    assert len(transport.paths) == 2
@@ -0,0 +1,92 @@
+import httpx
+import pytest
+
+from notionx import AsyncClient, ObjectNotFoundError
+from notionx.hooks import RequestMetrics
+from tests.helpers import get_mocked_client
+
+_PAGE = {"object": "page", "id": "abc", "properties": {}}
+_USERS = {"object": "list", "results": [{"id": "0"}, {"id": "1"}], "has_more": False, "next_cursor": None}
+
+
+def _json_bytes(body) -> bytes:
+    return httpx.Response(200, json=body).content
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/v1/users":
+        return httpx.Response(200, json=_USERS)
+    if request.url.path.endswith("/missing"):
+        return httpx.Response(404, json={"object": "error", "status": 404, "code": "object_not_found",
+                                         "message": ""})
+    return httpx.Response(200, json=_PAGE)
+
+
+def test_request_hooks():
+    metrics = []
+    client = get_mocked_client(_handler, request_hooks=[metrics.append], rate_limit_per_second=20,
+                               rate_limit_burst=1)
+    client.pages.retrieve("abc")
+    client.pages.update("abc", archived=True)
+    with pytest.raises(ObjectNotFoundError):
+        client.pages.retrieve("missing")
+
+    retrieved, updated, missing = metrics
+    assert isinstance(retrieved, RequestMetrics)
+    assert (retrieved.method, retrieved.endpoint, retrieved.status, retrieved.error, retrieved.attempts) == \
+           ("GET", "pages/{id}", 200, None, 1)
+    assert retrieved.request_bytes == 0 and retrieved.response_bytes == len(_json_bytes(_PAGE))
+    assert retrieved.network_ms > 0 and retrieved.decode_ms > 0
+    assert retrieved.total_ms >= retrieved.queue_ms + retrieved.network_ms + retrieved.decode_ms
+
+    assert (updated.method, updated.endpoint, updated.status) == ("PATCH", "pages/{id}", 200)
+    assert updated.request_bytes == len(b'{"archived":true}')
+    # the rate limit let the update through 50ms after the retrieval
+    assert updated.queue_ms > 30
+
+    assert (missing.status, missing.error, missing.attempts) == (404, "ObjectNotFoundError", 1)
+
+
+def test_request_hooks_count_attempts():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(503, json={"object": "error", "status": 503, "code": "service_unavailable",
+                                             "message": ""})
+        return _handler(request)
+
+    metrics = []
+    client = get_mocked_client(handler, request_hooks=[metrics.append], max_retries=1, retry_backoff_ms=1,
+                               cache_ttl_ms={"pages/{id}": 60_000})
+    client.pages.retrieve("abc")
+    client.pages.retrieve("abc")
+    assert [(m.status, m.attempts) for m in metrics] == [(200, 2), (None, 0)]  # the second one is cached
+    assert metrics[1].response_bytes == metrics[0].response_bytes
+
+
+def test_request_hooks_streamed_requests():
+    metrics = []
+    client = get_mocked_client(_handler, request_hooks=[metrics.append], stream_results=True)
+    assert len(list(client.users.iter_list())) == 2
+    streamed, = metrics
+    assert (streamed.endpoint, streamed.status, streamed.attempts) == ("users", 200, 1)
+    assert streamed.response_bytes == len(_json_bytes(_USERS))
+    assert streamed.decode_ms > 0
+
+
+@pytest.mark.asyncio
+async def test_async_request_hooks():
+    metrics = []
+    client = get_mocked_client(_handler, AsyncClient, request_hooks=[metrics.append], hedge_percentile=50)
+    await client.pages.retrieve("abc")
+    with pytest.raises(ObjectNotFoundError):
+        await client.pages.retrieve("missing")
+    assert [(m.endpoint, m.status, m.error, m.attempts) for m in metrics] == \
+           [("pages/{id}", 200, None, 1), ("pages/{id}", 404, "ObjectNotFoundError", 1)]
+
+    metrics.clear()
+    client = get_mocked_client(_handler, AsyncClient, request_hooks=[metrics.append], stream_results=True)
+    assert len([user async for user in client.users.iter_list()]) == 2
+    assert metrics[0].response_bytes == len(_json_bytes(_USERS))
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from notionx import AsyncClient, LocalValidationError
+from notionx.pagination import iterate_paginated_api, async_iterate_paginated_api
+from tests.helpers import get_mocked_client
+
+
+def _paginated_handler(total: int = 7, page_size: int = 3):
+    """ Serves `total` results split into pages of `page_size` results, the cursor is the index of the first result.
+    The cursor is read from the query string for GET requests and from the body for POST requests.
+    """
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.method == "GET":
+            cursor = request.url.params.get("start_cursor")
+        else:
+            cursor = json.loads(request.content or b"{}").get("start_cursor")
+        start = int(cursor or 0)
+        end = min(start + page_size, total)
+        return httpx.Response(200, json={
+            "object": "list",
+            "results": [{"object": "page", "id": str(i)} for i in range(start, end)],
+            "next_cursor": str(end) if end < total else None,
+            "has_more": end < total,
+        })
+
+    return handler, requests
+
+
+def test_iterate_paginated_api():
+    pages = {
+        None: {"object": "list", "results": [1, 2], "next_cursor": "a", "has_more": True},
+        "a": {"object": "list", "results": [3], "next_cursor": None, "has_more": False},
+    }
+    assert list(iterate_paginated_api(pages.__getitem__)) == [1, 2, 3]
+    assert list(iterate_paginated_api(pages.__getitem__, "a")) == [3]
+
+    # a response which is not a list is yielded as is
+    item = {"object": "property_item", "type": "number", "number": 1}
+    assert list(iterate_paginated_api(lambda cursor: item)) == [item]
+
+
+def test_iter_query():
+    handler, requests = _paginated_handler()
+    client = get_mocked_client(handler)
+    pages = client.databases.iter_query("database_id", filter={"property": "Done", "checkbox": {"equals": True}})
+    # nothing is requested before the iteration starts
+    assert not requests
+
+    assert [page["id"] for page in pages] == [str(i) for i in range(7)]
+    assert len(requests) == 3
+    for request in requests:
+        assert request.url.path.endswith("/databases/database_id/query")
+        assert json.loads(request.content)["filter"] == {"property": "Done", "checkbox": {"equals": True}}
+
+
+def test_iter_consumes_pages_lazily():
+    handler, requests = _paginated_handler()
+    client = get_mocked_client(handler)
+    users = client.users.iter_list(page_size=3)
+    for _ in range(3):
+        next(users)
+    assert len(requests) == 1
+    next(users)
+    assert len(requests) == 2
+    assert requests[1].url.params["start_cursor"] == "3"
+    assert requests[1].url.params["page_size"] == "3"
+
+
+@pytest.mark.parametrize("make_iterator", [
+    lambda client: client.blocks.children.iter_list("block_id"),
+    lambda client: client.comments.iter_list({"block_id": "block_id"}),
+    lambda client: client.search.iter(query="test"),
+    lambda client: client.pages.properties.iter_retrieve("page_id", "property_id"),
+])
+def test_iter_endpoints(make_iterator):
+    handler, requests = _paginated_handler()
+    client = get_mocked_client(handler)
+    assert len(list(make_iterator(client))) == 7
+    assert len(requests) == 3
+
+
+def test_iter_start_cursor_and_validation():
+    handler, requests = _paginated_handler()
+    client = get_mocked_client(handler)
+    assert [page["id"] for page in client.databases.iter_query("database_id", start_cursor="5")] == ["5", "6"]
+
+    # the parameters are validated when the iterator is created
+    with pytest.raises(LocalValidationError):
+        client.databases.iter_query("database_id", invalid_param=1)
+    with pytest.raises(LocalValidationError):
+        client.comments.iter_list()
+
+
+@pytest.mark.asyncio
+async def test_async_iter_query():
+    handler, requests = _paginated_handler()
+    client = get_mocked_client(handler, AsyncClient)
+    ids = [page["id"] async for page in client.databases.iter_query("database_id")]
+    assert ids == [str(i) for i in range(7)]
+    assert len(requests) == 3
+
+    ids = [user["id"] async for user in client.users.iter_list(start_cursor="6")]
+    assert ids == ["6"]
+
+
+def _slow_pages(count: int, delay: float):
+    calls = []
+
+    def fetch_page(cursor):
+        calls.append(cursor)
+        time.sleep(delay)
+        index = int(cursor or 0)
+        return {"object": "list", "results": [index],
+                "next_cursor": str(index + 1), "has_more": index + 1 < count}
+
+    async def async_fetch_page(cursor):
+        calls.append(cursor)
+        await asyncio.sleep(delay)
+        index = int(cursor or 0)
+        return {"object": "list", "results": [index],
+                "next_cursor": str(index + 1), "has_more": index + 1 < count}
+
+    return fetch_page, async_fetch_page, calls
+
+
+def test_prefetch_overlaps_requests_and_processing():
+    fetch_page, _, calls = _slow_pages(4, 0.05)
+    start = time.monotonic()
+    results = []
+    for result in iterate_paginated_api(fetch_page, prefetch=1):
+        time.sleep(0.05)  # processing takes as long as the round trip
+        results.append(result)
+    assert results == [0, 1, 2, 3]
+    # serially it would take 8 * 0.05s
+    assert time.monotonic() - start < 7 * 0.05
+
+
+def test_prefetch_depth_and_early_close():
+    fetch_page, _, calls = _slow_pages(100, 0.01)
+    results = iterate_paginated_api(fetch_page, prefetch=2)
+    assert next(results) == 0
+    time.sleep(0.1)
+    # the producer runs at most 2 pages ahead of the consumer
+    assert len(calls) == 3
+    results.close()
+    time.sleep(0.05)
+    assert len(calls) <= 4
+
+
+def test_prefetch_propagates_errors():
+    def fetch_page(cursor):
+        if cursor:
+            raise ValueError("broken page")
+        return {"object": "list", "results": [0], "next_cursor": "1", "has_more": True}
+
+    results = iterate_paginated_api(fetch_page, prefetch=1)
+    assert next(results) == 0
+    with pytest.raises(ValueError, match="broken page"):
+        next(results)
+
+
+@pytest.mark.asyncio
+async def test_async_prefetch_overlaps_requests_and_processing():
+    _, fetch_page, calls = _slow_pages(4, 0.05)
+    start = time.monotonic()
+    results = []
+    async for result in async_iterate_paginated_api(fetch_page, prefetch=1):
+        await asyncio.sleep(0.05)
+        results.append(result)
+    assert results == [0, 1, 2, 3]
+    assert time.monotonic() - start < 7 * 0.05
+
+
+@pytest.mark.asyncio
+async def test_async_prefetch_depth_and_early_close():
+    _, fetch_page, calls = _slow_pages(100, 0.01)
+    results = async_iterate_paginated_api(fetch_page, prefetch=2)
+    assert await results.__anext__() == 0
+    await asyncio.sleep(0.1)
+    assert len(calls) == 3
+    await results.aclose()
+    await asyncio.sleep(0.05)
+    assert len(calls) == 3
+
+
+def test_iter_prefetch_option():
+    handler, requests = _paginated_handler()
+    client = get_mocked_client(handler, pagination_prefetch=2)
+    users = client.users.iter_list()
+    assert next(users)["id"] == "0"
+    time.sleep(0.1)
+    assert len(requests) == 3
+    assert [user["id"] for user in users] == [str(i) for i in range(1, 7)]
+
+    # per-call override
+    handler, requests = _paginated_handler()
+    client = get_mocked_client(handler, pagination_prefetch=2)
+    users = client.users.iter_list(prefetch=0)
+    next(users)
+    time.sleep(0.1)
+    assert len(requests) == 1
@@ -0,0 +1,170 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from notionx import ClientPool, AsyncClientPool, ClientOptions, CircuitOpenError
+
+
+def _make_pool(pool_cls, tokens, handler, **options):
+    pool = pool_cls([ClientOptions(auth_token=token, **options) for token in tokens])
+    for client in pool.clients:
+        client._http_client = client._make_http_client(transport=httpx.MockTransport(handler))
+    return pool
+
+
+def _page_handler(tokens):
+    def handler(request: httpx.Request) -> httpx.Response:
+        tokens.append(request.headers["Authorization"].split()[-1])
+        return httpx.Response(200, json={"object": "page", "id": request.url.path.rsplit("/", 1)[-1]})
+
+    return handler
+
+
+def test_client_pool_options():
+    with pytest.raises(ValueError):
+        ClientPool([])
+    pool = ClientPool([{"auth_token": "a", "bulk_concurrency": 2}, {"auth_token": "b", "bulk_concurrency": 3}])
+    assert pool.options.bulk_concurrency == 5
+    assert [client.options.auth_token for client in pool.clients] == ["a", "b"]
+
+
+def test_client_pool_round_robin():
+    tokens = []
+    pool = _make_pool(ClientPool, ["a", "b", "c"], _page_handler(tokens))
+    for _ in range(6):
+        assert pool.pages.retrieve("abc")["id"] == "abc"
+    # the idle clients are picked in turn
+    assert tokens == ["a", "b", "c", "a", "b", "c"]
+    assert pool.in_flight == [0, 0, 0]
+
+
+def test_client_pool_write_stickiness():
+    tokens = []
+    pool = _make_pool(ClientPool, ["a", "b"], _page_handler(tokens))
+    pool.pages.update("abc", archived=True)
+    pool.pages.retrieve("abc")
+    pool.pages.retrieve("abc")
+    pool.pages.retrieve("def")
+    # the reads of the page written by `a` stay on `a`, the other reads are spread
+    assert tokens == ["a", "a", "a", "b"]
+
+    tokens.clear()
+    pool = _make_pool(ClientPool, ["a", "b"], _page_handler(tokens))
+    pool.sticky_ms = 0
+    pool.pages.update("abc", archived=True)
+    pool.pages.retrieve("abc")
+    assert tokens == ["a", "b"]
+
+
+def test_client_pool_skips_open_circuits():
+    tokens = []
+    pool = _make_pool(ClientPool, ["a", "b"], _page_handler(tokens), circuit_failure_rate=0.5, circuit_window=1)
+    breaker = pool.clients[0].circuit_breaker
+    breaker.record(True)
+    assert breaker.state == "open"
+    for _ in range(3):
+        pool.pages.retrieve("abc")
+    assert tokens == ["b", "b", "b"]
+
+    pool.clients[1].circuit_breaker.record(True)
+    with pytest.raises(CircuitOpenError):
+        pool.pages.retrieve("abc")
+
+
+def test_client_pool_bulk_methods():
+    tokens = []
+    pool = _make_pool(ClientPool, ["a", "b"], _page_handler(tokens), bulk_concurrency=2)
+    pages = pool.pages.update_many([(str(i), {"archived": True}) for i in range(8)])
+    assert [page["id"] for page in pages] == [str(i) for i in range(8)]
+    assert sorted(set(tokens)) == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_async_client_pool_least_loaded():
+    tokens = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        token = request.headers["Authorization"].split()[-1]
+        tokens.append(token)
+        # `a` answers slowly, the requests sent meanwhile go to `b`
+        await asyncio.sleep(0.1 if token == "a" else 0.001)
+        return httpx.Response(200, json={"object": "page", "id": "abc"})
+
+    pool = AsyncClientPool([ClientOptions(auth_token=token) for token in ["a", "b"]])
+    for client in pool.clients:
+        client._http_client = client._make_http_client(transport=httpx.MockTransport(handler))
+    async with pool:
+        slow = asyncio.ensure_future(pool.pages.retrieve("abc"))
+        await asyncio.sleep(0.01)
+        for _ in range(3):
+            await pool.pages.retrieve("abc")
+        assert pool.in_flight == [1, 0]
+        await slow
+    assert tokens == ["a", "b", "b", "b"]
+
+
+def _children_handler(tokens):
+    # the children of `root` come in three pages, `b1` has one page of children, the other blocks have none
+    def handler(request: httpx.Request) -> httpx.Response:
+        token = request.headers["Authorization"].split()[-1]
+        block_id = request.url.path.split("/")[-2]
+        if request.method == "PATCH":
+            tokens.append(token)
+            children = json.loads(request.content)["children"]
+            return httpx.Response(200, json={"object": "list", "next_cursor": None, "has_more": False, "results": [
+                {"object": "block", "id": f"{block_id}-{i}", "type": "paragraph", "has_children": False,
+                 "paragraph": {}} for i in range(len(children))]})
+        cursor = int(request.url.params.get("start_cursor", 0))
+        tokens.append((token, request.url.params.get("page_size")))
+        ids = [f"b{cursor}"] if block_id == "root" else []
+        has_more = block_id == "root" and cursor < 2
+        return httpx.Response(200, json={"object": "list", "next_cursor": str(cursor + 1) if has_more else None,
+                                         "has_more": has_more, "results": [
+                {"object": "block", "id": block_id, "type": "paragraph", "has_children": block_id == "b1",
+                 "paragraph": {}} for block_id in ids]})
+
+    return handler
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_client_pool_pins_iterations(stream):
+    tokens = []
+    pool = _make_pool(ClientPool, ["a", "b"], _children_handler(tokens), pagination_prefetch=1)
+    # the iterations are told apart by their page size
+    first = pool.blocks.children.iter_list("root", page_size=10, stream=stream)
+    assert next(first)["id"] == "b0"
+    second = pool.blocks.children.iter_list("root", page_size=20, stream=stream)
+    assert [block["id"] for block in second] == ["b0", "b1", "b2"]
+    assert [block["id"] for block in first] == ["b1", "b2"]
+    # the pages of an iteration are all requested with the token of the first one, whatever the other requests
+    assert sorted(tokens) == [("a", "10")] * 3 + [("b", "20")] * 3
+    assert pool.in_flight == [0, 0]
+
+
+def test_client_pool_pins_block_trees():
+    tokens = []
+    pool = _make_pool(ClientPool, ["a", "b"], _children_handler(tokens), bulk_concurrency=2)
+    tree = pool.blocks.fetch_tree("root")
+    assert [block["id"] for block in tree] == ["b0", "b1", "b2"]
+    assert len(tokens) == 4 and len({token for token, _ in tokens}) == 1
+
+    tokens.clear()
+    children = [{"type": "paragraph", "paragraph": {"rich_text": []}} for _ in range(250)]
+    blocks = pool.blocks.children.append_in_batches("root", children)
+    assert len(blocks) == 250
+    assert len(tokens) == 3 and len(set(tokens)) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_client_pool_pins_iterations():
+    tokens = []
+    pool = _make_pool(AsyncClientPool, ["a", "b"], _children_handler(tokens))
+
+    async def list_ids(page_size):
+        return [block["id"] async for block in pool.blocks.children.iter_list("root", page_size=page_size)]
+
+    assert await asyncio.gather(list_ids(10), list_ids(20)) == [["b0", "b1", "b2"]] * 2
+    assert sorted(tokens) == [("a", "10")] * 3 + [("b", "20")] * 3
+    await pool.close()
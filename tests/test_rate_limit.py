@@ -0,0 +1,101 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+import pytest
+
+from notionx import AsyncClient
+from notionx.rate_limit import TokenBucket, FileTokenBucket
+from tests.helpers import get_mocked_client
+
+
+def _users_list_handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"object": "list", "results": [], "has_more": False})
+
+
+def _acquire_tokens(path: str, count: int) -> None:
+    bucket = FileTokenBucket(path, rate=50, burst=1)
+    for _ in range(count):
+        bucket.acquire()
+
+
+def test_token_bucket_arguments():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+    with pytest.raises(ValueError):
+        TokenBucket(1, burst=0)
+
+
+def test_token_bucket_pacing():
+    """ The first `burst` tokens are free, the following ones are spaced by 1/rate seconds. """
+    bucket = TokenBucket(rate=50, burst=2)
+    start = time.monotonic()
+    for _ in range(2):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.02
+
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start >= 5 / 50 - 0.01
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_pacing_async():
+    bucket = TokenBucket(rate=50, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        await bucket.async_acquire()
+    assert time.monotonic() - start >= 5 / 50 - 0.01
+
+
+def test_client_rate_limit():
+    client = get_mocked_client(_users_list_handler, rate_limit_per_second=50, rate_limit_burst=1)
+    assert client._rate_limiter is not None
+    start = time.monotonic()
+    for _ in range(6):
+        client.users.list()
+    assert time.monotonic() - start >= 5 / 50 - 0.01
+
+    # rate limiting is disabled by default
+    assert get_mocked_client(_users_list_handler)._rate_limiter is None
+
+
+@pytest.mark.asyncio
+async def test_async_client_rate_limit():
+    client = get_mocked_client(_users_list_handler, AsyncClient, rate_limit_per_second=50, rate_limit_burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        await client.users.list()
+    assert time.monotonic() - start >= 5 / 50 - 0.01
+
+
+def test_file_token_bucket_is_shared(tmp_path):
+    """ The buckets using the same file share their tokens, whichever process they belong to. """
+    path = str(tmp_path / "bucket")
+    first, second = FileTokenBucket(path, rate=50, burst=2), FileTokenBucket(path, rate=50, burst=2)
+    start = time.monotonic()
+    first.acquire()
+    second.acquire()
+    assert time.monotonic() - start < 0.02
+    for _ in range(3):
+        first.acquire()
+        second.acquire()
+    assert time.monotonic() - start >= 6 / 50 - 0.01
+    first.close()
+
+    start = time.monotonic()
+    with ProcessPoolExecutor(3) as executor:
+        list(executor.map(_acquire_tokens, [path] * 3, [4] * 3))
+    assert time.monotonic() - start >= 11 / 50 - 0.01
+
+
+def test_client_shared_rate_limit(tmp_path):
+    client = get_mocked_client(_users_list_handler, rate_limit_per_second=50, rate_limit_burst=1,
+                               rate_limit_path=str(tmp_path / "bucket"))
+    assert isinstance(client._rate_limiter, FileTokenBucket)
+    client.users.list()
+    assert client._rate_limiter._fd is not None
+    client.close()  # releases the file of the bucket
+    assert client._rate_limiter._fd is None
+    # without `rate_limit_per_second`, the file is not used
+    assert get_mocked_client(_users_list_handler, rate_limit_path=str(tmp_path / "bucket"))._rate_limiter is None
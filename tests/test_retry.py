@@ -0,0 +1,129 @@
+import email.utils
+import time
+
+import httpx
+import pytest
+
+from notionx import AsyncClient, RateLimitedError, ServiceUnavailableError, InternalServerError, \
+    ObjectNotFoundError
+from notionx.retry import RetryPolicy, parse_retry_after, is_read_only
+from tests.helpers import get_mocked_client
+
+_RETRY_OPTIONS = {"max_retries": 3, "retry_backoff_ms": 1, "retry_max_backoff_ms": 5}
+
+
+def _flaky_handler(failures, status_code=503, err_code="service_unavailable", headers=None):
+    """ Fails with the given error for the first `failures` requests, then succeeds. """
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) <= failures:
+            return httpx.Response(status_code, headers=headers,
+                                  json={"object": "error", "status": status_code, "code": err_code, "message": ""})
+        return httpx.Response(200, json={"object": "list", "results": [], "has_more": False})
+
+    return handler, calls
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("", None),
+    ("3", 3.0),
+    ("0.5", 0.5),
+    ("-1", 0.0),
+    ("not a date", None),
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    value = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 25 <= parse_retry_after(value) <= 30
+
+
+@pytest.mark.parametrize("method, path, err, expected", [
+    ("get", "users", ServiceUnavailableError(), True),
+    ("delete", "blocks/abc", InternalServerError(), True),
+    ("post", "databases/abc/query", ServiceUnavailableError(), True),
+    ("post", "search", InternalServerError(), True),
+    ("post", "pages/", InternalServerError(), False),
+    ("patch", "pages/abc", ServiceUnavailableError(), False),
+    ("post", "pages/", RateLimitedError(), True),
+    ("get", "users", ObjectNotFoundError(), False),
+])
+def test_retry_policy_is_retryable(method, path, err, expected):
+    assert RetryPolicy.is_retryable(method, path, err) is expected
+
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("GET", "pages/abc", True),
+    ("post", "databases/abc/query", True),
+    ("post", "search", True),
+    ("post", "pages", False),
+    ("patch", "databases/abc", False),
+    ("delete", "blocks/abc", False),
+])
+def test_is_read_only(method, path, expected):
+    assert is_read_only(method, path) is expected
+
+
+def test_retry_policy_next_delay():
+    policy = RetryPolicy(max_retries=2, backoff_ms=100, max_backoff_ms=150, max_elapsed_ms=1_000)
+    assert 0 <= policy.next_delay("get", "users", ServiceUnavailableError(), 0, 0) <= 0.1
+    assert 0 <= policy.next_delay("get", "users", ServiceUnavailableError(), 1, 0) <= 0.15
+    # retries exhausted
+    assert policy.next_delay("get", "users", ServiceUnavailableError(), 2, 0) is None
+    # Retry-After wins over the backoff
+    assert policy.next_delay("get", "users", RateLimitedError(), 0, 0, retry_after=0.5) == 0.5
+    # the delay would exceed the time budget
+    assert policy.next_delay("get", "users", RateLimitedError(), 0, 0.8, retry_after=0.5) is None
+    # disabled by default
+    assert RetryPolicy().next_delay("get", "users", RateLimitedError(), 0, 0) is None
+
+
+def test_client_retries_transient_errors():
+    handler, calls = _flaky_handler(2)
+    client = get_mocked_client(handler, **_RETRY_OPTIONS)
+    assert client.users.list() == {"object": "list", "results": [], "has_more": False}
+    assert len(calls) == 3
+
+    # gives up after `max_retries` retries
+    handler, calls = _flaky_handler(10)
+    client = get_mocked_client(handler, **_RETRY_OPTIONS)
+    with pytest.raises(ServiceUnavailableError):
+        client.users.list()
+    assert len(calls) == 4
+
+    # no retries by default
+    handler, calls = _flaky_handler(1)
+    client = get_mocked_client(handler)
+    with pytest.raises(ServiceUnavailableError):
+        client.users.list()
+    assert len(calls) == 1
+
+
+def test_client_does_not_retry_unsafe_requests():
+    handler, calls = _flaky_handler(1, 500, "internal_server_error")
+    client = get_mocked_client(handler, **_RETRY_OPTIONS)
+    with pytest.raises(InternalServerError):
+        client.pages.create(parent={"page_id": "abc"}, properties={})
+    assert len(calls) == 1
+
+
+def test_client_honors_retry_after():
+    handler, calls = _flaky_handler(1, 429, "rate_limited", headers={"Retry-After": "0.2"})
+    client = get_mocked_client(handler, **_RETRY_OPTIONS)
+    start = time.monotonic()
+    client.pages.create(parent={"page_id": "abc"}, properties={})
+    assert time.monotonic() - start >= 0.2
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_client_retries_transient_errors():
+    handler, calls = _flaky_handler(2, 504, "gateway_timeout")
+    client = get_mocked_client(handler, AsyncClient, **_RETRY_OPTIONS)
+    assert await client.users.list() == {"object": "list", "results": [], "has_more": False}
+    assert len(calls) == 3
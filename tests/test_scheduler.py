@@ -0,0 +1,100 @@
+import asyncio
+
+import httpx
+import pytest
+
+from notionx import AsyncClient
+from notionx.rate_limit import TokenBucket
+from notionx.scheduler import PriorityScheduler, priority, current_priority
+from tests.helpers import get_mocked_client
+
+
+def test_priority_context():
+    assert current_priority() is None
+    with priority("bulk"):
+        with priority("interactive"):
+            assert current_priority() == "interactive"
+        assert current_priority() == "bulk"
+    assert current_priority() is None
+    with pytest.raises(ValueError):
+        with priority("urgent"):
+            pass
+
+
+async def _serve(scheduler: PriorityScheduler, lanes, served):
+    async def request(index, lane):
+        await scheduler.acquire(lane)
+        served.append(index)
+
+    await asyncio.gather(*(request(index, lane) for index, lane in enumerate(lanes)))
+
+
+@pytest.mark.asyncio
+async def test_priority_scheduler():
+    scheduler = PriorityScheduler(TokenBucket(rate=500, burst=1), min_share=0)
+    served = []
+    # the requests waiting together are served by lane, then in order
+    await _serve(scheduler, ["bulk", "bulk", "default", "interactive", "bulk", "interactive"], served)
+    assert served == [3, 5, 2, 0, 1, 4]
+
+
+@pytest.mark.asyncio
+async def test_priority_scheduler_min_share():
+    scheduler = PriorityScheduler(TokenBucket(rate=1000, burst=1), min_share=0.25)
+    served = []
+    await _serve(scheduler, ["interactive"] * 9 + ["bulk"] * 2, served)
+    # the bulk lane gets one token every four tokens handed out to the interactive lane
+    assert served == [0, 1, 2, 3, 9, 4, 5, 6, 7, 10, 8]
+
+    with pytest.raises(ValueError):
+        PriorityScheduler(TokenBucket(1), min_share=0.6)
+
+
+@pytest.mark.asyncio
+async def test_priority_scheduler_cancelled_waiter():
+    scheduler = PriorityScheduler(TokenBucket(rate=100, burst=1))
+    await scheduler.acquire()
+    cancelled = asyncio.ensure_future(scheduler.acquire("interactive"))
+    waiting = asyncio.ensure_future(scheduler.acquire("bulk"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.wait_for(waiting, 1)
+    assert scheduler.waiting("interactive") == 0
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"object": "list", "results": [], "has_more": False})
+
+
+def test_priority_scheduling_options():
+    with pytest.raises(ValueError):
+        get_mocked_client(_handler, rate_limit_per_second=10, priority_scheduling=True)
+    with pytest.raises(ValueError):
+        get_mocked_client(_handler, AsyncClient, priority_scheduling=True)
+    with pytest.raises(ValueError):
+        get_mocked_client(_handler, AsyncClient, rate_limit_per_second=10, priority_scheduling=True,
+                          endpoint_priorities={"search": "urgent"})
+
+
+@pytest.mark.asyncio
+async def test_async_client_priority_scheduling():
+    paths = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        return _handler(request)
+
+    client = get_mocked_client(handler, AsyncClient, rate_limit_per_second=200, rate_limit_burst=1,
+                               priority_scheduling=True, priority_min_share=0,
+                               endpoint_priorities={"databases/{id}/query": "bulk"})
+    assert client._priority_lane("databases/abc/query") == "bulk"
+    with priority("interactive"):
+        assert client._priority_lane("databases/abc/query") == "interactive"
+
+    async def interactive_search():
+        with priority("interactive"):
+            await client.search()
+
+    await asyncio.gather(*[client.databases.query("abc") for _ in range(3)], client.users.list(),
+                         interactive_search())
+    assert paths == ["/v1/search", "/v1/users"] + ["/v1/databases/abc/query"] * 3
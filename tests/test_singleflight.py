@@ -0,0 +1,238 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from notionx import AsyncClient, ObjectNotFoundError, DeadlineExceededError
+from notionx.deadline import deadline, check_deadline
+from notionx.singleflight import SingleFlight, AsyncSingleFlight
+from tests.helpers import get_mocked_client
+
+
+def test_single_flight():
+    single_flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def slow_call():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return {"id": "abc"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(single_flight.do("key", slow_call)))
+               for _ in range(5)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(results) == 5 and all(result is results[0] for result in results)
+
+    # the key is released once the call is done
+    single_flight.do("key", slow_call)
+    assert len(calls) == 2
+
+    def failing_call():
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError, match="failed"):
+        single_flight.do("key", failing_call)
+    assert not single_flight._calls
+
+
+@pytest.mark.asyncio
+async def test_async_single_flight():
+    single_flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow_call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"id": "abc"}
+
+    results = await asyncio.gather(*(single_flight.do("key", slow_call) for _ in range(5)),
+                                   single_flight.do("other_key", slow_call))
+    assert len(calls) == 2
+    assert all(result is results[0] for result in results[:5])
+    assert not single_flight._calls
+
+    # cancelling a caller does not cancel the shared call for the others
+    first = asyncio.ensure_future(single_flight.do("key", slow_call))
+    second = asyncio.ensure_future(single_flight.do("key", slow_call))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert await second == {"id": "abc"}
+    assert len(calls) == 3
+
+
+def _slow_handler(delay: float):
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        await asyncio.sleep(delay)
+        if "missing" in request.url.path:
+            return httpx.Response(404, json={"object": "error", "status": 404, "code": "object_not_found",
+                                             "message": ""})
+        return httpx.Response(200, json={"object": "page", "id": request.url.path.rsplit("/", 1)[-1]})
+
+    return handler, requests
+
+
+@pytest.mark.asyncio
+async def test_async_client_coalesces_identical_gets():
+    handler, requests = _slow_handler(0.05)
+    client = get_mocked_client(handler, AsyncClient, coalesce_requests=True)
+    pages = await asyncio.gather(*(client.pages.retrieve("abc") for _ in range(5)), client.pages.retrieve("def"),
+                                 client.pages.retrieve("abc", filter_properties=["title"]))
+    assert [page["id"] for page in pages] == ["abc"] * 5 + ["def", "abc"]
+    assert len(requests) == 3
+
+    # errors are shared too
+    results = await asyncio.gather(*(client.pages.retrieve("missing") for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ObjectNotFoundError) for result in results)
+    assert len(requests) == 4
+
+    # only GET requests are coalesced
+    await asyncio.gather(*(client.pages.update("abc", archived=True) for _ in range(2)))
+    assert len(requests) == 6
+
+    # disabled by default
+    handler, requests = _slow_handler(0.01)
+    client = get_mocked_client(handler, AsyncClient)
+    await asyncio.gather(*(client.pages.retrieve("abc") for _ in range(3)))
+    assert len(requests) == 3
+
+
+def test_client_coalesces_identical_gets():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        time.sleep(0.05)
+        return httpx.Response(200, json={"object": "user", "id": "abc"})
+
+    client = get_mocked_client(handler, coalesce_requests=True)
+    users = client._map_concurrently(lambda _: client.users.retrieve("abc"), range(4), 4)
+    assert users == [{"object": "user", "id": "abc"}] * 4
+    assert len(requests) == 1
+
+
+def test_single_flight_follower_deadline():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.3)
+        return "result"
+
+    leader = threading.Thread(target=flight.do, args=("key", slow))
+    leader.start()
+    started.wait()
+    start = time.monotonic()
+    # the follower stops waiting at its own deadline, the leader has none
+    with deadline(50):
+        with pytest.raises(DeadlineExceededError):
+            flight.do("key", slow)
+    assert time.monotonic() - start < 0.2
+    leader.join()
+
+
+@pytest.mark.asyncio
+async def test_async_single_flight_follower_deadline():
+    flight = AsyncSingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.3)
+        return "result"
+
+    async def follower():
+        with deadline(50):
+            return await flight.do("key", slow)
+
+    leader = asyncio.ensure_future(flight.do("key", slow))
+    await asyncio.sleep(0)
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        await follower()
+    assert time.monotonic() - start < 0.2
+    # the shared call goes on for the leader
+    assert await leader == "result"
+
+
+def test_single_flight_leader_deadline():
+    flight = SingleFlight()
+    started = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(None)
+        started.set()
+        time.sleep(0.3)
+        check_deadline()
+        return "result"
+
+    def leader():
+        with deadline(100):
+            with pytest.raises(DeadlineExceededError):
+                flight.do("key", slow)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    started.wait()
+    # the deadline of the leader is not the one of the follower, which makes the call again
+    assert flight.do("key", slow) == "result"
+    thread.join()
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_single_flight_leader_deadline():
+    flight = AsyncSingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.3)
+        check_deadline()
+        return "result"
+
+    async def leader():
+        with deadline(100):
+            return await flight.do("key", slow)
+
+    first = asyncio.ensure_future(leader())
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(flight.do("key", slow))
+    with pytest.raises(DeadlineExceededError):
+        await first
+    # the deadline of the leader is not the one of the follower, which makes the call again
+    assert await second == "result"
+
+
+@pytest.mark.asyncio
+async def test_async_client_coalesced_request_within_the_deadline():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"object": "user", "id": "abc"})
+
+    client = get_mocked_client(handler, AsyncClient, coalesce_requests=True,
+                               rate_limit_per_second=2, rate_limit_burst=1)
+    await client.users.retrieve("abc")
+    start = time.monotonic()
+    with deadline(100):
+        # the next token is due in 0.5s, after the deadline
+        with pytest.raises(DeadlineExceededError):
+            await client.users.retrieve("abc")
+    assert time.monotonic() - start < 0.2
+    await asyncio.sleep(0.6)
+    # the shared request has given up at the deadline too, rather than being sent once the token is due
+    assert len(requests) == 1
+    assert not client._single_flight._calls
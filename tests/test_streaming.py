@@ -0,0 +1,134 @@
+import json
+
+import httpx
+import pytest
+
+from notionx import AsyncClient
+from notionx.codec import StdlibCodec
+from notionx.streaming import ResultsStreamParser
+from tests.helpers import get_mocked_client
+
+_RESULTS = [
+    {"object": "page", "id": "0", "title": [{"plain_text": 'Quotes " and \\\\ backslashes \\" {[ ]}'}]},
+    {"object": "page", "id": "1", "tags": [[], [{}], {"nested": [1, 2, {"a": None}]}], "emoji": "🥬 羽衣甘蓝"},
+    {"object": "page", "id": "2", "properties": {}},
+]
+_RESPONSE = {"object": "list", "results": _RESULTS, "next_cursor": None, "has_more": False, "type": "page",
+             "page": {"results": ["not the results"]}}
+
+
+def _feed_in_chunks(data: bytes, size: int):
+    parser = ResultsStreamParser(StdlibCodec())
+    results = []
+    for i in range(0, len(data), size):
+        results.extend(parser.feed(data[i:i + size]))
+    return results, parser.close()
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 100_000])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_results_stream_parser(size, indent):
+    data = json.dumps(_RESPONSE, indent=indent, ensure_ascii=False).encode()
+    results, envelope = _feed_in_chunks(data, size)
+    assert results == _RESULTS
+    assert envelope == {**_RESPONSE, "results": []}
+
+
+def test_results_stream_parser_edge_cases():
+    # the results are not the first field
+    data = json.dumps({"has_more": True, "next_cursor": "abc", "results": _RESULTS, "object": "list"}).encode()
+    assert _feed_in_chunks(data, 5) == (_RESULTS, {"has_more": True, "next_cursor": "abc", "results": [],
+                                                   "object": "list"})
+    # a response without results is kept as a whole
+    item = {"object": "property_item", "type": "number", "number": 1}
+    assert _feed_in_chunks(json.dumps(item).encode(), 3) == ([], item)
+    # the results are yielded as soon as they are complete
+    parser = ResultsStreamParser(StdlibCodec())
+    data = json.dumps(_RESPONSE).encode()
+    end_of_first = data.index(b'"id": "1"')
+    assert parser.feed(data[:end_of_first]) == _RESULTS[:1]
+    with pytest.raises(ValueError, match="incomplete"):
+        parser.close()
+
+
+def _streaming_handler(pages: int = 3, page_size: int = 4, chunk_size: int = 16):
+    """ Serves paginated results, the body of each response being sent in small chunks.
+    `sent` records the offset of every chunk sent, and None at the end of each body.
+    """
+    sent = []
+
+    def chunks(data: bytes):
+        for i in range(0, len(data), chunk_size):
+            sent.append(i)
+            yield data[i:i + chunk_size]
+        sent.append(None)
+
+    def page_body(request: httpx.Request) -> bytes:
+        start = int(json.loads(request.content or b"{}").get("start_cursor") or 0)
+        end = start + page_size
+        return json.dumps({
+            "object": "list",
+            "results": [{"object": "page", "id": str(i)} for i in range(start, end)],
+            "next_cursor": str(end) if end < pages * page_size else None,
+            "has_more": end < pages * page_size,
+        }).encode()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=chunks(page_body(request)))
+
+    async def async_chunks(data: bytes):
+        for chunk in chunks(data):
+            yield chunk
+
+    def async_handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=async_chunks(page_body(request)))
+
+    return handler, async_handler, sent
+
+
+def test_iter_query_stream():
+    handler, _, sent = _streaming_handler()
+    client = get_mocked_client(handler)
+    pages = client.databases.iter_query("database_id", stream=True)
+    assert next(pages)["id"] == "0"
+    # the first result is yielded before the whole page has been received
+    assert None not in sent
+    assert [page["id"] for page in pages] == [str(i) for i in range(1, 12)]
+    assert sent.count(None) == 3
+
+    # the client option
+    handler, _, sent = _streaming_handler()
+    client = get_mocked_client(handler, stream_results=True)
+    assert len(list(client.search.iter(query="test"))) == 12
+    assert len(list(client.search.iter(query="test", stream=False))) == 12
+
+
+def test_stream_retries_failed_requests():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(503, json={"object": "error", "status": 503, "code": "service_unavailable",
+                                             "message": ""})
+        return httpx.Response(200, json={"object": "list", "results": [{"id": "0"}], "has_more": False})
+
+    client = get_mocked_client(handler, stream_results=True, max_retries=1, retry_backoff_ms=1)
+    assert list(client.users.iter_list()) == [{"id": "0"}]
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_iter_query_stream():
+    _, handler, sent = _streaming_handler()
+    client = get_mocked_client(handler, AsyncClient, stream_results=True)
+    pages = client.databases.iter_query("database_id")
+    assert (await pages.__anext__())["id"] == "0"
+    assert None not in sent
+    ids = [page["id"] async for page in pages]
+    assert ids == [str(i) for i in range(1, 12)]
+
+    # early close
+    pages = client.databases.iter_query("database_id")
+    await pages.__anext__()
+    await pages.aclose()
@@ -76,3 +76,57 @@ def test_unquote_params(params, expected):
     from notionx.utils import unquote_params
     unquote_params(params)
     assert params == expected  # in-place modification
+
+
+_DEFAULT_ANNOTATIONS = {"bold": False, "italic": False, "strikethrough": False, "underline": False, "code": False,
+                        "color": "default"}
+
+_KNOWN_PAGE = {
+    "object": "page",
+    "id": "page_id",
+    "archived": False,
+    "properties": {
+        "Name": {"id": "title", "type": "title", "title": [
+            {"type": "text", "text": {"content": "Mango", "link": None}, "annotations": _DEFAULT_ANNOTATIONS,
+             "plain_text": "Mango", "href": None}
+        ]},
+        "Notes": {"id": "ghi", "type": "rich_text", "rich_text": [
+            {"type": "text", "text": {"content": "Ripe", "link": {"url": "https://example.com"}},
+             "annotations": dict(_DEFAULT_ANNOTATIONS, bold=True), "plain_text": "Ripe", "href": "https://example.com"}
+        ]},
+        "Price": {"id": "abc", "type": "number", "number": 3.5},
+        "Harvest": {"id": "jkl", "type": "date",
+                    "date": {"start": "2024-01-01", "end": "2024-01-05", "time_zone": None}},
+        "Tags": {"id": "def", "type": "multi_select", "multi_select": [{"id": "1", "name": "Fruit", "color": "red"}]},
+    },
+}
+
+
+@pytest.mark.parametrize("value, expected", [
+    ({}, True),
+    ({"archived": False}, True),
+    ({"archived": True}, False),
+    ({"properties": {"Price": {"number": 3.5}}}, True),
+    ({"properties": {"Price": {"number": 4}}}, False),
+    ({"properties": {"Name": {"title": [{"text": {"content": "Mango"}}]}}}, True),
+    ({"properties": {"Name": {"title": [{"text": {"content": "Apple"}}]}}}, False),
+    ({"properties": {"Name": {"title": [{"text": {"content": "Mango"}, "annotations": {"bold": True}}]}}}, False),
+    # sending a rich text without its annotations or its link resets them
+    ({"properties": {"Notes": {"rich_text": [{"text": {"content": "Ripe"}}]}}}, False),
+    ({"properties": {"Notes": {"rich_text": [{"text": {"content": "Ripe", "link": {"url": "https://example.com"}},
+                                              "annotations": {"bold": False}}]}}}, False),
+    ({"properties": {"Notes": {"rich_text": [{"text": {"content": "Ripe", "link": {"url": "https://example.com"}},
+                                              "annotations": {"bold": True}}]}}}, True),
+    ({"properties": {"Tags": {"multi_select": [{"name": "Fruit"}]}}}, True),
+    ({"properties": {"Tags": {"multi_select": [{"name": "Fruit"}, {"name": "Yellow"}]}}}, False),
+    ({"properties": {"Unknown": {"number": 1}}}, False),
+    # sending a date without its end clears the end
+    ({"properties": {"Harvest": {"date": {"start": "2024-01-01"}}}}, False),
+    ({"properties": {"Harvest": {"date": {"start": "2024-01-01", "end": "2024-01-05"}}}}, True),
+    ({"icon": {"emoji": "🥭"}}, False),
+])
+def test_is_contained_in(value, expected):
+    """ Test if the `is_contained_in` function works as expected.
+    """
+    from notionx.utils import is_contained_in
+    assert is_contained_in(value, _KNOWN_PAGE) is expected
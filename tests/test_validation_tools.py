@@ -1,11 +1,14 @@
+import json
 import os
+import random
 
+import httpx
 import pytest
 
 from notionx import LocalValidationError
 from tests.constants import NOTION_BASE_PAGE_ID_KEY
-from tests.helpers import get_client, get_base_page_id
-from notionx.validation_tools import validate_dict_parameter
+from tests.helpers import get_client, get_base_page_id, get_mocked_client
+from notionx.validation_tools import validate_dict_parameter, organize_and_validate_dict_parameter, OneOf
 
 
 def test_one_of_validator():
@@ -183,3 +186,73 @@ def test_validation_decorator():
         def func(param_dict: dict): ...
 
         func(2)
+
+
+def test_merged_validation_decorator():
+    """ The merged decorator behaves like `organize_kwargs_as_a_dict_param` stacked on `validate_dict_parameter`,
+    and checks the decorated function once at decoration time.
+    """
+    @organize_and_validate_dict_parameter("param_dict", ("a", "b", "c"), ("a", OneOf("b", "c")))
+    def func(obj_id: str, param_dict: dict = None, flag: bool = False):
+        return obj_id, param_dict, flag
+
+    assert func("id", {"a": 1, "b": 2}) == ("id", {"a": 1, "b": 2}, False)
+    assert func("id", a=1, c=3, flag=True) == ("id", {"a": 1, "c": 3}, True)
+    assert func(obj_id="id", param_dict={"a": 1, "b": 2}) == ("id", {"a": 1, "b": 2}, False)
+    # the real parameter is used first
+    assert func("id", {"a": 1, "b": 2}, b=3) == ("id", {"a": 1, "b": 2}, False)
+    assert func("id", None, True, a=1, b=2) == ("id", {"a": 1, "b": 2}, True)
+
+    with pytest.raises(LocalValidationError, match="The parameter `param_dict` is missing the required key `a`."):
+        func("id", b=2)
+    with pytest.raises(LocalValidationError, match="The dict contains more than one key in specified key list.*"):
+        func("id", a=1, b=2, c=3)
+    with pytest.raises(LocalValidationError, match="The key `d` contained in the parameter `param_dict` is invalid."):
+        func("id", a=1, b=2, d=4)
+    with pytest.raises(LocalValidationError, match="The parameter `param_dict` must be a dict."):
+        func("id", 2)
+
+    with pytest.raises(TypeError, match="The decorated function must have the `.*` parameter."):
+        @organize_and_validate_dict_parameter("not_existing_param", ("a", "b"))
+        def func(param_dict: dict = None): ...
+
+    with pytest.raises(TypeError, match="The parameter `.*` need to have a default value."):
+        @organize_and_validate_dict_parameter("param_dict", ("a", "b"))
+        def func(param_dict: dict): ...
+
+    with pytest.raises(TypeError, match="Unexpected type of .*"):
+        @organize_and_validate_dict_parameter("param_dict", ("a", "b"), (1,))
+        def func(param_dict: dict = None): ...
+
+
+def _echo_handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json=json.loads(request.content or b"{}"))
+
+
+def test_local_validation_switch():
+    """ Local validation can be turned off or sampled by the client option, and forced or skipped per call. """
+    # development mode by default
+    client = get_mocked_client(_echo_handler)
+    with pytest.raises(LocalValidationError, match="The key `invalid_key` contained in the parameter .* is invalid."):
+        client.search(query="test", invalid_key=1)
+    assert client.search(query="test", invalid_key=1, local_validation=False) == {"query": "test", "invalid_key": 1}
+    assert client.search({"query": "test", "invalid_key": 1}, local_validation=False) == \
+           {"query": "test", "invalid_key": 1}
+
+    # production mode
+    client = get_mocked_client(_echo_handler, local_validation_rate=0)
+    assert client.search(query="test", invalid_key=1) == {"query": "test", "invalid_key": 1}
+    assert client.pages.update_many([("page_id", {"invalid_key": 1})]) == [{"invalid_key": 1}]
+    with pytest.raises(LocalValidationError, match="The parameter `.*` is missing the required key `children`."):
+        client.blocks.children.append("block_id", after="block_id", local_validation=True)
+
+    # sampled validation
+    random.seed(0)
+    client = get_mocked_client(_echo_handler, local_validation_rate=0.5)
+    failures = 0
+    for _ in range(200):
+        try:
+            client.search(invalid_key=1)
+        except LocalValidationError:
+            failures += 1
+    assert 50 < failures < 150